@@ -5,11 +5,13 @@ This is a highway=service road that was filtered out during initial data collect
 """
 
 import requests
-import json
 import sqlite3
 import os
-from shapely.geometry import LineString, mapping, shape
-from shapely.ops import linemerge
+import sys
+from shapely.geometry import LineString
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts'))
+from incremental_cluster import apply_patch, patch_to_sql, recluster_street
 
 def download_darwin_place():
     """Download Darwin Place geometry from Overpass API"""
@@ -45,8 +47,8 @@ def process_geometry(element):
 
     return LineString(coords)
 
-def insert_into_database(db_path):
-    """Insert Darwin Place into the D1 database"""
+def insert_into_database(db_path, sql_output='darwin_place_patch.sql'):
+    """Insert Darwin Place into the D1 database, re-clustering it with Grid 200m"""
     print(f"Downloading data...")
     data = download_darwin_place()
 
@@ -56,29 +58,10 @@ def insert_into_database(db_path):
 
     print(f"Found {len(data['elements'])} way(s)")
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
     city = 'canberra'
     street_name = 'Darwin Place'
 
-    # Get next instance_id for this street name in this city
-    cursor.execute("""
-        SELECT COALESCE(MAX(instance_id), 0) + 1
-        FROM street_segments
-        WHERE city = ? AND name = ?
-    """, (city, street_name))
-    instance_id = cursor.fetchone()[0]
-
-    # Get next segment_id
-    cursor.execute("SELECT COALESCE(MAX(segment_id), 0) + 1 FROM street_segments")
-    segment_id = cursor.fetchone()[0]
-
-    # Generate readable_id
-    readable_id = f"{street_name.lower().replace(' ', '_')}_{instance_id}"
-
-    segments_added = 0
-
+    new_segments = []
     for element in data['elements']:
         if element['type'] != 'way':
             continue
@@ -87,45 +70,35 @@ def insert_into_database(db_path):
         if not geom:
             continue
 
-        # Calculate bounding box
-        coords = list(geom.coords)
-        lats = [lat for lon, lat in coords]
-        lngs = [lon for lon, lat in coords]
-
-        min_lat, max_lat = min(lats), max(lats)
-        min_lng, max_lng = min(lngs), max(lngs)
-
-        # Extract base name and street type
-        base_name = 'Darwin'
-        street_type = 'Place'
-
-        # Store as GeoJSON LineString
-        geometry_json = json.dumps(mapping(geom))
-
-        cursor.execute("""
-            INSERT INTO street_segments (
-                segment_id, city, name, base_name, street_type,
-                instance_id, readable_id, geometry,
-                min_lat, max_lat, min_lng, max_lng
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            segment_id, city, street_name, base_name, street_type,
-            instance_id, readable_id, geometry_json,
-            min_lat, max_lat, min_lng, max_lng
-        ))
-
-        segment_id += 1
-        segments_added += 1
-        print(f"  Added segment {segments_added} for {street_name}")
-
-    conn.commit()
+        new_segments.append([list(c) for c in geom.coords])
+
+    if not new_segments:
+        print("No valid geometries found")
+        return
+
+    conn = sqlite3.connect(db_path)
+
+    # Re-cluster the whole street (stored + new segments); stored instance
+    # numbering is kept, so a split or merge may number instances
+    # differently from a full add_instance_ids run
+    patch = recluster_street(conn, city, street_name, new_segments)
+    apply_patch(conn, patch)
     conn.close()
 
-    print(f"\n✓ Successfully added {segments_added} segment(s) for Darwin Place")
+    # Same patch for the remote D1 database
+    with open(sql_output, 'w') as f:
+        f.write('\n'.join(patch_to_sql(patch)))
+        f.write('\n')
+
+    print(f"\n✓ Successfully added {len(patch['inserts'])} segment(s) for Darwin Place")
     print(f"  City: {city}")
     print(f"  Street: {street_name}")
-    print(f"  Instance ID: {instance_id}")
-    print(f"  Readable ID: {readable_id}")
+    print(f"  Instances: {patch['total_instances']}")
+    print(f"  Updated existing segments: {len(patch['updates'])}")
+    for rid in sorted({row['readable_id'] for row in patch['inserts']}):
+        print(f"  Readable ID: {rid}")
+    print(f"\nTo apply on the remote D1 database:")
+    print(f"  cd worker && npx wrangler d1 execute street-names --remote --file=../{sql_output}")
 
 if __name__ == '__main__':
     # Path to local D1 database
@@ -4,119 +4,12 @@ Add instance/cluster IDs to GeoJSON features based on Grid 200m methodology.
 This assigns each segment to its street instance for visualization.
 """
 
-import json
-from collections import defaultdict
 import time
 import re
 
-def method_grid_flood_fill(segments, grid_size):
-    """Grid-based flood fill method for grouping connected segments."""
-    if not segments:
-        return []
-
-    cell_to_segments = defaultdict(list)
-
-    for seg_idx, coords in enumerate(segments):
-        for coord in coords:
-            lng, lat = coord[0], coord[1]
-            cell_lat = round(lat / grid_size) * grid_size
-            cell_lng = round(lng / grid_size) * grid_size
-            cell_key = f"{cell_lat},{cell_lng}"
-            if seg_idx not in cell_to_segments[cell_key]:
-                cell_to_segments[cell_key].append(seg_idx)
-
-    visited_cells = set()
-    components = []
-
-    for start_cell in cell_to_segments:
-        if start_cell in visited_cells:
-            continue
-
-        queue = [start_cell]
-        visited_cells.add(start_cell)
-        component_segments = set()
-
-        while queue:
-            cell = queue.pop(0)
-
-            for seg_idx in cell_to_segments[cell]:
-                component_segments.add(seg_idx)
-
-            lat_str, lng_str = cell.split(',')
-            lat = float(lat_str)
-            lng = float(lng_str)
-
-            for dlat in [-grid_size, 0, grid_size]:
-                for dlng in [-grid_size, 0, grid_size]:
-                    if dlat == 0 and dlng == 0:
-                        continue
-
-                    adj_lat = round((lat + dlat) / grid_size) * grid_size
-                    adj_lng = round((lng + dlng) / grid_size) * grid_size
-                    adj_cell = f"{adj_lat},{adj_lng}"
-
-                    if adj_cell in cell_to_segments and adj_cell not in visited_cells:
-                        visited_cells.add(adj_cell)
-                        queue.append(adj_cell)
-
-        if component_segments:
-            components.append(list(component_segments))
-
-    # Post-process: merge components that share endpoints
-    components = merge_components_by_endpoints(segments, components)
-
-    return components
-
-
-def merge_components_by_endpoints(segments, components):
-    """
-    Merge components that share any endpoint coordinates.
-    This handles the case where segments connect but fall in different grid cells.
-    """
-    if len(components) <= 1:
-        return components
-
-    # Build endpoint -> component mapping
-    endpoint_to_components = defaultdict(set)
-
-    for comp_idx, component in enumerate(components):
-        for seg_idx in component:
-            coords = segments[seg_idx]
-            if coords:
-                # Get first and last point
-                start = tuple(coords[0])  # (lng, lat)
-                end = tuple(coords[-1])
-                endpoint_to_components[start].add(comp_idx)
-                endpoint_to_components[end].add(comp_idx)
-
-    # Find components that need to be merged (share endpoints)
-    # Use union-find to group connected components
-    parent = list(range(len(components)))
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    # Union components that share endpoints
-    for endpoint, comp_indices in endpoint_to_components.items():
-        if len(comp_indices) > 1:
-            comp_list = list(comp_indices)
-            for i in range(len(comp_list) - 1):
-                union(comp_list[i], comp_list[i + 1])
-
-    # Group segments by their merged component
-    merged = defaultdict(list)
-    for comp_idx, component in enumerate(components):
-        root = find(comp_idx)
-        merged[root].extend(component)
-
-    return list(merged.values())
+from geojson_io import FeatureCollectionWriter, iter_features
+from grid_engine import cluster_street, resolve_backend
+from segment_table import SegmentTable
 
 
 def sanitize_for_id(text):
@@ -148,91 +41,173 @@ def detect_city_from_path(input_file):
     return 'Unknown'
 
 
-def add_instance_ids(input_file, output_file, city_name=None):
-    """
-    Add _instanceId and _readableId properties to each feature in the GeoJSON.
+def format_readable_id(city_name, safe_street_name, instance_num):
+    """Readable ID of one instance (instance_num is 1-based), e.g. Melbourne_Sydney_Road_03."""
+    return f"{city_name}_{safe_street_name}_{instance_num:02d}"
 
-    Args:
-        input_file: Path to input GeoJSON
-        output_file: Path to output GeoJSON with instance IDs
-        city_name: City name (auto-detected if not provided)
-    """
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
 
-    features = data['features']
-    print(f"Loaded {len(features)} features")
+def set_instance_properties(properties, city_name, safe_street_name, instance_num, total_instances):
+    """Write the instance ID properties for one segment (instance_num is 1-based)."""
+    # Keep numeric _instanceId for backwards compatibility (0-indexed)
+    properties['_instanceId'] = instance_num - 1
+    properties['_totalInstances'] = total_instances
+    properties['_readableId'] = format_readable_id(city_name, safe_street_name, instance_num)
+    properties['_instanceNum'] = instance_num
 
-    # Detect city if not provided
-    if not city_name:
-        city_name = detect_city_from_path(input_file)
-    print(f"City: {city_name}")
 
-    # Group by street name
-    street_features = defaultdict(list)
-    for idx, feature in enumerate(features):
-        name = feature['properties'].get('name', '')
-        if name:
-            street_features[name].append((idx, feature))
+def instance_labels_python(features):
+    """
+    Cluster each street name separately with the per-street grid engine.
+
+    Args:
+        features: Iterable of GeoJSON features, or a SegmentTable
 
-    print(f"Found {len(street_features)} unique street names")
+    Returns:
+        List with one entry per feature: (street_name, instance_num,
+        total_instances) with a 1-based instance_num, or None for unnamed or
+        empty features
+    """
+    # Keep names and coordinates only, grouped by street name
+    table = features if isinstance(features, SegmentTable) else SegmentTable.from_features(features)
+    street_segments = {name: indices for name, indices in table.segments_by_name().items() if indices}
+
+    print(f"Found {len(street_segments)} unique street names")
     print("Assigning instance IDs...")
 
     grid_size = 200 / 111000  # 200m in degrees
 
+    labels = [None] * len(table)
     processed = 0
-    for street_name, feature_list in street_features.items():
-        # Extract segments for this street
-        segments = []
-        for idx, feature in feature_list:
-            coords = feature['geometry']['coordinates']
-            if coords:
-                segments.append(coords)
-
-        # Run clustering
-        components = method_grid_flood_fill(segments, grid_size)
-
-        # Check if highway (merge all components)
-        is_highway = 'Highway' in street_name or 'Freeway' in street_name or 'Motorway' in street_name
-        if is_highway and len(components) > 1:
-            components = [sum(components, [])]  # Merge all into one
-
-        # Create sanitized street name for IDs
-        safe_street_name = sanitize_for_id(street_name)
-
-        # Assign instance IDs
-        for instance_num, component in enumerate(components, start=1):
-            # Create readable ID: Melbourne_Sydney_Road_03
-            readable_id = f"{city_name}_{safe_street_name}_{instance_num:02d}"
+    for street_name, segment_list in street_segments.items():
+        # Run clustering (merges highway components into one)
+        segments = [table.segment_coords(table[idx]) for idx in segment_list]
+        components = cluster_street(street_name, segments, grid_size)
 
+        for instance_num, component in enumerate(components, start=1):
             for seg_idx in component:
-                feature_idx, feature = feature_list[seg_idx]
-                # Keep numeric _instanceId for backwards compatibility (0-indexed)
-                features[feature_idx]['properties']['_instanceId'] = instance_num - 1
-                features[feature_idx]['properties']['_totalInstances'] = len(components)
-                # Add new readable ID
-                features[feature_idx]['properties']['_readableId'] = readable_id
-                features[feature_idx]['properties']['_instanceNum'] = instance_num
+                labels[segment_list[seg_idx]] = (street_name, instance_num, len(components))
 
         processed += 1
         if processed % 1000 == 0:
-            print(f"Processed {processed}/{len(street_features)} streets...")
+            print(f"Processed {processed}/{len(street_segments)} streets...")
 
-    print(f"\nSaving to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(data, f, separators=(',', ':'))  # Compact JSON
+    return labels
 
-    print("Done!")
 
-    # Show sample IDs
+def instance_labels_from_arrays(features, workers=1, parse_workers=1):
+    """
+    Cluster every street name from flat city arrays.
+
+    With workers == 1 this is the single-pass vectorized backend; with more
+    it runs the per-street engine in a process pool over shared memory.
+
+    Args:
+        features: Iterable of GeoJSON features, or a city store / GeoJSON
+            path to load the arrays from (memory-mapped for stores)
+        workers: Number of worker processes
+        parse_workers: Number of processes to parse a GeoJSON path with
+
+    Returns:
+        Per-feature labels, as instance_labels_python()
+    """
+    if isinstance(features, str):
+        from city_store import load_arrays
+        arrays = load_arrays(features, parse_workers=parse_workers)
+    else:
+        from city_arrays import load_city_arrays
+        arrays = load_city_arrays(features)
+    print(f"Found {len(arrays['names'])} unique street names")
+    print("Assigning instance IDs...")
+
+    if workers > 1:
+        from parallel_clustering import cluster_city_parallel
+        instance_ids, instance_counts = cluster_city_parallel(arrays, 200 / 111000, workers)
+    else:
+        from grid_numpy import cluster_city_grid
+        instance_ids, instance_counts = cluster_city_grid(arrays, 200 / 111000)
+
+    names = arrays['names']
+    instance_counts = instance_counts.tolist()
+
+    return [
+        (names[name_code], instance_id + 1, instance_counts[name_code]) if instance_id >= 0 else None
+        for name_code, instance_id in zip(arrays['name_codes'].tolist(), instance_ids.tolist())
+    ]
+
+
+def apply_instance_labels(features, labels, city_name):
+    """
+    Yield features with instance ID properties set from per-feature labels.
+
+    Args:
+        features: Iterable of GeoJSON features, in the order they were labelled
+        labels: Output of instance_labels_python() / instance_labels_from_arrays()
+        city_name: City name for readable IDs
+    """
+    safe_street_names = {}
+    for feature, label in zip(features, labels):
+        if label is not None:
+            street_name, instance_num, total_instances = label
+            safe_street_name = safe_street_names.get(street_name)
+            if safe_street_name is None:
+                safe_street_name = safe_street_names[street_name] = sanitize_for_id(street_name)
+            set_instance_properties(feature['properties'], city_name, safe_street_name,
+                                    instance_num, total_instances)
+        yield feature
+
+
+def add_instance_ids(input_file, output_file, city_name=None, backend='auto', workers=1, parse_workers=1):
+    """
+    Add _instanceId and _readableId properties to each feature in the GeoJSON.
+
+    Args:
+        input_file: Path to input GeoJSON or city store directory
+        output_file: Path to output GeoJSON with instance IDs
+        city_name: City name (auto-detected if not provided)
+        backend: 'numpy' (whole-city vectorized), 'python' (per-street loop)
+            or 'auto' to use numpy when it is installed
+        workers: Number of processes for the per-street backend; more than
+            one implies the python backend unless numpy is requested
+        parse_workers: Number of processes to parse the input GeoJSON with
+            for clustering (parallel_parse.py); 1 streams it serially
+    """
+    # Detect city if not provided
+    if not city_name:
+        city_name = detect_city_from_path(input_file)
+    print(f"City: {city_name}")
+
+    if workers > 1 and backend == 'auto':
+        backend = 'python'
+    backend = resolve_backend(backend)
+    print(f"Backend: {backend}" + (f" ({workers} workers)" if backend == 'python' and workers > 1 else ""))
+
+    # Pass 1: stream names and coordinates only, and cluster
+    print(f"Loading {input_file}...")
+    start_time = time.time()
+    if backend == 'numpy':
+        labels = instance_labels_from_arrays(input_file, parse_workers=parse_workers)
+    elif workers > 1:
+        labels = instance_labels_from_arrays(input_file, workers=workers, parse_workers=parse_workers)
+    elif parse_workers > 1:
+        from parallel_parse import load_features_parallel
+        labels = instance_labels_python(load_features_parallel(input_file, parse_workers))
+    else:
+        labels = instance_labels_python(iter_features(input_file))
+    print(f"Loaded {len(labels)} features")
+    print(f"Clustered in {time.time() - start_time:.2f} seconds")
+
+    # Pass 2: stream features again, label them and write them out
+    print(f"\nSaving to {output_file}...")
     sample_ids = set()
-    for feature in features[:100]:
-        if '_readableId' in feature['properties']:
-            sample_ids.add(feature['properties']['_readableId'])
-            if len(sample_ids) >= 5:
-                break
+    with FeatureCollectionWriter(output_file) as writer:  # Compact JSON
+        for feature in apply_instance_labels(iter_features(input_file), labels, city_name):
+            if writer.count < 100 and len(sample_ids) < 5 and '_readableId' in feature['properties']:
+                sample_ids.add(feature['properties']['_readableId'])
+            writer.write(feature)
+
+    print(f"Done! ({writer.bytes_written / 1024 / 1024:.1f} MB)")
 
+    # Show sample IDs
     if sample_ids:
         print("\nSample IDs:")
         for rid in sorted(sample_ids)[:5]:
@@ -240,10 +215,20 @@ def add_instance_ids(input_file, output_file, city_name=None):
 
 
 if __name__ == '__main__':
-    import sys
-    if len(sys.argv) < 3:
-        print("Usage: python3 add_instance_ids.py input.geojson output.geojson [city_name]")
-        sys.exit(1)
-
-    city = sys.argv[3] if len(sys.argv) > 3 else None
-    add_instance_ids(sys.argv[1], sys.argv[2], city)
+    import argparse
+    parser = argparse.ArgumentParser(description='Add Grid 200m instance IDs to GeoJSON features')
+    parser.add_argument('input', help='Input GeoJSON file')
+    parser.add_argument('output', help='Output GeoJSON file')
+    parser.add_argument('city', nargs='?', default=None,
+                        help='City name (auto-detected from the path if omitted)')
+    parser.add_argument('--backend', choices=['auto', 'numpy', 'python'], default='auto',
+                        help='Clustering backend (default: numpy if installed)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Cluster streets in N processes with the per-street backend')
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help='Parse the input GeoJSON in N processes')
+
+    args = parser.parse_args()
+
+    add_instance_ids(args.input, args.output, args.city, backend=args.backend, workers=args.workers,
+                     parse_workers=args.parse_workers)
@@ -10,6 +10,9 @@ echo ""
 
 CITIES="sydney melbourne brisbane perth adelaide canberra hobart darwin"
 
+# Parallel per-street clustering, e.g. WORKERS=16 on the build box
+WORKERS="${WORKERS:-1}"
+
 for CITY in $CITIES; do
     echo "================================================================"
     echo "Processing: $CITY"
@@ -26,7 +29,7 @@ for CITY in $CITIES; do
     echo "File: $INPUT"
     echo ""
 
-    python3 scripts/add_instance_ids.py "$INPUT" "$OUTPUT" "$CITY"
+    python3 scripts/add_instance_ids.py "$INPUT" "$OUTPUT" "$CITY" --workers "$WORKERS"
 
     echo ""
     echo "Completed: $CITY"
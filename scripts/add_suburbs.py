@@ -3,7 +3,7 @@
 Add suburb information to OSM data using reverse geocoding
 We'll sample points from the data and add suburb info via Nominatim API
 """
-import json
+import json_backend
 import requests
 from time import sleep
 from collections import defaultdict
@@ -44,8 +44,7 @@ def add_suburbs_to_data():
     """Add suburb data to existing GeoJSON"""
     print("Loading existing OSM data...")
 
-    with open('data/sydney-roads-osm.geojson', 'r') as f:
-        data = json.load(f)
+    data = json_backend.load('data/sydney-roads-osm.geojson')
 
     features = data['features']
     print(f"Loaded {len(features)} features")
@@ -105,8 +104,7 @@ def add_suburbs_to_data():
     # Save updated data
     print("\nSaving updated data...")
     output_file = 'data/sydney-roads-osm-with-suburbs.geojson'
-    with open(output_file, 'w') as f:
-        json.dump(data, f, indent=2)
+    json_backend.dump(data, output_file)
 
     print(f"Saved to {output_file}")
 
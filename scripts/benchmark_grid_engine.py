@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark the integer-encoded grid engine against the original string-keyed
+flood fill and check that both produce the same partitions.
+
+Usage:
+    python3 scripts/benchmark_grid_engine.py data/cities/sydney/streets.geojson data/cities/melbourne/streets.geojson
+"""
+
+import sys
+import time
+from collections import defaultdict
+
+import json_backend
+from grid_engine import method_grid_flood_fill, merge_components_by_endpoints
+
+GRID_SIZE = 200 / 111000  # 200m in degrees
+
+
+def legacy_grid_flood_fill(segments, grid_size):
+    """The original string-keyed implementation, kept as the reference."""
+    if not segments:
+        return []
+
+    cell_to_segments = defaultdict(list)
+
+    for seg_idx, coords in enumerate(segments):
+        for coord in coords:
+            lng, lat = coord[0], coord[1]
+            cell_lat = round(lat / grid_size) * grid_size
+            cell_lng = round(lng / grid_size) * grid_size
+            cell_key = f"{cell_lat},{cell_lng}"
+            if seg_idx not in cell_to_segments[cell_key]:
+                cell_to_segments[cell_key].append(seg_idx)
+
+    visited_cells = set()
+    components = []
+
+    for start_cell in cell_to_segments:
+        if start_cell in visited_cells:
+            continue
+
+        queue = [start_cell]
+        visited_cells.add(start_cell)
+        component_segments = set()
+
+        while queue:
+            cell = queue.pop(0)
+
+            for seg_idx in cell_to_segments[cell]:
+                component_segments.add(seg_idx)
+
+            lat_str, lng_str = cell.split(',')
+            lat = float(lat_str)
+            lng = float(lng_str)
+
+            for dlat in [-grid_size, 0, grid_size]:
+                for dlng in [-grid_size, 0, grid_size]:
+                    if dlat == 0 and dlng == 0:
+                        continue
+
+                    adj_lat = round((lat + dlat) / grid_size) * grid_size
+                    adj_lng = round((lng + dlng) / grid_size) * grid_size
+                    adj_cell = f"{adj_lat},{adj_lng}"
+
+                    if adj_cell in cell_to_segments and adj_cell not in visited_cells:
+                        visited_cells.add(adj_cell)
+                        queue.append(adj_cell)
+
+        if component_segments:
+            components.append(list(component_segments))
+
+    return merge_components_by_endpoints(segments, components)
+
+
+def normalize_partition(components):
+    """Order-preserving, duplicate-free view of a component list for comparison."""
+    return [sorted(set(component)) for component in components]
+
+
+def benchmark_file(input_file):
+    """Time both engines over every street in a GeoJSON file."""
+    print(f"Loading {input_file}...")
+    features = json_backend.load(input_file)['features']
+
+    segments_by_name = defaultdict(list)
+    for feature in features:
+        name = feature['properties'].get('name')
+        coords = feature['geometry']['coordinates']
+        if name and coords:
+            segments_by_name[name].append(coords)
+
+    print(f"Loaded {len(features)} features, {len(segments_by_name)} unique names")
+
+    start_time = time.time()
+    legacy = {name: legacy_grid_flood_fill(segs, GRID_SIZE) for name, segs in segments_by_name.items()}
+    legacy_time = time.time() - start_time
+
+    start_time = time.time()
+    current = {name: method_grid_flood_fill(segs, GRID_SIZE) for name, segs in segments_by_name.items()}
+    current_time = time.time() - start_time
+
+    mismatches = [name for name in segments_by_name
+                  if normalize_partition(legacy[name]) != normalize_partition(current[name])]
+
+    print(f"  String-keyed engine:  {legacy_time:.2f}s")
+    print(f"  Integer-keyed engine: {current_time:.2f}s ({legacy_time / max(current_time, 1e-9):.1f}x faster)")
+    print(f"  Partition mismatches: {len(mismatches)}")
+    for name in mismatches[:10]:
+        print(f"    {name}")
+
+    return not mismatches
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python3 benchmark_grid_engine.py <streets.geojson> [more.geojson ...]")
+        sys.exit(1)
+
+    all_match = True
+    for input_file in sys.argv[1:]:
+        all_match = benchmark_file(input_file) and all_match
+        print()
+
+    sys.exit(0 if all_match else 1)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the installed JSON backends on city road files and check that
+their output reads back identically with the standard library.
+
+Usage:
+    python3 scripts/benchmark_json_backends.py [streets.geojson ...]
+
+Compressed inputs (.gz, .zst) are decompressed first; rates are per MB of JSON.
+
+With no arguments every data/cities/<city>/streets.geojson that exists is used.
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+from compressed_io import open_binary
+from json_backend import available_backends, get_backend
+
+
+def benchmark_file(input_file, backends):
+    """Time parse and compact dump of one file with each backend."""
+    with open_binary(input_file, 'rb') as f:
+        raw = f.read()
+    size_mb = len(raw) / 1024 / 1024
+    reference = json.loads(raw)
+
+    print(f"{input_file} ({size_mb:.1f} MB)")
+
+    all_match = True
+    for name in backends:
+        _, loads, dumps = get_backend(name)
+
+        start_time = time.time()
+        data = loads(raw)
+        parse_time = time.time() - start_time
+
+        start_time = time.time()
+        encoded = dumps(data)
+        dump_time = time.time() - start_time
+
+        # What the web app and every other script will read back
+        matches = json.loads(encoded) == reference
+        all_match = all_match and matches
+
+        print(f"  {name:8s} parse {size_mb / max(parse_time, 1e-9):7.1f} MB/s   "
+              f"dump {len(encoded) / 1024 / 1024 / max(dump_time, 1e-9):7.1f} MB/s   "
+              f"output {len(encoded) / 1024 / 1024:.1f} MB   "
+              f"{'round-trip OK' if matches else 'ROUND-TRIP MISMATCH'}")
+
+    return all_match
+
+
+if __name__ == '__main__':
+    input_files = sys.argv[1:] or sorted(glob.glob(os.path.join('data', 'cities', '*', 'streets.geojson')))
+    if not input_files:
+        print("Usage: python3 benchmark_json_backends.py <streets.geojson> [more.geojson ...]")
+        sys.exit(1)
+
+    backends = available_backends()
+    print(f"Backends: {', '.join(backends)}\n")
+
+    all_match = True
+    for input_file in input_files:
+        all_match = benchmark_file(input_file, backends) and all_match
+        print()
+
+    sys.exit(0 if all_match else 1)
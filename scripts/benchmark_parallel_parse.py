@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark parallel chunked GeoJSON parsing against the serial streaming
+parser, across worker counts, and check that the results are identical.
+
+Usage:
+    python3 scripts/benchmark_parallel_parse.py data/cities/sydney/streets.geojson --workers 1 2 4 8
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from city_arrays import load_city_arrays
+from compressed_io import open_binary
+from geojson_io import iter_features
+from parallel_parse import CHUNKS_PER_WORKER, feature_ranges, load_arrays_parallel, load_features_parallel
+
+
+def arrays_equal(a, b):
+    """True if two city array dicts hold the same data."""
+    return (a['names'] == b['names']
+            and all(np.array_equal(a[key], b[key]) for key in ('coords', 'offsets', 'name_codes')))
+
+
+def benchmark_file(input_file, worker_counts):
+    """Time serial and parallel loading of one file; returns True if all results match."""
+    print(f"{input_file} ({os.path.getsize(input_file) / 1024 / 1024:.1f} MB on disk)")
+
+    start_time = time.time()
+    reference_features = list(iter_features(input_file))
+    serial_features_time = time.time() - start_time
+
+    start_time = time.time()
+    reference_arrays = load_city_arrays(iter_features(input_file))
+    serial_arrays_time = time.time() - start_time
+
+    print(f"  Serial streaming parse: features {serial_features_time:.2f}s, arrays {serial_arrays_time:.2f}s")
+
+    with open_binary(input_file, 'rb') as f:
+        data = f.read()
+    ranges = feature_ranges(data, max(worker_counts) * CHUNKS_PER_WORKER)
+    if ranges is None:
+        print("  Features array cannot be split; parallel loaders parse serially")
+
+    all_match = True
+    for workers in worker_counts:
+        start_time = time.time()
+        features = load_features_parallel(input_file, workers)
+        features_time = time.time() - start_time
+
+        start_time = time.time()
+        arrays = load_arrays_parallel(input_file, workers)
+        arrays_time = time.time() - start_time
+
+        matches = features == reference_features and arrays_equal(arrays, reference_arrays)
+        all_match = all_match and matches
+
+        print(f"  {workers:2d} workers: features {features_time:6.2f}s "
+              f"({serial_features_time / max(features_time, 1e-9):4.1f}x)   "
+              f"arrays {arrays_time:6.2f}s ({serial_arrays_time / max(arrays_time, 1e-9):4.1f}x)   "
+              f"{'identical' if matches else 'MISMATCH'}")
+
+    return all_match
+
+
+if __name__ == '__main__':
+    import argparse
+    cpu_count = os.cpu_count() or 1
+    default_workers = sorted({1, 2} | {2 ** i for i in range(cpu_count.bit_length()) if 2 ** i <= cpu_count})
+
+    parser = argparse.ArgumentParser(description='Benchmark parallel chunked GeoJSON parsing')
+    parser.add_argument('inputs', nargs='+', help='GeoJSON files (plain files are memory-mapped)')
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers,
+                        help=f'Worker counts to try (default: {default_workers}; {cpu_count} CPUs here)')
+
+    args = parser.parse_args()
+
+    all_match = True
+    for input_file in args.inputs:
+        all_match = benchmark_file(input_file, args.workers) and all_match
+        print()
+
+    sys.exit(0 if all_match else 1)
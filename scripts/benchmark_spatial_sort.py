@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark the worker's viewport query on a local SQLite copy of the D1 table,
+with rows inserted in file order and in Hilbert order (spatial_sort.py).
+
+For each ordering it reports the bounds query time over the same random
+viewports, the number of distinct table leaf pages holding each viewport's
+rows (estimated from rowids; a proxy for D1 rows/pages read), and how much
+of the city's extent each 10,000-row upload batch spans.
+
+Usage:
+    python3 scripts/benchmark_spatial_sort.py data/cities/sydney/streets.geojson sydney
+"""
+
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmark_viewport_queries import build_sqlite_database, query_sqlite, random_viewports
+from generate_sql_batches import iter_inserts
+
+BATCH_SIZE = 10000
+
+
+def _rows_per_leaf_page(conn):
+    """Average rows per street_segments leaf page, or None without the dbstat table."""
+    try:
+        (leaf_pages,) = conn.execute(
+            "SELECT count(*) FROM dbstat WHERE name = 'street_segments' AND pagetype = 'leaf'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    (rows,) = conn.execute("SELECT count(*) FROM street_segments").fetchone()
+    return rows / leaf_pages if leaf_pages else None
+
+
+def batch_extent(conn):
+    """Mean share (%) of the city's centre bbox covered by each upload batch's row centres."""
+    centres = conn.execute(
+        "SELECT (min_lng + max_lng) / 2, (min_lat + max_lat) / 2 FROM street_segments ORDER BY id").fetchall()
+
+    def area(points):
+        lngs = [p[0] for p in points]
+        lats = [p[1] for p in points]
+        return (max(lngs) - min(lngs)) * (max(lats) - min(lats))
+
+    city_area = area(centres) or 1.0
+    batches = [centres[i:i + BATCH_SIZE] for i in range(0, len(centres), BATCH_SIZE)]
+    return 100 * statistics.mean(area(batch) / city_area for batch in batches)
+
+
+def time_queries(db_path, city_name, viewports):
+    """Time the bounds query on every viewport; returns (times_ms, rows, pages, batch extent)."""
+    conn = sqlite3.connect(db_path)
+    rows_per_page = _rows_per_leaf_page(conn)
+    query_sqlite(conn, city_name, viewports[0])  # warm up
+
+    times_ms, rows, pages = [], [], []
+    for min_lat, min_lng, max_lat, max_lng in viewports:
+        start_time = time.perf_counter()
+        result = query_sqlite(conn, city_name, (min_lat, min_lng, max_lat, max_lng))
+        times_ms.append((time.perf_counter() - start_time) * 1000)
+        rows.append(len(result))
+
+        if rows_per_page:
+            ids = conn.execute(
+                "SELECT id FROM street_segments WHERE city = ? AND max_lat >= ? AND min_lat <= ? "
+                "AND max_lng >= ? AND min_lng <= ? LIMIT 10000",
+                (city_name, min_lat, max_lat, min_lng, max_lng)).fetchall()
+            pages.append(len({int((row_id - 1) / rows_per_page) for (row_id,) in ids}))
+
+    extent = batch_extent(conn)
+    conn.close()
+    return times_ms, rows, pages, extent
+
+
+def benchmark(input_file, city_name, n_viewports=200, work_dir=None):
+    """Build the table in both orders and compare the viewport queries."""
+    work_dir = work_dir or tempfile.mkdtemp(prefix='spatial_sort_benchmark_')
+    viewports = random_viewports(input_file, n_viewports)
+
+    results = {}
+    for label, spatial_sort in (('file order', False), ('Hilbert order', True)):
+        db_path = os.path.join(work_dir, f"{city_name}_{'hilbert' if spatial_sort else 'source'}.sqlite")
+        start_time = time.time()
+        build_sqlite_database(input_file, city_name, db_path,
+                              statements=iter_inserts(input_file, city_name, spatial_sort))
+        print(f"{label}: built {db_path} in {time.time() - start_time:.1f}s "
+              f"({os.path.getsize(db_path) / 1024 / 1024:.1f} MB)")
+        results[label] = time_queries(db_path, city_name, viewports)
+
+    print(f"\n{n_viewports} viewports, worker bounds query incl. geometry JSON parsing:")
+    for label, (times_ms, rows, pages, extent) in results.items():
+        times_ms = sorted(times_ms)
+        p95 = times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))]
+        pages_text = f"{statistics.mean(pages):6.0f} leaf pages/viewport" if pages else "(no dbstat)"
+        print(f"  {label:14s} median {statistics.median(times_ms):6.2f} ms   p95 {p95:6.2f} ms   "
+              f"{statistics.mean(rows):6.0f} rows   {pages_text}   "
+              f"batch spans {extent:5.1f}% of city")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark SQLite viewport queries before and after Hilbert sorting')
+    parser.add_argument('input', help='Output of add_instance_ids.py')
+    parser.add_argument('city', help='City name for the city column (e.g. sydney)')
+    parser.add_argument('--viewports', type=int, default=200, help='Number of random viewports (default: 200)')
+    parser.add_argument('--work-dir', help='Directory for the SQLite files (default: a temp dir)')
+
+    args = parser.parse_args()
+
+    benchmark(args.input, args.city, args.viewports, args.work_dir)
+    sys.exit(0)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark viewport reads: FlatGeobuf bbox reads against the SQLite/D1
+/api/streets?bounds= query.
+
+Builds a local SQLite database from the same INSERT statements that
+generate_sql_batches.py uploads to D1 (schema and idx_bounds index as in
+BACKEND_API.md) and a FlatGeobuf file, then times both on the same random
+map-sized viewports centred on street vertices. The SQLite query is the
+worker's (bounding-box overlap, LIMIT 10000) including JSON parsing of the
+geometry column; the FlatGeobuf read returns features whose geometry
+actually intersects the viewport, so its counts can be slightly lower.
+
+Usage:
+    python3 scripts/benchmark_viewport_queries.py data/cities/sydney/streets.geojson sydney
+"""
+
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import json_backend
+from flatgeobuf_io import read_bounds, write_flatgeobuf
+from generate_sql_batches import iter_inserts
+from geojson_io import iter_features
+
+SCHEMA = """
+CREATE TABLE street_segments (
+  id INTEGER PRIMARY KEY,
+  city TEXT NOT NULL,
+  name TEXT NOT NULL,
+  base_name TEXT,
+  street_type TEXT,
+  instance_id INTEGER NOT NULL,
+  readable_id TEXT,
+  geometry TEXT NOT NULL,
+  min_lat REAL,
+  max_lat REAL,
+  min_lng REAL,
+  max_lng REAL
+);
+CREATE INDEX idx_bounds ON street_segments(city, min_lat, max_lat, min_lng, max_lng);
+CREATE INDEX idx_name ON street_segments(city, name);
+"""
+
+# The worker's viewport query (worker/src/index.js)
+BOUNDS_QUERY = """
+SELECT name, instance_id, readable_id, geometry
+FROM street_segments
+WHERE city = ?
+  AND max_lat >= ? AND min_lat <= ?
+  AND max_lng >= ? AND min_lng <= ?
+LIMIT 10000
+"""
+
+
+def build_sqlite_database(input_file, city_name, db_path, statements=None):
+    """
+    Load generate_sql_batches.py INSERT statements into a local SQLite file.
+
+    Args:
+        input_file: Output of add_instance_ids.py
+        city_name: Value for the city column
+        db_path: SQLite file to create (replaced if it exists)
+        statements: INSERT statements to run instead of iter_inserts(input_file)
+
+    Returns:
+        Number of rows inserted
+    """
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    count = 0
+    for sql in statements if statements is not None else iter_inserts(input_file, city_name):
+        conn.execute(sql)
+        count += 1
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return count
+
+
+def random_viewports(input_file, n_viewports, seed=0):
+    """
+    Map-sized viewports (about 1-8 km across) centred on random street vertices.
+
+    Returns:
+        List of (min_lat, min_lng, max_lat, max_lng)
+    """
+    vertices = [feature['geometry']['coordinates'][0] for feature in iter_features(input_file)
+                if feature['geometry']['coordinates']]
+    rng = random.Random(seed)
+    viewports = []
+    for _ in range(n_viewports):
+        lng, lat = rng.choice(vertices)
+        half_height = rng.uniform(0.005, 0.035)
+        half_width = half_height * 1.6  # landscape map
+        viewports.append((lat - half_height, lng - half_width, lat + half_height, lng + half_width))
+    return viewports
+
+
+def query_sqlite(conn, city_name, bounds):
+    """Run the worker's bounds query and parse the geometries, as the worker does."""
+    min_lat, min_lng, max_lat, max_lng = bounds
+    rows = conn.execute(BOUNDS_QUERY, (city_name, min_lat, max_lat, min_lng, max_lng)).fetchall()
+    return [(name, instance_id, readable_id, json_backend.loads(geometry))
+            for name, instance_id, readable_id, geometry in rows]
+
+
+def _summary(times_ms):
+    times_ms = sorted(times_ms)
+    p95 = times_ms[min(len(times_ms) - 1, int(len(times_ms) * 0.95))]
+    return f"median {statistics.median(times_ms):6.1f} ms   p95 {p95:6.1f} ms"
+
+
+def benchmark(input_file, city_name, n_viewports=200, work_dir=None, fgb_path=None):
+    """Build both stores (unless fgb_path is given) and time the viewport reads."""
+    work_dir = work_dir or tempfile.mkdtemp(prefix='viewport_benchmark_')
+    db_path = os.path.join(work_dir, f'{city_name}.sqlite')
+
+    start_time = time.time()
+    rows = build_sqlite_database(input_file, city_name, db_path)
+    print(f"SQLite: {rows:,} rows in {time.time() - start_time:.1f}s, "
+          f"{os.path.getsize(db_path) / 1024 / 1024:.1f} MB ({db_path})")
+
+    if fgb_path is None:
+        fgb_path = os.path.join(work_dir, f'{city_name}.fgb')
+        start_time = time.time()
+        write_flatgeobuf(iter_features(input_file), fgb_path)
+        print(f"FlatGeobuf: built in {time.time() - start_time:.1f}s, "
+              f"{os.path.getsize(fgb_path) / 1024 / 1024:.1f} MB ({fgb_path})")
+
+    viewports = random_viewports(input_file, n_viewports)
+
+    # Warm both paths (imports, page cache) before timing
+    conn = sqlite3.connect(db_path)
+    query_sqlite(conn, city_name, viewports[0])
+    read_bounds(fgb_path, viewports[0])
+
+    sqlite_times, fgb_times = [], []
+    sqlite_rows = fgb_rows = 0
+    for bounds in viewports:
+        start_time = time.perf_counter()
+        sqlite_rows += len(query_sqlite(conn, city_name, bounds))
+        sqlite_times.append((time.perf_counter() - start_time) * 1000)
+
+        start_time = time.perf_counter()
+        fgb_rows += len(read_bounds(fgb_path, bounds))
+        fgb_times.append((time.perf_counter() - start_time) * 1000)
+    conn.close()
+
+    print(f"\n{n_viewports} viewports:")
+    print(f"  SQLite idx_bounds query:  {_summary(sqlite_times)}   {sqlite_rows / n_viewports:7.0f} rows/viewport")
+    print(f"  FlatGeobuf bbox read:     {_summary(fgb_times)}   {fgb_rows / n_viewports:7.0f} features/viewport")
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark FlatGeobuf bbox reads against SQLite viewport queries')
+    parser.add_argument('input', help='Output of add_instance_ids.py (GeoJSON, city store or .parquet)')
+    parser.add_argument('city', help='City name for the city column (e.g. sydney)')
+    parser.add_argument('--viewports', type=int, default=200, help='Number of random viewports (default: 200)')
+    parser.add_argument('--fgb', help='Existing .fgb file to read instead of building one')
+    parser.add_argument('--work-dir', help='Directory for the SQLite and FlatGeobuf files (default: a temp dir)')
+
+    args = parser.parse_args()
+
+    benchmark(args.input, args.city, args.viewports, args.work_dir, args.fgb)
+    sys.exit(0)
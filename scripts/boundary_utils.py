@@ -2,18 +2,86 @@
 """
 Utility functions for working with GCCSA metropolitan boundaries
 Provides point-in-polygon checking and boundary queries
+
+Shapely is only imported when geometry is needed, so get_all_cities() and
+(with a warm cache) get_metro_bounds() work without it. Parsed boundaries
+are cached next to the source as <city>_boundary.wkb: WKB plus precomputed
+bounds, keyed by the SHA-256 of the source JSON, so new processes skip the
+JSON parse and rebuild.
 """
-import json
+import hashlib
+import os
+import struct
+import tempfile
 from pathlib import Path
-from shapely.geometry import shape, Point
+
+import json_backend
+
+BOUNDARIES_DIR = Path(__file__).parent.parent / 'data' / 'boundaries'
+
+# Sidecar cache layout: magic, SHA-256 of the source file, bounds, then WKB
+CACHE_SUFFIX = '.wkb'
+_CACHE_MAGIC = b'BNDWKB01'
+_CACHE_HEADER = struct.Struct('<8s32s4d')
 
 # Cache for loaded boundaries
 _boundary_cache = {}
 
+# Cache for raster indexes (see BoundaryIndex)
+_index_cache = {}
+
+# Raster cells along the longer side of a city's bounding box
+RASTER_CELLS = 256
+
+def _boundary_file(city_name):
+    boundary_file = BOUNDARIES_DIR / f'{city_name}_boundary.json'
+    if not boundary_file.exists():
+        raise FileNotFoundError(f"Boundary file not found for {city_name}: {boundary_file}")
+    return boundary_file
+
+def _read_boundary_cache(boundary_file):
+    """
+    Read the sidecar cache of a boundary file
+
+    Returns:
+        (digest, bounds, wkb) with wkb None if the cache is missing or stale;
+        digest is the source file's SHA-256
+    """
+    digest = hashlib.sha256(boundary_file.read_bytes()).digest()
+    try:
+        data = boundary_file.with_suffix(CACHE_SUFFIX).read_bytes()
+    except OSError:
+        return digest, None, None
+
+    if len(data) < _CACHE_HEADER.size:
+        return digest, None, None
+    magic, cached_digest, *bounds = _CACHE_HEADER.unpack_from(data)
+    if magic != _CACHE_MAGIC or cached_digest != digest:
+        return digest, None, None
+    return digest, tuple(bounds), data[_CACHE_HEADER.size:]
+
+def _write_boundary_cache(boundary_file, digest, geom):
+    """Write the sidecar cache atomically; a read-only data directory just skips caching."""
+    cache_file = boundary_file.with_suffix(CACHE_SUFFIX)
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix='.' + cache_file.name + '.', dir=cache_file.parent)
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, digest, *geom.bounds))
+            f.write(geom.wkb)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        os.unlink(tmp_path)
+
 def load_city_boundary(city_name):
     """
     Load the boundary geometry for a city
 
+    Uses the WKB sidecar cache when it matches the source file, otherwise
+    parses the JSON and (re)writes the cache.
+
     Args:
         city_name: City identifier (e.g., 'sydney', 'melbourne')
 
@@ -23,19 +91,143 @@ def load_city_boundary(city_name):
     if city_name in _boundary_cache:
         return _boundary_cache[city_name]
 
-    boundary_file = Path(__file__).parent.parent / 'data' / 'boundaries' / f'{city_name}_boundary.json'
-
-    if not boundary_file.exists():
-        raise FileNotFoundError(f"Boundary file not found for {city_name}: {boundary_file}")
+    boundary_file = _boundary_file(city_name)
+    digest, _, wkb = _read_boundary_cache(boundary_file)
 
-    with open(boundary_file, 'r') as f:
-        data = json.load(f)
+    if wkb is not None:
+        from shapely import wkb as shapely_wkb
+        geom = shapely_wkb.loads(wkb)
+    else:
+        from shapely.geometry import shape
+        geom = shape(json_backend.load(boundary_file)['geometry'])
+        _write_boundary_cache(boundary_file, digest, geom)
 
-    geom = shape(data['geometry'])
     _boundary_cache[city_name] = geom
 
     return geom
 
+class BoundaryIndex:
+    """
+    Raster index over a boundary for fast point-in-polygon tests
+
+    The boundary's bounding box is divided into square cells, each
+    classified once as fully inside, fully outside or crossed by the
+    boundary edge. Points in inside/outside cells are answered from the
+    raster; points in edge cells are tested exactly against the part of
+    the boundary clipped to that cell. Results are identical to
+    boundary.contains(Point(lon, lat)).
+    """
+
+    OUTSIDE = 0
+    INSIDE = 1
+    EDGE = 2
+
+    def __init__(self, boundary, cells=RASTER_CELLS):
+        """
+        Args:
+            boundary: shapely Polygon/MultiPolygon
+            cells: Number of cells along the longer side of the bounding box
+        """
+        import numpy as np
+        import shapely
+
+        self.bounds = boundary.bounds
+        min_lon, min_lat, max_lon, max_lat = self.bounds
+        self.cell_size = max(max_lon - min_lon, max_lat - min_lat) / cells or 1.0
+        self.n_cols = max(1, int(np.ceil((max_lon - min_lon) / self.cell_size)))
+        self.n_rows = max(1, int(np.ceil((max_lat - min_lat) / self.cell_size)))
+
+        # Cells are classified slightly padded, so a point on a cell's edge
+        # (or rounded into the neighbouring cell) gets the same answer
+        pad = self.cell_size * 1e-6
+        rows, cols = np.divmod(np.arange(self.n_rows * self.n_cols), self.n_cols)
+        boxes = shapely.box(min_lon + cols * self.cell_size - pad, min_lat + rows * self.cell_size - pad,
+                            min_lon + (cols + 1) * self.cell_size + pad, min_lat + (rows + 1) * self.cell_size + pad)
+
+        shapely.prepare(boundary)
+        classes = np.full(len(boxes), self.EDGE, dtype=np.uint8)
+        classes[shapely.contains_properly(boundary, boxes)] = self.INSIDE
+        classes[~shapely.intersects(boundary, boxes)] = self.OUTSIDE
+        self.classes = classes
+        self._class_bytes = classes.tobytes()  # Cheaper than NumPy indexing for one point
+
+        # Boundary clipped to each edge cell; piece_index maps cell -> piece
+        edge_cells = np.flatnonzero(classes == self.EDGE)
+        self.pieces = shapely.intersection(boundary, boxes[edge_cells])
+        shapely.prepare(self.pieces)
+        self.piece_index = np.full(len(boxes), -1, dtype=np.int64)
+        self.piece_index[edge_cells] = np.arange(len(edge_cells))
+
+    def _cells(self, lats, lons):
+        """Cell index of each point, -1 outside the bounding box."""
+        import numpy as np
+
+        min_lon, min_lat, max_lon, max_lat = self.bounds
+        in_bbox = (lons >= min_lon) & (lons <= max_lon) & (lats >= min_lat) & (lats <= max_lat)
+        cols = np.clip(((lons - min_lon) / self.cell_size).astype(np.int64), 0, self.n_cols - 1)
+        rows = np.clip(((lats - min_lat) / self.cell_size).astype(np.int64), 0, self.n_rows - 1)
+        return np.where(in_bbox, rows * self.n_cols + cols, -1)
+
+    def contains_points(self, lats, lons):
+        """
+        Point-in-boundary test for many points
+
+        Args:
+            lats: Array-like of latitudes
+            lons: Array-like of longitudes
+
+        Returns:
+            numpy bool array, True for points inside the boundary
+        """
+        import numpy as np
+        import shapely
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        cells = self._cells(lats, lons)
+
+        in_bbox = cells >= 0
+        classes = np.full(cells.shape, self.OUTSIDE, dtype=np.uint8)
+        classes[in_bbox] = self.classes[cells[in_bbox]]
+
+        result = classes == self.INSIDE
+        edge = np.flatnonzero(classes == self.EDGE)
+        if len(edge):
+            result[edge] = shapely.contains_xy(self.pieces[self.piece_index[cells[edge]]],
+                                               lons[edge], lats[edge])
+        return result
+
+    def contains(self, lat, lon):
+        """Point-in-boundary test for one point."""
+        min_lon, min_lat, max_lon, max_lat = self.bounds
+        if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+            return False
+        col = min(int((lon - min_lon) / self.cell_size), self.n_cols - 1)
+        row = min(int((lat - min_lat) / self.cell_size), self.n_rows - 1)
+        cell = row * self.n_cols + col
+
+        cell_class = self._class_bytes[cell]
+        if cell_class == self.EDGE:
+            import shapely
+            return bool(shapely.contains_xy(self.pieces[self.piece_index[cell]], lon, lat))
+        return cell_class == self.INSIDE
+
+
+def get_boundary_index(city_name):
+    """
+    Get the cached raster index for a city's boundary, building it on first use
+
+    Args:
+        city_name: City identifier
+
+    Returns:
+        BoundaryIndex
+    """
+    index = _index_cache.get(city_name)
+    if index is None:
+        index = _index_cache[city_name] = BoundaryIndex(load_city_boundary(city_name))
+    return index
+
 def is_point_in_metro_area(lat, lon, city_name):
     """
     Check if a point is within the metropolitan area boundary
@@ -48,20 +240,39 @@ def is_point_in_metro_area(lat, lon, city_name):
     Returns:
         bool: True if point is within the metro area
     """
-    boundary = load_city_boundary(city_name)
-    point = Point(lon, lat)  # Note: shapely uses (x, y) = (lon, lat)
-    return boundary.contains(point)
+    return get_boundary_index(city_name).contains(lat, lon)
+
+def points_in_metro_area(lats, lons, city_name):
+    """
+    Check many points against the metropolitan area boundary in one call
+
+    Args:
+        lats: NumPy array (or sequence) of latitudes
+        lons: NumPy array (or sequence) of longitudes
+        city_name: City identifier
+
+    Returns:
+        numpy bool array, True for points within the metro area
+    """
+    return get_boundary_index(city_name).contains_points(lats, lons)
 
 def get_metro_bounds(city_name):
     """
     Get the bounding box for a city's metropolitan area
 
+    Read from the boundary cache when it is current, without Shapely.
+
     Args:
         city_name: City identifier
 
     Returns:
         tuple: (min_lon, min_lat, max_lon, max_lat)
     """
+    if city_name not in _boundary_cache:
+        _, bounds, _ = _read_boundary_cache(_boundary_file(city_name))
+        if bounds is not None:
+            return bounds
+
     boundary = load_city_boundary(city_name)
     return boundary.bounds
 
@@ -76,10 +287,8 @@ def get_overpass_query_with_boundary(city_name, include_bbox=True):
     Returns:
         str: Overpass QL query string
     """
-    boundary = load_city_boundary(city_name)
-
     # Get bounding box for initial filter
-    min_lon, min_lat, max_lon, max_lat = boundary.bounds
+    min_lon, min_lat, max_lon, max_lat = get_metro_bounds(city_name)
     bbox = f"{min_lat},{min_lon},{max_lat},{max_lon}"
 
     # For simple bbox-based queries (faster but less accurate)
@@ -98,28 +307,163 @@ def get_overpass_query_with_boundary(city_name, include_bbox=True):
     # Better to use bbox and filter results in Python
     return None
 
-def filter_geojson_by_boundary(geojson_data, city_name):
+def boundary_intersects_mask(features, city_name):
     """
-    Filter a GeoJSON FeatureCollection to only include features within the metro boundary
+    Intersects test of many features against the metro boundary at once
+
+    The boundary is prepared once. LineString features are first checked
+    against the boundary's bounding box, and only those that overlap it are
+    built into a Shapely geometry array and tested with one vectorized
+    intersects call. Other geometry types are tested one by one.
 
     Args:
-        geojson_data: GeoJSON dict with FeatureCollection
+        features: List of GeoJSON features
         city_name: City identifier
 
     Returns:
-        dict: Filtered GeoJSON FeatureCollection
+        numpy bool array, True for features that intersect the boundary
+    """
+    import numpy as np
+    import shapely
+    from shapely.geometry import shape
+    from city_arrays import load_city_arrays
+
+    boundary = load_city_boundary(city_name)
+    keep = np.zeros(len(features), dtype=bool)
+
+    if not hasattr(shapely, 'prepare'):
+        # Shapely 1.x: prepared geometry, one feature at a time
+        from shapely.prepared import prep
+        prepared = prep(boundary)
+        for idx, feature in enumerate(features):
+            keep[idx] = prepared.intersects(shape(feature['geometry']))
+        return keep
+
+    shapely.prepare(boundary)  # In place, so the cached boundary stays prepared
+
+    line_idx = []
+    other_idx = []
+    for idx, feature in enumerate(features):
+        geometry = feature['geometry']
+        if geometry['type'] == 'LineString' and len(geometry['coordinates']) >= 2:
+            line_idx.append(idx)
+        else:
+            other_idx.append(idx)
+
+    if line_idx:
+        arrays = load_city_arrays(features[idx] for idx in line_idx)
+        coords = arrays['coords']
+        starts = arrays['offsets'][:-1]
+        lengths = np.diff(arrays['offsets'])
+
+        # Bounding-box pre-pass: a line whose bbox misses the boundary's cannot intersect it
+        min_lon, min_lat, max_lon, max_lat = boundary.bounds
+        near = ((np.maximum.reduceat(coords[:, 0], starts) >= min_lon)
+                & (np.minimum.reduceat(coords[:, 0], starts) <= max_lon)
+                & (np.maximum.reduceat(coords[:, 1], starts) >= min_lat)
+                & (np.minimum.reduceat(coords[:, 1], starts) <= max_lat))
+        candidates = np.flatnonzero(near)
+
+        if len(candidates):
+            lines = shapely.linestrings(coords[np.repeat(near, lengths)],
+                                        indices=np.repeat(np.arange(len(candidates)), lengths[candidates]))
+            keep[np.asarray(line_idx)[candidates]] = shapely.intersects(boundary, lines)
+
+    for idx in other_idx:
+        keep[idx] = boundary.intersects(shape(features[idx]['geometry']))
+
+    return keep
+
+def _line_parts(geom):
+    """LineStrings of a clipped geometry; points where a line only touches the boundary are dropped."""
+    import shapely
+
+    if geom.geom_type == 'LineString':
+        return [geom] if not geom.is_empty else []
+    if geom.geom_type == 'MultiLineString':
+        # Join pieces the overlay split at boundary vertices, keeping direction
+        geom = shapely.line_merge(geom, directed=True)
+        return list(shapely.get_parts(geom))
+    if geom.geom_type == 'GeometryCollection':
+        return [line for part in shapely.get_parts(geom) for line in _line_parts(part)]
+    return []
+
+def clip_features_to_boundary(features, city_name, keep=None):
+    """
+    Clip LineString features to the metro boundary
+
+    Features entirely inside the boundary are kept unchanged. Features that
+    cross it are cut to the parts inside, one feature per resulting
+    LineString, each with a copy of the original properties. Features that
+    only touch the boundary at a point are dropped, as are features outside
+    it. Other geometry types that intersect the boundary are kept whole.
+
+    Args:
+        features: List of GeoJSON features
+        city_name: City identifier
+        keep: boundary_intersects_mask() of features, if already computed
+
+    Returns:
+        List of GeoJSON features, in input order. Unclipped features are the
+        input dicts themselves; pieces are new dicts.
     """
+    import numpy as np
+    import shapely
+    from city_arrays import load_city_arrays
+
+    if keep is None:
+        keep = boundary_intersects_mask(features, city_name)
     boundary = load_city_boundary(city_name)
 
-    filtered_features = []
+    kept_lines = [idx for idx in np.flatnonzero(keep).tolist() if features[idx]['geometry']['type'] == 'LineString']
+    clipped = {}
+    if kept_lines:
+        arrays = load_city_arrays(features[idx] for idx in kept_lines)
+        lengths = np.diff(arrays['offsets'])
+        lines = shapely.linestrings(arrays['coords'], indices=np.repeat(np.arange(len(kept_lines)), lengths))
+
+        # Only lines not entirely inside need the (vectorized) overlay
+        crossing = np.flatnonzero(~shapely.contains(boundary, lines))
+        for line_pos, part in zip(crossing.tolist(), shapely.intersection(lines[crossing], boundary)):
+            clipped[kept_lines[line_pos]] = _line_parts(part)
+
+    result = []
+    for idx in np.flatnonzero(keep).tolist():
+        feature = features[idx]
+        if idx not in clipped:
+            result.append(feature)
+            continue
+        for part in clipped[idx]:
+            result.append({
+                'type': 'Feature',
+                'geometry': {'type': 'LineString', 'coordinates': shapely.get_coordinates(part).tolist()},
+                'properties': dict(feature['properties']),
+            })
+    return result
+
+def filter_geojson_by_boundary(geojson_data, city_name, clip=False):
+    """
+    Filter a GeoJSON FeatureCollection to only include features within the metro boundary
 
-    for feature in geojson_data.get('features', []):
-        geom = shape(feature['geometry'])
+    By default features are kept whole if they intersect the boundary, so
+    streets that cross it are included (see boundary_intersects_mask()).
+    With clip, crossing streets are cut to their parts inside the boundary
+    (see clip_features_to_boundary()).
 
-        # Check if the geometry intersects with the boundary
-        # Using intersects rather than contains to include streets that cross the boundary
-        if boundary.intersects(geom):
-            filtered_features.append(feature)
+    Args:
+        geojson_data: GeoJSON dict with FeatureCollection
+        city_name: City identifier
+        clip: Keep only the inside parts of boundary-crossing LineStrings
+
+    Returns:
+        dict: Filtered GeoJSON FeatureCollection
+    """
+    features = geojson_data.get('features', [])
+    if clip:
+        filtered_features = clip_features_to_boundary(features, city_name)
+    else:
+        keep = boundary_intersects_mask(features, city_name)
+        filtered_features = [feature for feature, kept in zip(features, keep) if kept]
 
     return {
         'type': 'FeatureCollection',
@@ -128,13 +472,11 @@ def filter_geojson_by_boundary(geojson_data, city_name):
 
 def get_all_cities():
     """Get list of all cities with boundary data"""
-    boundaries_dir = Path(__file__).parent.parent / 'data' / 'boundaries'
-
-    if not boundaries_dir.exists():
+    if not BOUNDARIES_DIR.exists():
         return []
 
     cities = []
-    for boundary_file in boundaries_dir.glob('*_boundary.json'):
+    for boundary_file in BOUNDARIES_DIR.glob('*_boundary.json'):
         city_name = boundary_file.stem.replace('_boundary', '')
         cities.append(city_name)
 
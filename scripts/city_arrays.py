@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Columnar (flat NumPy array) representation of a city's street segments.
+
+Shared by the vectorized clustering backend and the parallel workers, which
+need coordinates as contiguous buffers rather than nested GeoJSON lists.
+"""
+
+from itertools import chain
+
+import numpy as np
+
+
+def load_city_arrays(features):
+    """
+    Flatten GeoJSON features into columnar arrays.
+
+    Every feature becomes one segment, so segment indices line up with
+    feature indices. Unnamed features get name code -1.
+
+    Args:
+        features: Iterable of GeoJSON LineString features (e.g. a list or
+            geojson_io.iter_features()); only names and coordinates are kept
+
+    Returns:
+        dict with:
+            coords: float64 array (n_vertices, 2) of [lng, lat]
+            offsets: int64 array (n_segments + 1,); segment i owns
+                coords[offsets[i]:offsets[i + 1]]
+            name_codes: int32 array (n_segments,) indexing into names
+            names: list of unique street names, in first-seen order
+    """
+    name_to_code = {}
+    codes = []
+    all_coords = []
+
+    for feature in features:
+        name = feature['properties'].get('name')
+        if name:
+            codes.append(name_to_code.setdefault(name, len(name_to_code)))
+        else:
+            codes.append(-1)
+
+        all_coords.append(feature['geometry']['coordinates'])
+
+    name_codes = np.array(codes, dtype=np.int32)
+    lengths = np.fromiter(map(len, all_coords), dtype=np.int64, count=len(all_coords))
+    offsets = np.zeros(len(all_coords) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    n_vertices = int(offsets[-1])
+
+    # Fast path for plain 2D coordinates, slow path if any carry extra values
+    flat = np.fromiter(chain.from_iterable(chain.from_iterable(all_coords)), dtype=np.float64)
+    if flat.size == n_vertices * 2:
+        coords = flat.reshape(n_vertices, 2)
+    else:
+        coords = np.array([c[:2] for c in chain.from_iterable(all_coords)],
+                          dtype=np.float64).reshape(n_vertices, 2)
+
+    return {
+        'coords': coords,
+        'offsets': offsets,
+        'name_codes': name_codes,
+        'names': list(name_to_code),
+    }
+
+
+def name_ranges(arrays):
+    """
+    Group clusterable segments by street name.
+
+    Only named segments with at least one coordinate are included, matching
+    the segments the per-street engine sees.
+
+    Args:
+        arrays: Output of load_city_arrays()
+
+    Returns:
+        (segment_order, ranges):
+            segment_order: int64 array of segment indices sorted by name code,
+                keeping feature order within each name
+            ranges: list of (name_code, start, stop) so that
+                segment_order[start:stop] are the segments of that name
+    """
+    name_codes = arrays['name_codes']
+    lengths = np.diff(arrays['offsets'])
+
+    candidates = np.flatnonzero((name_codes >= 0) & (lengths > 0))
+    segment_order = candidates[np.argsort(name_codes[candidates], kind='stable')]
+
+    sorted_codes = name_codes[segment_order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(sorted_codes) else sorted_codes[:0]
+    stops = np.r_[starts[1:], len(sorted_codes)]
+
+    ranges = [(int(sorted_codes[start]), int(start), int(stop))
+              for start, stop in zip(starts.tolist(), stops.tolist())]
+
+    return segment_order, ranges
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Columnar binary city store with memory-mapped arrays.
+
+A store is a directory next to the city's GeoJSON
+(data/cities/<city>/streets.geojson -> data/cities/<city>/streets.store/)
+built once from it:
+
+    meta.json         format version, counts, coordinate encoding and the
+                      per-column value tables for properties
+    coords.npy        float64 (n_vertices, 2) [lng, lat], or int32 degrees
+                      * 1e7 (OSM's own precision) when built with --quantize
+    offsets.npy       int64 (n_segments + 1,); segment i owns
+                      coords[offsets[i]:offsets[i + 1]]
+    name_codes.npy    int32 (n_segments,) into names.json, -1 for unnamed
+    names.json        street name string table, in first-seen order
+    prop_<i>.npy      int32 (n_segments,) code per property column into
+                      meta.json's value table, -1 where the key is absent
+
+Arrays are opened with numpy's mmap_mode, so opening a store only reads the
+headers and the string tables; clustering reads coordinates straight from the
+page cache instead of parsing JSON. open_city_store() returns the same dict
+as city_arrays.load_city_arrays(), and geojson_io.iter_features() accepts a
+store directory wherever it accepts a GeoJSON file.
+
+Requires numpy.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+STORE_VERSION = 1
+STORE_SUFFIX = '.store'
+
+# Quantized coordinates: integer degrees * 1e7, exact for OSM's 7 decimals
+QUANTIZE_SCALE = 10 ** 7
+
+
+def default_store_path(geojson_path):
+    """data/cities/<city>/streets.geojson[.gz|.zst] -> data/cities/<city>/streets.store"""
+    from compressed_io import strip_compression
+    root, _ = os.path.splitext(strip_compression(geojson_path))
+    return root + STORE_SUFFIX
+
+
+def is_city_store(path):
+    """True if path is a directory written by build_city_store()."""
+    return os.path.isfile(os.path.join(path, 'meta.json'))
+
+
+def build_city_store(geojson_path, store_path=None, quantize=False):
+    """
+    Convert a GeoJSON FeatureCollection of LineStrings into a city store.
+
+    Args:
+        geojson_path: Input GeoJSON file
+        store_path: Output directory (default: default_store_path(geojson_path))
+        quantize: Store coordinates as int32 * 1e7 instead of float64
+
+    Returns:
+        The store directory path
+    """
+    from geojson_io import iter_features
+
+    if store_path is None:
+        store_path = default_store_path(geojson_path)
+
+    name_to_code = {}
+    name_codes = []
+    lengths = []
+    flat_coords = []
+    # Per property key: value -> code, and the per-segment code list
+    columns = {}
+
+    for seg_idx, feature in enumerate(iter_features(geojson_path)):
+        geometry = feature['geometry']
+        if geometry['type'] != 'LineString':
+            raise ValueError(f"Feature {seg_idx}: only LineString geometries can be stored, "
+                             f"found {geometry['type']}")
+
+        coords = geometry['coordinates']
+        for coord in coords:
+            if len(coord) != 2:
+                raise ValueError(f"Feature {seg_idx}: only [lng, lat] coordinates can be stored")
+            flat_coords.extend(coord)
+        lengths.append(len(coords))
+
+        properties = feature['properties']
+        name = properties.get('name')
+        name_codes.append(name_to_code.setdefault(name, len(name_to_code)) if name else -1)
+
+        for key, value in properties.items():
+            if key not in columns:
+                columns[key] = ({}, [-1] * seg_idx)
+            value_codes, codes = columns[key]
+            # Value tables are keyed by JSON text so unhashable values work too
+            codes.append(value_codes.setdefault(json.dumps(value), len(value_codes)))
+        for value_codes, codes in columns.values():
+            if len(codes) == seg_idx:
+                codes.append(-1)
+
+    coords = np.array(flat_coords, dtype=np.float64).reshape(-1, 2)
+    if quantize:
+        quantized = np.rint(coords * QUANTIZE_SCALE)
+        if np.abs(quantized).max(initial=0) >= 2 ** 31:
+            raise ValueError("Coordinates out of range for int32 quantization")
+        coords = quantized.astype(np.int32)
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    os.makedirs(store_path, exist_ok=True)
+    np.save(os.path.join(store_path, 'coords.npy'), coords)
+    np.save(os.path.join(store_path, 'offsets.npy'), offsets)
+    np.save(os.path.join(store_path, 'name_codes.npy'), np.array(name_codes, dtype=np.int32))
+    for column_idx, (value_codes, codes) in enumerate(columns.values()):
+        np.save(os.path.join(store_path, f'prop_{column_idx}.npy'), np.array(codes, dtype=np.int32))
+
+    with open(os.path.join(store_path, 'names.json'), 'w') as f:
+        json.dump(list(name_to_code), f, separators=(',', ':'))
+
+    # meta.json last: its presence marks a complete store
+    meta = {
+        'version': STORE_VERSION,
+        'source': os.path.basename(geojson_path),
+        'n_segments': len(lengths),
+        'n_vertices': int(offsets[-1]),
+        'coords': 'int32' if quantize else 'float64',
+        'coord_scale': QUANTIZE_SCALE if quantize else 1,
+        'properties': [
+            {'key': key, 'values': [json.loads(text) for text in value_codes]}
+            for key, (value_codes, _) in columns.items()
+        ],
+    }
+    with open(os.path.join(store_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, separators=(',', ':'))
+
+    return store_path
+
+
+def open_city_store(store_path):
+    """
+    Open a city store with memory-mapped arrays.
+
+    Returns:
+        dict with the keys of city_arrays.load_city_arrays() (coords,
+        offsets, name_codes, names) plus:
+            properties: list of (key, codes, values) per property column
+            meta: the parsed meta.json
+        coords is a read-only memmap for float64 stores; int32 stores are
+        dequantized to float64 here (one vectorized pass).
+    """
+    with open(os.path.join(store_path, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    if meta['version'] != STORE_VERSION:
+        raise ValueError(f"Unsupported city store version {meta['version']} in {store_path}")
+
+    def load(name):
+        return np.load(os.path.join(store_path, name), mmap_mode='r')
+
+    coords = load('coords.npy')
+    if meta['coords'] == 'int32':
+        # Division (not * 1e-7) gives the double nearest each 7-decimal value
+        coords = coords / meta['coord_scale']
+
+    with open(os.path.join(store_path, 'names.json'), 'r') as f:
+        names = json.load(f)
+
+    properties = [
+        (column['key'], load(f'prop_{column_idx}.npy'), column['values'])
+        for column_idx, column in enumerate(meta['properties'])
+    ]
+
+    return {
+        'coords': coords,
+        'offsets': load('offsets.npy'),
+        'name_codes': load('name_codes.npy'),
+        'names': names,
+        'properties': properties,
+        'meta': meta,
+    }
+
+
+def iter_store_features(store, start=0, stop=None):
+    """
+    Rebuild GeoJSON features from a store, one at a time.
+
+    Args:
+        store: Output of open_city_store() or a store directory path
+        start, stop: Segment index range (default: all segments)
+
+    Yields:
+        Feature dicts equal to the ones the store was built from
+    """
+    if isinstance(store, (str, os.PathLike)):
+        store = open_city_store(store)
+
+    coords = store['coords']
+    properties = store['properties']
+    n_segments = len(store['offsets']) - 1
+    stop = n_segments if stop is None else min(stop, n_segments)
+
+    # Decode columns a block at a time instead of element by element
+    block_size = 4096
+    for block_start in range(start, stop, block_size):
+        block_stop = min(block_start + block_size, stop)
+        block_codes = [(key, codes[block_start:block_stop].tolist(), values)
+                       for key, codes, values in properties]
+        offsets = store['offsets'][block_start:block_stop + 1].tolist()
+        base = offsets[0]
+        block_coords = coords[base:offsets[-1]].tolist()
+
+        for i in range(block_stop - block_start):
+            feature_properties = {}
+            for key, codes, values in block_codes:
+                code = codes[i]
+                if code >= 0:
+                    feature_properties[key] = values[code]
+            yield {
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'LineString',
+                    'coordinates': block_coords[offsets[i] - base:offsets[i + 1] - base]
+                },
+                'properties': feature_properties
+            }
+
+
+def iter_street_features(store, street_name):
+    """
+    Rebuild only the features of one street name, found via name_codes.
+
+    Args:
+        store: Output of open_city_store() or a store directory path
+        street_name: Street name to extract
+
+    Yields:
+        Feature dicts of that street, in feature order
+    """
+    if isinstance(store, (str, os.PathLike)):
+        store = open_city_store(store)
+
+    try:
+        name_code = store['names'].index(street_name)
+    except ValueError:
+        return
+
+    for seg_idx in np.flatnonzero(store['name_codes'] == name_code).tolist():
+        yield from iter_store_features(store, seg_idx, seg_idx + 1)
+
+
+def load_arrays(path, parse_workers=1):
+    """
+    City arrays from a store directory (memory-mapped), a GeoParquet file
+    (name and geometry columns only) or a GeoJSON file.
+
+    Args:
+        path: Store directory, .parquet file or GeoJSON file
+        parse_workers: Processes to parse a GeoJSON file with (see
+            parallel_parse.py); 1 streams it serially
+
+    Returns:
+        dict as city_arrays.load_city_arrays()
+    """
+    if is_city_store(path):
+        return open_city_store(path)
+
+    from geoparquet_io import is_parquet
+    if is_parquet(path):
+        from geoparquet_io import load_parquet_arrays
+        return load_parquet_arrays(path)
+
+    if parse_workers > 1:
+        from parallel_parse import load_arrays_parallel
+        return load_arrays_parallel(path, parse_workers)
+
+    from city_arrays import load_city_arrays
+    from geojson_io import iter_features
+    return load_city_arrays(iter_features(path))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Build a memory-mapped columnar store from a city GeoJSON')
+    parser.add_argument('input', help='Input GeoJSON file (e.g. data/cities/melbourne/streets.geojson)')
+    parser.add_argument('--output', help='Store directory (default: <input without .geojson>.store)')
+    parser.add_argument('--quantize', action='store_true',
+                        help='Store coordinates as int32 degrees * 1e7 (half the size)')
+
+    args = parser.parse_args()
+
+    start_time = time.time()
+    store_path = build_city_store(args.input, args.output, quantize=args.quantize)
+    print(f"Built {store_path} in {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    store = open_city_store(store_path)
+    open_ms = (time.time() - start_time) * 1000
+    print(f"Opened store in {open_ms:.1f} ms: {store['meta']['n_segments']:,} segments, "
+          f"{store['meta']['n_vertices']:,} vertices, {len(store['names']):,} street names")
+
+    start_time = time.time()
+    from city_arrays import load_city_arrays
+    from geojson_io import iter_features
+    load_city_arrays(iter_features(args.input))
+    print(f"Parsing the GeoJSON into the same arrays takes {time.time() - start_time:.2f} seconds")
@@ -3,29 +3,17 @@
 Compare different street counting methods
 """
 
-import json
-import math
 import time
 from collections import defaultdict
-from scipy.spatial import KDTree
+from scipy.spatial import cKDTree
 import numpy as np
 
-def haversine_distance(coord1, coord2):
-    """Calculate distance in meters between two [lng, lat] coordinates"""
-    lon1, lat1 = coord1
-    lon2, lat2 = coord2
-
-    R = 6371000  # Earth radius in meters
-
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-
-    return R * c
+import json_backend
+from geo_kernels import endpoint_distance_blocks, endpoint_distance_pairs, segment_endpoints
+from linkage_forest import (SWEEP_THRESHOLDS, buffer_instance_counts, build_linkage_forest,
+                            components_from_pairs, count_instances_at, fixed_meters_projection,
+                            local_meters_projection, point_distance_pairs, projected_linestrings,
+                            sample_coords)
 
 def extract_base_and_type(name):
     """Extract base name and road type from full street name"""
@@ -56,49 +44,13 @@ def extract_base_and_type(name):
 def method1_point_to_point(segments, threshold=30):
     """
     Check all points against all points
-    """
-    def sample_coords(coords, max_points=20):
-        if len(coords) <= max_points:
-            return coords
-        sampled = [coords[0], coords[-1]]
-        step = max(1, len(coords) // (max_points - 2))
-        for i in range(step, len(coords) - 1, step):
-            sampled.append(coords[i])
-        return sampled
-
-    def segments_connected(seg1_coords, seg2_coords):
-        coords1 = sample_coords(seg1_coords)
-        coords2 = sample_coords(seg2_coords)
-        for c1 in coords1:
-            for c2 in coords2:
-                if haversine_distance(c1, c2) <= threshold:
-                    return True
-        return False
-
-    n = len(segments)
-    parent = list(range(n))
 
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    for i in range(n):
-        for j in range(i + 1, n):
-            if segments_connected(segments[i], segments[j]):
-                union(i, j)
-
-    components = defaultdict(list)
-    for i in range(n):
-        root = find(i)
-        components[root].append(i)
-
-    return list(components.values())
+    Sampled points are placed in a KD-tree once; query_pairs yields every
+    point pair within the threshold (confirmed with haversine), and the
+    resulting segment pairs are unioned in bulk.
+    """
+    seg_i, seg_j, _ = point_distance_pairs(segments, threshold)
+    return components_from_pairs(len(segments), seg_i, seg_j)
 
 # ============================================================================
 # METHOD 2: Grid-Based Flood Fill
@@ -193,155 +145,55 @@ def method2_grid_flood_fill(segments, grid_size=0.0002):
 def method3_kdtree(segments, threshold=30):
     """
     Use K-D tree for fast spatial queries
-    """
-    # Build point cloud with segment IDs
-    points = []
-    point_to_segment = []
 
-    for seg_idx, coords in enumerate(segments):
-        # Sample points
-        if len(coords) <= 20:
-            sampled = coords
-        else:
-            sampled = [coords[0], coords[-1]]
-            step = max(1, len(coords) // 18)
-            for i in range(step, len(coords) - 1, step):
-                sampled.append(coords[i])
-
-        for coord in sampled:
-            # Convert to Cartesian approximation for K-D tree
-            # At Sydney's latitude, 1 degree ≈ 111km
-            x = coord[0] * 111000 * math.cos(math.radians(coord[1]))
-            y = coord[1] * 111000
-            points.append([x, y])
-            point_to_segment.append(seg_idx)
-
-    points = np.array(points)
-    tree = KDTree(points)
-
-    # Find which segments are connected
-    n = len(segments)
-    parent = list(range(n))
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
+    All sampled points are projected once and cKDTree.query_pairs finds
+    every point pair within the threshold (planar distance); pairs are mapped
+    to segments with NumPy and unioned in bulk.
+    """
+    sampled = [sample_coords(coords) for coords in segments]
+    point_segment = np.repeat(np.arange(len(segments)), [len(s) for s in sampled])
+    points = np.array([c[:2] for s in sampled for c in s], dtype=np.float64).reshape(-1, 2)
 
-    # For each segment, find nearby points
-    checked_pairs = set()
+    # Convert to Cartesian approximation for K-D tree
+    # At Sydney's latitude, 1 degree ≈ 111km
+    x = points[:, 0] * 111000 * np.cos(np.radians(points[:, 1]))
+    y = points[:, 1] * 111000
 
-    for seg_idx, coords in enumerate(segments):
-        # Get center point
-        mid_idx = len(coords) // 2
-        center = coords[mid_idx]
-        x = center[0] * 111000 * math.cos(math.radians(center[1]))
-        y = center[1] * 111000
-
-        # Query nearby points
-        indices = tree.query_ball_point([x, y], threshold * 2)  # Be generous
-
-        for idx in indices:
-            other_seg = point_to_segment[idx]
-            if other_seg != seg_idx:
-                pair = tuple(sorted([seg_idx, other_seg]))
-                if pair not in checked_pairs:
-                    checked_pairs.add(pair)
-                    # Check actual distance
-                    min_dist = float('inf')
-                    for c1 in coords[:min(len(coords), 10)]:
-                        for c2 in segments[other_seg][:min(len(segments[other_seg]), 10)]:
-                            dist = haversine_distance(c1, c2)
-                            min_dist = min(min_dist, dist)
-                            if dist <= threshold:
-                                union(seg_idx, other_seg)
-                                break
-                        if min_dist <= threshold:
-                            break
-
-    components = defaultdict(list)
-    for i in range(n):
-        root = find(i)
-        components[root].append(i)
+    pairs = cKDTree(np.column_stack([x, y])).query_pairs(threshold, output_type='ndarray')
 
-    return list(components.values())
+    return components_from_pairs(len(segments), point_segment[pairs[:, 0]], point_segment[pairs[:, 1]])
 
 # ============================================================================
 # METHOD 4: Polygon Buffer Intersection
 # ============================================================================
 
-def method4_polygon_buffer(segments, buffer_distance=30):
+def method4_polygon_buffer(segments, buffer_distance=30, fixed_projection=False):
     """
     Create buffer polygons around each segment and check for intersections
-    Uses Shapely library for geometric operations
+    Uses Shapely 2 array functions and an STRtree, so only buffers whose
+    bounding boxes overlap are tested
     buffer_distance: distance in meters to buffer around each segment
+    fixed_projection: use the old lng * 93000 projection (compatibility
+        with earlier results) instead of the street's own latitude
     """
     try:
-        from shapely.geometry import LineString, Point
-        from shapely.ops import unary_union
+        import shapely
+        from shapely import STRtree
     except ImportError:
-        print("Warning: Shapely not installed. Install with: pip install shapely")
+        print("Warning: Shapely 2 not installed. Install with: pip install 'shapely>=2'")
         return [[i] for i in range(len(segments))]
 
-    # Convert lat/lng coordinates to approximate meters
-    # At Sydney's latitude (~-33.87°), 1 degree ≈ 111km latitude, ~93km longitude
-    def lat_lng_to_meters(coord):
-        lng, lat = coord
-        x = lng * 93000  # meters
-        y = lat * 111000  # meters
-        return (x, y)
-
-    # Create LineString geometries with buffers
-    buffered_geometries = []
-    for coords in segments:
-        if len(coords) < 2:
-            buffered_geometries.append(None)
-            continue
+    # Project lat/lng to meters around the street's own latitude
+    to_meters = fixed_meters_projection if fixed_projection else local_meters_projection(segments)
+    lines = projected_linestrings(segments, to_meters)
+    buffered_geometries = shapely.buffer(lines, buffer_distance)
 
-        # Convert to meters
-        meter_coords = [lat_lng_to_meters(c) for c in coords]
-        line = LineString(meter_coords)
-        buffered = line.buffer(buffer_distance)
-        buffered_geometries.append(buffered)
+    # Bulk query: every (input, tree) pair whose buffers intersect
+    tree = STRtree(buffered_geometries)
+    seg_a, seg_b = tree.query(buffered_geometries, predicate='intersects')
+    keep = seg_a < seg_b
 
-    # Use Union-Find to group intersecting polygons
-    n = len(segments)
-    parent = list(range(n))
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    # Check all pairs for intersection
-    for i in range(n):
-        if buffered_geometries[i] is None:
-            continue
-        for j in range(i + 1, n):
-            if buffered_geometries[j] is None:
-                continue
-
-            # Check if buffers intersect
-            if buffered_geometries[i].intersects(buffered_geometries[j]):
-                union(i, j)
-
-    # Build components
-    components = defaultdict(list)
-    for i in range(n):
-        root = find(i)
-        components[root].append(i)
-
-    return list(components.values())
+    return components_from_pairs(len(segments), seg_a[keep], seg_b[keep])
 
 # ============================================================================
 # METHOD 5: Endpoint Distance Only
@@ -353,59 +205,35 @@ def method5_endpoint_only(segments, threshold=30, segments_with_props=None):
     If segments_with_props provided, use adaptive threshold for highways/motorways
     """
     n = len(segments)
-    parent = list(range(n))
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    # Get endpoints for each segment
-    endpoints = []
-    for coords in segments:
-        endpoints.append((coords[0], coords[-1]))
+    endpoints = segment_endpoints(segments)
 
     # Check if segments are major roads (highways/motorways)
     def is_major_road(seg_idx):
         if segments_with_props is None:
             return False
-        highway_type = segments_with_props[seg_idx].get('properties', {}).get('highway', '')
-        return highway_type in ['trunk', 'motorway', 'primary']
-
-    # Check endpoint distances
-    for i in range(n):
-        for j in range(i + 1, n):
-            ep_i = endpoints[i]
-            ep_j = endpoints[j]
-
-            # Use larger threshold for major roads
-            current_threshold = threshold
-            if segments_with_props:
-                if is_major_road(i) or is_major_road(j):
-                    current_threshold = 2000  # 2km for highways/motorways
-
-            # Check all 4 combinations of endpoints
-            min_dist = min(
-                haversine_distance(ep_i[0], ep_j[0]),
-                haversine_distance(ep_i[0], ep_j[1]),
-                haversine_distance(ep_i[1], ep_j[0]),
-                haversine_distance(ep_i[1], ep_j[1])
-            )
-
-            if min_dist <= current_threshold:
-                union(i, j)
-
-    components = defaultdict(list)
-    for i in range(n):
-        root = find(i)
-        components[root].append(i)
-
-    return list(components.values())
+        seg = segments_with_props[seg_idx]
+        # Accept either raw features or compare_methods' {'coords', 'feature'} dicts
+        properties = seg.get('feature', seg).get('properties', {})
+        return properties.get('highway', '') in ['trunk', 'motorway', 'primary']
+
+    major = np.zeros(n, dtype=bool)
+    if segments_with_props:
+        major = np.array([is_major_road(i) for i in range(n)], dtype=bool)
+
+    # Pairs of ordinary segments within the base threshold
+    seg_i, seg_j, _ = endpoint_distance_pairs(endpoints, threshold)
+    ordinary = ~(major[seg_i] | major[seg_j])
+    pairs_i = [seg_i[ordinary]]
+    pairs_j = [seg_j[ordinary]]
+
+    # Any pair involving a major road uses 2km. At that radius most of a
+    # street is in range anyway, so dense blocks beat tree queries.
+    for rows, distances in endpoint_distance_blocks(endpoints, np.flatnonzero(major)):
+        row_pos, cols = np.nonzero(distances <= 2000)
+        pairs_i.append(rows[row_pos])
+        pairs_j.append(cols)
+
+    return components_from_pairs(n, np.concatenate(pairs_i), np.concatenate(pairs_j))
 
 # ============================================================================
 # METHOD 6: Highway-Aware (Name-based grouping for major roads)
@@ -451,6 +279,47 @@ def method6_highway_aware(segments_with_props, base_method='grid', threshold=100
 
     return components
 
+# ============================================================================
+# Threshold Sweeps (single-linkage forests)
+# ============================================================================
+
+def sweep_thresholds(segments, thresholds=SWEEP_THRESHOLDS, fixed_projection=False):
+    """
+    Count-vs-threshold curves for the distance-threshold methods.
+
+    Point-to-Point builds one minimum spanning forest, so every threshold
+    costs a binary search instead of a full clustering run. Polygon Buffer
+    counts come from the actual buffer polygons at each threshold, testing
+    only pairs whose lines are close enough to intersect, in the same
+    projection as method4_polygon_buffer (fixed_projection as there).
+
+    Returns:
+        Dict mapping method family -> {'thresholds': [...], 'counts': [...]}
+    """
+    n = len(segments)
+    max_threshold = max(thresholds)
+    curves = {}
+
+    forest = build_linkage_forest(n, *point_distance_pairs(segments, max_threshold))
+    curves['Point-to-Point'] = {
+        'thresholds': list(thresholds),
+        'counts': count_instances_at(forest, n, thresholds)
+    }
+
+    # Actual buffer polygons at every threshold, as method4_polygon_buffer
+    try:
+        to_meters = fixed_meters_projection if fixed_projection else local_meters_projection(segments)
+        counts = buffer_instance_counts(segments, thresholds, to_meters)
+    except ImportError:
+        print("Warning: Shapely not installed, skipping Polygon Buffer sweep")
+    else:
+        curves['Polygon Buffer'] = {
+            'thresholds': list(thresholds),
+            'counts': counts
+        }
+
+    return curves
+
 # ============================================================================
 # Main Comparison
 # ============================================================================
@@ -459,8 +328,7 @@ def compare_methods(geojson_path, test_streets):
     """Compare all methods on test streets"""
 
     print(f"Loading data from {geojson_path}...")
-    with open(geojson_path, 'r') as f:
-        data = json.load(f)
+    data = json_backend.load(geojson_path)
 
     features = data['features']
 
@@ -491,6 +359,7 @@ def compare_methods(geojson_path, test_streets):
 
     # Test each method
     results = {}
+    threshold_curves = {}
 
     methods = [
         ("Point-to-Point (30m)", lambda s: method1_point_to_point([seg['coords'] for seg in s], 30)),
@@ -540,6 +409,11 @@ def compare_methods(geojson_path, test_streets):
                     'components': []
                 }
 
+        print(f"\nThreshold sweep ({len(SWEEP_THRESHOLDS)} thresholds)...", end=' ', flush=True)
+        start_time = time.time()
+        threshold_curves[street_name] = sweep_thresholds([seg['coords'] for seg in segments])
+        print(f"done in {time.time() - start_time:.3f}s")
+
     # Print comparison table
     print("\n\n" + "="*80)
     print("COMPARISON TABLE")
@@ -590,7 +464,8 @@ def compare_methods(geojson_path, test_streets):
     # Save results
     output = {
         'streets': test_streets,
-        'results': {}
+        'results': {},
+        'threshold_curves': threshold_curves
     }
 
     for street in test_streets:
@@ -602,8 +477,7 @@ def compare_methods(geojson_path, test_streets):
                     'time': results[street][method_name]['time']
                 }
 
-    with open('data/method_comparison.json', 'w') as f:
-        json.dump(output, f, indent=2)
+    json_backend.dump(output, 'data/method_comparison.json', indent=2)
 
     print("\n\nResults saved to data/method_comparison.json")
 
@@ -617,14 +491,55 @@ def compare_methods(geojson_path, test_streets):
                 'components': results[street_name][method_name]['components']
             }
 
-    with open('data/method_comparison_detailed.json', 'w') as f:
-        json.dump(detailed_output, f, indent=2)
+    json_backend.dump(detailed_output, 'data/method_comparison_detailed.json', indent=2)
 
     print("Detailed results saved to data/method_comparison_detailed.json")
 
     return results, streets_data
 
+def point_to_point_all_streets(geojson_path, thresholds=(30, 50, 100),
+                               output_file='data/point_to_point_all_streets.json'):
+    """Run Point-to-Point on every street name in a city, not just the test streets"""
+
+    print(f"Loading data from {geojson_path}...")
+    data = json_backend.load(geojson_path)
+
+    segments_by_name = defaultdict(list)
+    for feature in data['features']:
+        name = feature['properties'].get('name', '')
+        if name:
+            segments_by_name[name].append(feature['geometry']['coordinates'])
+
+    print(f"Running Point-to-Point on {len(segments_by_name)} streets...")
+
+    output = {'thresholds': list(thresholds), 'times': {}, 'counts': {}}
+    for threshold in thresholds:
+        start_time = time.time()
+        counts = {name: len(method1_point_to_point(segments, threshold))
+                  for name, segments in sorted(segments_by_name.items())}
+        elapsed = time.time() - start_time
+
+        print(f"Point-to-Point ({threshold}m): {sum(counts.values())} instances in {elapsed:.1f}s")
+        output['times'][f"{threshold}m"] = elapsed
+        output['counts'][f"{threshold}m"] = counts
+
+    json_backend.dump(output, output_file, indent=2)
+
+    print(f"Results saved to {output_file}")
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Compare street counting methods')
+    parser.add_argument('--input', default='data/sydney-roads-osm.geojson',
+                        help='Input GeoJSON file')
+    parser.add_argument('--all-streets', action='store_true',
+                        help='Run Point-to-Point on every street instead of the test streets')
+    args = parser.parse_args()
+
+    if args.all_streets:
+        point_to_point_all_streets(args.input)
+        raise SystemExit(0)
+
     test_streets = [
         # Regular streets
         "Victoria Street",
@@ -654,6 +569,6 @@ if __name__ == "__main__":
     ]
 
     results, streets_data = compare_methods(
-        'data/sydney-roads-osm.geojson',
+        args.input,
         test_streets
     )
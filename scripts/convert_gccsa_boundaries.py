@@ -2,11 +2,48 @@
 """
 Convert ABS GCCSA boundaries to simplified GeoJSON format
 Extracts boundary polygons for each capital city metropolitan area
+
+Each <city>_boundary.json is simplified at BOUNDARY_TOLERANCE; the
+conversion reports its vertex count and measured maximum deviation from
+the source polygon, since topology preservation can keep it further from
+the source than the tolerance.
 """
 import geopandas as gpd
 import json
+import json_backend
+import numpy as np
+import shapely
 from pathlib import Path
 
+# Tolerance (degrees, ~100m) of the <city>_boundary.json geometry
+BOUNDARY_TOLERANCE = 0.001
+
+# Approximate metres per degree, for reporting deviations
+METERS_PER_DEGREE = 111000
+
+def _ring_segments(geom):
+    """Every edge of a polygon's rings as a two-point LineString array"""
+    segments = []
+    for ring in shapely.get_rings(shapely.get_parts(geom)):
+        coords = shapely.get_coordinates(ring)
+        segments.append(shapely.linestrings(np.stack([coords[:-1], coords[1:]], axis=1)))
+    return np.concatenate(segments) if segments else np.array([], dtype=object)
+
+def max_deviation(source, simplified):
+    """
+    Largest distance (degrees) from a source vertex to the simplified outline
+
+    Simplification only drops vertices, so this bounds how far the
+    simplified outline strays from the source. Nearest-edge queries use an
+    STRtree over the simplified edges, so full-resolution sources are cheap.
+    """
+    points = shapely.points(shapely.get_coordinates(source))
+    segments = _ring_segments(simplified)
+    if not len(points) or not len(segments):
+        return 0.0
+    _, distances = shapely.STRtree(segments).query_nearest(points, return_distance=True, all_matches=False)
+    return float(distances.max())
+
 def convert_gccsa_to_geojson():
     """Convert GCCSA shapefile to simplified GeoJSON"""
 
@@ -50,7 +87,7 @@ def convert_gccsa_to_geojson():
         geom = city_gdf.iloc[0].geometry
 
         # Simplify the geometry to reduce file size (tolerance in degrees, ~100m)
-        simplified_geom = geom.simplify(0.001, preserve_topology=True)
+        simplified_geom = geom.simplify(BOUNDARY_TOLERANCE, preserve_topology=True)
 
         # Convert to GeoJSON-like dict
         geojson_geom = json.loads(gpd.GeoSeries([simplified_geom]).to_json())['features'][0]['geometry']
@@ -69,20 +106,24 @@ def convert_gccsa_to_geojson():
             total_points = sum(len(poly[0]) for poly in geojson_geom['coordinates'])
             print(f"  Polygons: {len(geojson_geom['coordinates'])}, Total points: {total_points}")
 
+        # Measured deviation of the simplified boundary from the source
+        deviation = max_deviation(geom, simplified_geom)
+        print(f"  Source vertices: {shapely.get_num_coordinates(geom):,}, "
+              f"simplified: {shapely.get_num_coordinates(simplified_geom):,}, "
+              f"max deviation {deviation:.6f}° (~{deviation * METERS_PER_DEGREE:.0f} m)")
+
     # Save individual city boundary files
     output_dir = Path('data/boundaries')
     output_dir.mkdir(exist_ok=True)
 
     for city_id, boundary in boundaries.items():
         output_file = output_dir / f'{city_id}_boundary.json'
-        with open(output_file, 'w') as f:
-            json.dump(boundary, f, indent=2)
+        json_backend.dump(boundary, output_file, indent=2)  # Tracked files keep their layout
         print(f"\nSaved {city_id} boundary to {output_file}")
 
     # Save combined file
     combined_file = output_dir / 'city_boundaries.json'
-    with open(combined_file, 'w') as f:
-        json.dump(boundaries, f, indent=2)
+    json_backend.dump(boundaries, combined_file, indent=2)
     print(f"\nSaved combined boundaries to {combined_file}")
 
     # Calculate bounding boxes for each city
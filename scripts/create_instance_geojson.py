@@ -4,9 +4,11 @@ Create ultra-compact GeoJSON by grouping segments into street instances.
 Each feature represents one instance (not one segment), dramatically reducing file size.
 """
 
-import json
 from collections import defaultdict
 
+import json_backend
+from geojson_io import iter_features
+
 def create_instance_geojson(input_file, output_file):
     """
     Convert segment-based GeoJSON to instance-based GeoJSON.
@@ -19,12 +21,7 @@ def create_instance_geojson(input_file, output_file):
     - Duplicate properties (each instance has properties once, not per segment)
     - Overall file size by ~60-70%
     """
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    features = data['features']
-    print(f"Loaded {len(features)} segment features")
+    print(f"Streaming {input_file}...")
 
     # Group segments by (street name, instance ID)
     instances = defaultdict(lambda: {
@@ -32,7 +29,9 @@ def create_instance_geojson(input_file, output_file):
         'properties': None
     })
 
-    for feature in features:
+    segment_count = 0
+    for feature in iter_features(input_file):
+        segment_count += 1
         name = feature['properties'].get('name', '')
         if not name:
             continue
@@ -76,12 +75,11 @@ def create_instance_geojson(input_file, output_file):
         'features': instance_features
     }
 
-    print(f"Created {len(instance_features)} instance features (from {len(features)} segments)")
+    print(f"Created {len(instance_features)} instance features (from {segment_count} segments)")
 
     # Save
     print(f"Saving to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(output_data, f, separators=(',', ':'))
+    json_backend.dump(output_data, output_file)
 
     # Report
     import os
@@ -90,9 +88,9 @@ def create_instance_geojson(input_file, output_file):
     reduction = (1 - output_size / input_size) * 100
 
     print(f"\n=== Results ===")
-    print(f"Features: {len(features):,} segments → {len(instance_features):,} instances")
+    print(f"Features: {segment_count:,} segments → {len(instance_features):,} instances")
     print(f"File size: {input_size:.1f}MB → {output_size:.1f}MB ({reduction:.1f}% reduction)")
-    print(f"Average segments per instance: {len(features)/len(instance_features):.1f}")
+    print(f"Average segments per instance: {segment_count/len(instance_features):.1f}")
 
 
 if __name__ == '__main__':
@@ -3,7 +3,7 @@
 Download Greater Brisbane road data from OpenStreetMap using Overpass API.
 Greater Brisbane: Metropolitan area covering Brisbane City and surrounding LGAs.
 """
-import json
+import json_backend
 import requests
 from time import sleep
 
@@ -84,10 +84,9 @@ def download_brisbane_roads():
 
         # Save to file
         output_file = 'data/brisbane-roads-osm.geojson'
-        with open(output_file, 'w') as f:
-            json.dump(geojson, f)
+        file_size = json_backend.dump(geojson, output_file)
 
-        file_size_mb = len(json.dumps(geojson)) / 1024 / 1024
+        file_size_mb = file_size / 1024 / 1024
 
         print()
         print("=" * 60)
@@ -3,22 +3,26 @@
 Download road data from OpenStreetMap using GCCSA (Greater Capital City Statistical Area) boundaries
 Uses official ABS metropolitan area definitions instead of rectangular bounding boxes
 """
-import json
 import requests
 import argparse
 from pathlib import Path
 from boundary_utils import get_metro_bounds, filter_geojson_by_boundary, get_all_cities
+from compressed_io import add_compress_argument, with_compression
+from geojson_io import FeatureCollectionWriter
 
 # Overpass API endpoint
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
-def download_city_roads(city_name, filter_boundary=True):
+def download_city_roads(city_name, filter_boundary=True, compress=None, clip=False):
     """
     Download road data from OpenStreetMap for a city's metropolitan area
 
     Args:
         city_name: City identifier (e.g., 'sydney', 'melbourne')
         filter_boundary: If True, filter results to only include roads within GCCSA boundary
+        compress: 'gz' or 'zst' to write data/<city>-roads-osm.geojson.gz/.zst
+        clip: Cut roads that cross the boundary to their parts inside it
+            instead of keeping them whole
     """
 
     print("=" * 60)
@@ -32,7 +36,7 @@ def download_city_roads(city_name, filter_boundary=True):
 
     print(f"Initial bounding box: {bbox}")
     if filter_boundary:
-        print(f"Will filter results to GCCSA polygon boundary")
+        print(f"Will {'clip' if clip else 'filter'} results to GCCSA polygon boundary")
     print("This may take several minutes...")
     print()
 
@@ -98,17 +102,17 @@ def download_city_roads(city_name, filter_boundary=True):
         if filter_boundary:
             print(f"Filtering to GCCSA boundary...")
             original_count = len(features)
-            geojson = filter_geojson_by_boundary(geojson, city_name)
+            geojson = filter_geojson_by_boundary(geojson, city_name, clip=clip)
             filtered_count = len(geojson['features'])
             removed = original_count - filtered_count
             print(f"✓ Filtered: {filtered_count} roads within boundary ({removed} outside removed)")
 
-        # Save to file
-        output_file = f'data/{city_name}-roads-osm.geojson'
-        with open(output_file, 'w') as f:
-            json.dump(geojson, f)
+        # Save to file (compact, written atomically)
+        output_file = with_compression(f'data/{city_name}-roads-osm.geojson', compress)
+        with FeatureCollectionWriter(output_file) as writer:
+            writer.write_all(geojson['features'])
 
-        file_size_mb = len(json.dumps(geojson)) / 1024 / 1024
+        file_size_mb = writer.bytes_written / 1024 / 1024
 
         print()
         print("=" * 60)
@@ -151,10 +155,16 @@ def main():
         action='store_true',
         help='Skip filtering by GCCSA boundary (use bbox only)'
     )
+    parser.add_argument(
+        '--clip',
+        action='store_true',
+        help='Cut roads that cross the GCCSA boundary to their parts inside it'
+    )
+    add_compress_argument(parser)
 
     args = parser.parse_args()
 
-    download_city_roads(args.city, filter_boundary=not args.no_filter)
+    download_city_roads(args.city, filter_boundary=not args.no_filter, compress=args.compress, clip=args.clip)
 
 if __name__ == '__main__':
     main()
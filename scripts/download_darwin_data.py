@@ -2,7 +2,7 @@
 """
 Download Darwin road data from OpenStreetMap using Overpass API.
 """
-import json
+import json_backend
 import requests
 
 OVERPASS_URL = "https://overpass-api.de/api/interpreter"
@@ -59,11 +59,10 @@ def download_darwin_roads():
         geojson = {'type': 'FeatureCollection', 'features': features}
         output_file = 'data/darwin-roads-osm.geojson'
 
-        with open(output_file, 'w') as f:
-            json.dump(geojson, f)
+        file_size = json_backend.dump(geojson, output_file)
 
         print(f"✓ Saved {len(features)} roads to {output_file}")
-        print(f"File size: {len(json.dumps(geojson)) / 1024 / 1024:.1f} MB")
+        print(f"File size: {file_size / 1024 / 1024:.1f} MB")
         return geojson
 
     except Exception as e:
@@ -3,7 +3,7 @@
 Download NSW road data for Greater Sydney using the NSW Spatial Services API
 Since the API doesn't have LGA data, we'll download all urban roads and filter by coordinates
 """
-import json
+import json_backend
 import requests
 from time import sleep
 
@@ -87,11 +87,10 @@ def download_roads():
     }
     
     output_file = "data/sydney-roads.geojson"
-    with open(output_file, 'w') as f:
-        json.dump(geojson, f, indent=2)
+    file_size = json_backend.dump(geojson, output_file)
     
     print(f"\nSaved {len(all_features)} Greater Sydney road features to {output_file}")
-    print(f"File size: {len(json.dumps(geojson)) / 1024 / 1024:.2f} MB")
+    print(f"File size: {file_size / 1024 / 1024:.2f} MB")
     
     # Create a sample file with first 500 for testing
     sample_geojson = {
@@ -100,8 +99,7 @@ def download_roads():
     }
     
     sample_file = "data/sydney-roads-sample.geojson"
-    with open(sample_file, 'w') as f:
-        json.dump(sample_geojson, f, indent=2)
+    json_backend.dump(sample_geojson, sample_file)
     
     print(f"Created sample file with 500 roads: {sample_file}")
 
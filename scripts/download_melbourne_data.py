@@ -3,7 +3,7 @@
 Download Greater Melbourne road data from OpenStreetMap using Overpass API
 Greater Melbourne consists of 31 LGAs covering the metropolitan area
 """
-import json
+import json_backend
 import requests
 from time import sleep
 
@@ -91,11 +91,10 @@ def download_melbourne_roads():
 
         # Save to file
         output_file = 'data/melbourne-roads-osm.geojson'
-        with open(output_file, 'w') as f:
-            json.dump(geojson, f)
+        file_size = json_backend.dump(geojson, output_file)
 
         print(f"Saved {len(features)} roads to {output_file}")
-        print(f"File size: {len(json.dumps(geojson)) / 1024 / 1024:.1f} MB")
+        print(f"File size: {file_size / 1024 / 1024:.1f} MB")
 
         return geojson
 
@@ -3,10 +3,13 @@
 Download Greater Sydney road data from OpenStreetMap using Overpass API
 This will include suburb names which we can use for filtering
 """
-import json
+import argparse
 import requests
 from time import sleep
 
+from compressed_io import add_compress_argument, with_compression
+from geojson_io import FeatureCollectionWriter
+
 # Greater Sydney LGAs as defined in our SCOPE.md
 GREATER_SYDNEY_LGAS = [
     'Bayside', 'Burwood', 'Canada Bay', 'Inner West', 'Randwick', 'Strathfield',
@@ -24,8 +27,8 @@ OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 # Greater Sydney bounding box: south,west,north,east
 BBOX = "-34.3,150.5,-33.4,151.7"
 
-def download_osm_roads():
-    """Download road data from OpenStreetMap"""
+def download_osm_roads(compress=None):
+    """Download road data from OpenStreetMap (compress: 'gz', 'zst' or None)"""
     
     print("Downloading Greater Sydney roads from OpenStreetMap...")
     print("This may take a few minutes...")
@@ -80,29 +83,18 @@ def download_osm_roads():
             
             features.append(feature)
         
-        # Create GeoJSON
-        geojson = {
-            "type": "FeatureCollection",
-            "features": features
-        }
-        
-        # Save full dataset
-        output_file = "data/sydney-roads-osm.geojson"
-        with open(output_file, 'w') as f:
-            json.dump(geojson, f, indent=2)
+        # Save full dataset (compact, written atomically)
+        output_file = with_compression("data/sydney-roads-osm.geojson", compress)
+        with FeatureCollectionWriter(output_file) as writer:
+            writer.write_all(features)
         
         print(f"Saved {len(features)} road features to {output_file}")
-        print(f"File size: {len(json.dumps(geojson)) / 1024 / 1024:.2f} MB")
+        print(f"File size: {writer.bytes_written / 1024 / 1024:.2f} MB")
         
         # Create sample
-        sample_geojson = {
-            "type": "FeatureCollection",
-            "features": features[:1000]
-        }
-        
         sample_file = "data/sydney-roads-sample.geojson"
-        with open(sample_file, 'w') as f:
-            json.dump(sample_geojson, f, indent=2)
+        with FeatureCollectionWriter(sample_file) as writer:
+            writer.write_all(features[:1000])
         
         print(f"Created sample file with 1000 roads: {sample_file}")
         
@@ -133,4 +125,8 @@ def download_osm_roads():
         raise
 
 if __name__ == "__main__":
-    download_osm_roads()
+    parser = argparse.ArgumentParser(description='Download Greater Sydney road data from OpenStreetMap')
+    add_compress_argument(parser)
+    args = parser.parse_args()
+
+    download_osm_roads(compress=args.compress)
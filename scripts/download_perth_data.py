@@ -4,7 +4,7 @@ Download Greater Perth road data from OpenStreetMap using Overpass API.
 Greater Perth: 30 LGAs covering ~6,300 km² metropolitan area.
 Source: WA Metropolitan Region Scheme (Planning and Development Act 2005)
 """
-import json
+import json_backend
 import requests
 from time import sleep
 
@@ -88,10 +88,9 @@ def download_perth_roads():
 
         # Save to file
         output_file = 'data/perth-roads-osm.geojson'
-        with open(output_file, 'w') as f:
-            json.dump(geojson, f)
+        file_size = json_backend.dump(geojson, output_file)
 
-        file_size_mb = len(json.dumps(geojson)) / 1024 / 1024
+        file_size_mb = file_size / 1024 / 1024
 
         print()
         print("=" * 60)
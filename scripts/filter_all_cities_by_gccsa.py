@@ -3,20 +3,35 @@
 Filter all city street data by official GCCSA polygon boundaries
 Backs up original data and creates GCCSA-filtered versions
 """
-import json
+import argparse
+import shutil
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
-from boundary_utils import filter_geojson_by_boundary, get_all_cities
-
-def filter_city_by_gccsa(city_name, backup=True):
-    """Filter a city's street data by its GCCSA boundary"""
+import json_backend
+from boundary_utils import boundary_intersects_mask, clip_features_to_boundary, get_all_cities
+from compressed_io import add_compress_argument, open_binary, resolve_path, strip_compression, with_compression
+
+def filter_city_by_gccsa(city_name, backup=True, compress=None, clip=False):
+    """
+    Filter a city's street data by its GCCSA boundary
+
+    Args:
+        city_name: City identifier (e.g., 'sydney')
+        backup: Keep a copy of the unfiltered file as streets.geojson.backup
+        compress: 'gz' or 'zst' to store the backup compressed
+            (streets.geojson.backup.gz). streets.geojson itself is served to
+            the web app and is written back in its existing format.
+        clip: Cut streets that cross the boundary to their parts inside it
+            instead of keeping them whole
+    """
 
     print(f"\n{'='*80}")
     print(f"Processing {city_name.upper()}")
     print(f"{'='*80}")
 
-    streets_file = Path(f'data/cities/{city_name}/streets.geojson')
+    streets_file = Path(resolve_path(f'data/cities/{city_name}/streets.geojson'))
 
     if not streets_file.exists():
         print(f"❌ streets.geojson not found for {city_name}")
@@ -24,50 +39,76 @@ def filter_city_by_gccsa(city_name, backup=True):
 
     # Backup original file if requested
     if backup:
-        backup_file = streets_file.with_suffix('.geojson.backup')
-        if not backup_file.exists():
+        plain_backup = strip_compression(streets_file) + '.backup'
+        existing_backup = Path(resolve_path(plain_backup))
+        backup_file = Path(with_compression(plain_backup, compress))
+        if existing_backup.exists():
+            print(f"📦 Backup already exists: {existing_backup.name}")
+        elif compress:
+            print(f"📦 Creating compressed backup: {backup_file.name}")
+            with open_binary(streets_file, 'rb') as src, open_binary(backup_file, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+        else:
             print(f"📦 Creating backup: {backup_file.name}")
-            import shutil
             shutil.copy2(streets_file, backup_file)
-        else:
-            print(f"📦 Backup already exists: {backup_file.name}")
 
     # Load original data
     print(f"📂 Loading {streets_file.name}...")
-    with open(streets_file, 'r') as f:
-        original_data = json.load(f)
+    original_data = json_backend.load(streets_file)
 
-    original_count = len(original_data.get('features', []))
+    features = original_data.get('features', [])
+    original_count = len(features)
     print(f"   Original features: {original_count:,}")
 
     # Filter by GCCSA boundary
     print(f"🔍 Filtering by GCCSA polygon boundary...")
+    start_time = time.time()
     try:
-        filtered_data = filter_geojson_by_boundary(original_data, city_name)
+        keep = boundary_intersects_mask(features, city_name)
+        kept_features = [feature for feature, kept in zip(features, keep) if kept]
+        filtered_features = clip_features_to_boundary(features, city_name, keep) if clip else kept_features
     except Exception as e:
         print(f"❌ Error filtering: {e}")
         return False
+    filtered_data = {'type': 'FeatureCollection', 'features': filtered_features}
 
-    filtered_count = len(filtered_data.get('features', []))
-    removed = original_count - filtered_count
-    pct_kept = (filtered_count / original_count * 100) if original_count > 0 else 0
+    kept_count = len(kept_features)
+    removed = original_count - kept_count
+    pct_kept = (kept_count / original_count * 100) if original_count > 0 else 0
 
-    print(f"   ✅ Filtered features: {filtered_count:,}")
+    print(f"   ✅ Filtered features: {kept_count:,}")
     print(f"   ❌ Removed (outside GCCSA): {removed:,} ({100-pct_kept:.1f}%)")
     print(f"   ✅ Kept (inside GCCSA): {pct_kept:.1f}%")
+    if clip:
+        def count_vertices(feature_list):
+            return sum(len(f['geometry']['coordinates']) for f in feature_list
+                       if f['geometry']['type'] == 'LineString')
+        # Features left whole are passed through as the same dicts
+        unclipped = {id(feature) for feature in filtered_features}
+        split = sum(1 for feature in kept_features if id(feature) not in unclipped)
+        pieces = len(filtered_features) - (kept_count - split)
+        print(f"   ✂️  Clipped: {split:,} crossing features cut into {pieces:,} pieces "
+              f"({len(filtered_features):,} features saved)")
+        print(f"   ✂️  Vertices of kept features: {count_vertices(kept_features):,} -> "
+              f"{count_vertices(filtered_features):,}")
+    print(f"   ⏱️  Filtered in {time.time() - start_time:.2f}s")
 
     # Save filtered data
     print(f"💾 Saving filtered data...")
-    with open(streets_file, 'w') as f:
-        json.dump(filtered_data, f)
-
-    file_size_mb = streets_file.stat().st_size / 1024 / 1024
+    # Overwrites the input in place; dump() renames a finished temporary
+    # file over it, so an interrupted save leaves the unfiltered file intact
+    file_size_mb = json_backend.dump(filtered_data, streets_file) / 1024 / 1024
     print(f"   ✅ Saved: {streets_file.name} ({file_size_mb:.1f} MB)")
 
     return True
 
 def main():
     """Filter all cities by GCCSA boundaries"""
+    parser = argparse.ArgumentParser(description='Filter all city street data by GCCSA polygon boundaries')
+    parser.add_argument('--clip', action='store_true',
+                        help='Cut streets that cross the boundary to their parts inside it')
+    add_compress_argument(parser, help='Store the streets.geojson backups compressed (.backup.gz/.zst)')
+    args = parser.parse_args()
 
     print("="*80)
     print("GCCSA BOUNDARY FILTERING - ALL CITIES")
@@ -100,7 +141,7 @@ def main():
     # Process each city
     results = {}
     for city in cities:
-        success = filter_city_by_gccsa(city, backup=True)
+        success = filter_city_by_gccsa(city, backup=True, compress=args.compress, clip=args.clip)
         results[city] = success
 
     # Summary
@@ -2,10 +2,13 @@
 """
 Filter out non-street entries by name patterns (Trail, Offramp, Onramp, etc.)
 """
-import json
-import sys
+import argparse
+import os
 from pathlib import Path
 
+from compressed_io import add_compress_argument, with_compression
+from geojson_io import FeatureCollectionWriter, iter_features
+
 # Name suffixes to EXCLUDE
 EXCLUDED_SUFFIXES = [
     ' Trail',
@@ -13,56 +16,56 @@ EXCLUDED_SUFFIXES = [
     ' Onramp',
 ]
 
-def filter_by_name(input_file, output_file=None):
+def filter_by_name(input_file, output_file=None, compress=None):
     """
     Filter a GeoJSON file to remove features with excluded name patterns.
 
     Args:
         input_file: Path to input GeoJSON file
         output_file: Path to output file (defaults to input_file)
+        compress: 'gz' or 'zst' to write compressed output (the extension
+            is added to output_file); filtering in place then replaces the
+            uncompressed input
     """
-    if output_file is None:
+    in_place = output_file is None
+    if in_place:
         output_file = input_file
-
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    original_count = len(data['features'])
-    print(f"Original feature count: {original_count:,}")
+    if compress:
+        output_file = with_compression(output_file, compress)
 
     # Count what we're removing
     from collections import Counter
     removed_patterns = Counter()
 
-    # Filter features
-    filtered_features = []
-    for feature in data['features']:
-        name = feature['properties'].get('name', '')
-
-        # Check if name ends with any excluded suffix
-        excluded = False
-        for suffix in EXCLUDED_SUFFIXES:
-            if name.endswith(suffix):
-                removed_patterns[suffix.strip()] += 1
-                excluded = True
-                break
-
-        if not excluded:
-            filtered_features.append(feature)
-
-    # Update data
-    data['features'] = filtered_features
-
-    # Save
-    print(f"\nSaving filtered data to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(data, f)
+    def kept_features():
+        """Stream input features, dropping excluded name patterns."""
+        for feature in iter_features(input_file):
+            name = feature['properties'].get('name', '')
+
+            # Check if name ends with any excluded suffix
+            excluded = False
+            for suffix in EXCLUDED_SUFFIXES:
+                if name.endswith(suffix):
+                    removed_patterns[suffix.strip()] += 1
+                    excluded = True
+                    break
+
+            if not excluded:
+                yield feature
+
+    # Filter while streaming to a temp file, so input_file == output_file is safe
+    print(f"Filtering {input_file} -> {output_file}...")
+    with FeatureCollectionWriter(output_file) as writer:
+        kept_count = writer.write_all(kept_features())
+    if in_place and output_file != input_file and os.path.exists(input_file):
+        os.remove(input_file)
+    original_count = kept_count + sum(removed_patterns.values())
+    print(f"Original feature count: {original_count:,}")
 
     # Report
-    removed_count = original_count - len(filtered_features)
+    removed_count = original_count - kept_count
     print(f"\n=== FILTERING COMPLETE ===")
-    print(f"Kept: {len(filtered_features):,} features")
+    print(f"Kept: {kept_count:,} features")
     print(f"Removed: {removed_count:,} features ({removed_count/original_count*100:.1f}%)")
 
     if removed_patterns:
@@ -70,17 +73,16 @@ def filter_by_name(input_file, output_file=None):
         for pattern, count in removed_patterns.most_common():
             print(f"  {pattern:20s}: {count:6,}")
 
-    file_size_mb = len(json.dumps(data)) / 1024 / 1024
+    file_size_mb = writer.bytes_written / 1024 / 1024
     print(f"\nOutput file size: {file_size_mb:.1f} MB")
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python filter_by_name.py <input.geojson> [output.geojson]")
-        print("\nExample: python filter_by_name.py data/sydney-roads-osm.geojson")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Filter out non-street entries by name patterns (Trail, Offramp, Onramp, etc.)')
+    parser.add_argument('input', help='Input GeoJSON file (e.g. data/sydney-roads-osm.geojson)')
+    parser.add_argument('output', nargs='?', help='Output GeoJSON file (default: filter in place)')
+    add_compress_argument(parser)
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else input_file
+    args = parser.parse_args()
 
-    filter_by_name(input_file, output_file)
+    filter_by_name(args.input, args.output, compress=args.compress)
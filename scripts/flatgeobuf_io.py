@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+FlatGeobuf output with a packed Hilbert R-tree, and bbox reads from it.
+
+Whole-city GeoJSON is over the 25 MB Pages limit, which is why the worker's
+/api/streets?bounds= path queries D1 (see BACKEND_API.md). A FlatGeobuf file
+with its built-in spatial index is a static-file alternative: a reader
+fetches the index, walks it for the viewport and range-reads only the
+matching features, locally or over HTTP range requests.
+
+write_flatgeobuf() converts the output of add_instance_ids.py (GeoJSON,
+city store or GeoParquet) into data/cities/<city>/streets.fgb; features are
+stored in Hilbert order. read_bounds() returns the GeoJSON features that
+intersect a viewport given in the API's minLat,minLng,maxLat,maxLng order.
+
+Requires pyogrio (pip install pyogrio), which bundles GDAL's FlatGeobuf driver.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+import json_backend
+from geoparquet_io import linestring_coords, linestring_wkb
+
+FLATGEOBUF_SUFFIX = '.fgb'
+
+
+def _pyogrio_raw():
+    try:
+        import pyogrio.raw
+    except ImportError:
+        raise ImportError("FlatGeobuf support requires pyogrio (pip install pyogrio)")
+    return pyogrio.raw
+
+
+def default_flatgeobuf_path(geojson_path):
+    """data/cities/<city>/streets.geojson[.gz|.zst] -> data/cities/<city>/streets.fgb"""
+    from compressed_io import strip_compression
+    root, _ = os.path.splitext(strip_compression(geojson_path))
+    return root + FLATGEOBUF_SUFFIX
+
+
+def _field_column(values):
+    """
+    One property column as (array, mask, kind) for pyogrio.
+
+    Integer and float columns stay numeric; strings stay strings; anything
+    else (lists, dicts, mixed types) is stored as JSON text. mask marks
+    features where the property is absent or null.
+    """
+    present = [value for value in values if value is not None]
+    mask = np.array([value is None for value in values], dtype=bool)
+
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present):
+        return np.array([0 if v is None else v for v in values], dtype=np.int64), mask, 'int'
+    if present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        return np.array([0.0 if v is None else v for v in values], dtype=np.float64), mask, 'float'
+    if all(isinstance(v, str) for v in present):
+        return np.array(values, dtype=object), mask, 'str'
+    return np.array([None if v is None else json_backend.dumps_str(v) for v in values], dtype=object), mask, 'json'
+
+
+def write_flatgeobuf(features, output_file):
+    """
+    Write GeoJSON LineString features to a FlatGeobuf file with a spatial index.
+
+    Every property key becomes a field; absent properties are written as
+    nulls.
+
+    Args:
+        features: Iterable of GeoJSON features (e.g. geojson_io.iter_features())
+        output_file: Output .fgb path
+
+    Returns:
+        Number of features written
+    """
+    raw = _pyogrio_raw()
+
+    geometries = []
+    properties = []
+    keys = {}
+    for feature_idx, feature in enumerate(features):
+        geometry = feature['geometry']
+        if geometry['type'] != 'LineString':
+            raise ValueError(f"Feature {feature_idx}: only LineString geometries can be written, "
+                             f"found {geometry['type']}")
+        geometries.append(linestring_wkb(geometry['coordinates']))
+        properties.append(feature['properties'])
+        for key in feature['properties']:
+            keys.setdefault(key, None)
+
+    field_data = []
+    field_masks = []
+    kinds = {}
+    for key in keys:
+        array, mask, kind = _field_column([props.get(key) for props in properties])
+        field_data.append(array)
+        field_masks.append(mask)
+        kinds[key] = kind
+
+    if os.path.exists(output_file):
+        os.remove(output_file)
+    raw.write(output_file, np.array(geometries, dtype=object), field_data, list(keys),
+              field_mask=field_masks, geometry_type='LineString', crs='EPSG:4326',
+              driver='FlatGeobuf', layer_options={'SPATIAL_INDEX': 'YES'},
+              # JSON-encoded columns are decoded again by read_bounds()
+              layer_metadata={'json_fields': json_backend.dumps_str([k for k, v in kinds.items() if v == 'json'])})
+
+    return len(geometries)
+
+
+def read_bounds(path, bounds):
+    """
+    Read the features that intersect a viewport, using the spatial index.
+
+    Args:
+        path: .fgb file written by write_flatgeobuf()
+        bounds: (min_lat, min_lng, max_lat, max_lng), the order of the
+            /api/streets?bounds= parameter
+
+    Returns:
+        List of GeoJSON feature dicts (in the file's Hilbert order)
+    """
+    raw = _pyogrio_raw()
+    import pyogrio
+
+    min_lat, min_lng, max_lat, max_lng = bounds
+    meta, _, geometries, field_data = raw.read(path, bbox=(min_lng, min_lat, max_lng, max_lat))
+
+    layer_metadata = pyogrio.read_info(path).get('layer_metadata') or {}
+    json_fields = set(json_backend.loads(layer_metadata.get('json_fields', '[]')))
+
+    columns = []
+    for key, dtype, values in zip(meta['fields'], meta['dtypes'], field_data):
+        if values.dtype.kind == 'f':
+            # Nulls come back as NaN, turning integer fields into floats
+            cast = int if dtype.startswith('int') else float
+            values = [None if np.isnan(v) else cast(v) for v in values.tolist()]
+        else:
+            values = values.tolist()
+        columns.append((key, key in json_fields, values))
+
+    features = []
+    for row, wkb in enumerate(geometries):
+        feature_properties = {}
+        for key, is_json, values in columns:
+            value = values[row]
+            if value is not None:
+                feature_properties[key] = json_backend.loads(value) if is_json else value
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': linestring_coords(wkb)},
+            'properties': feature_properties,
+        })
+    return features
+
+
+if __name__ == '__main__':
+    import argparse
+    from geojson_io import iter_features
+
+    parser = argparse.ArgumentParser(description='Write a city FlatGeobuf file with a packed Hilbert R-tree')
+    parser.add_argument('input', help='Output of add_instance_ids.py (GeoJSON, city store or .parquet)')
+    parser.add_argument('output', nargs='?', help='Output .fgb file (default: <input without extension>.fgb)')
+    parser.add_argument('--bounds', help='Instead of writing, read features in minLat,minLng,maxLat,maxLng '
+                                         'from the input .fgb and print them as GeoJSON')
+
+    args = parser.parse_args()
+
+    if args.bounds:
+        bounds = [float(value) for value in args.bounds.split(',')]
+        start_time = time.time()
+        features = read_bounds(args.input, bounds)
+        elapsed_ms = (time.time() - start_time) * 1000
+        sys.stdout.write(json_backend.dumps_str({'type': 'FeatureCollection', 'features': features}) + '\n')
+        print(f"{len(features)} features in {elapsed_ms:.1f} ms", file=sys.stderr)
+    else:
+        output_file = args.output or default_flatgeobuf_path(args.input)
+        start_time = time.time()
+        count = write_flatgeobuf(iter_features(args.input), output_file)
+        print(f"Wrote {count:,} features to {output_file} "
+              f"({os.path.getsize(output_file) / 1024 / 1024:.1f} MB) in {time.time() - start_time:.2f} seconds")
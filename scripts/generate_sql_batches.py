@@ -4,9 +4,13 @@ Generate SQL batch files from GeoJSON for D1 database upload
 """
 
 import sys
-import json
 import os
 
+import json_backend
+from geojson_io import iter_features
+from segment_table import SegmentTable
+from spatial_sort import add_spatial_sort_argument, hilbert_table_order
+
 def escape_sql_string(s):
     """Escape single quotes for SQL"""
     return s.replace("'", "''")
@@ -37,20 +41,40 @@ def parse_street_name(full_name):
     # No type found, return full name as base
     return full_name, ''
 
-def generate_inserts(geojson_file, city_name):
-    """Generate SQL INSERT statements from GeoJSON file."""
-
-    with open(geojson_file, 'r') as f:
-        data = json.load(f)
-
-    features = data['features']
-    print(f"-- Loading {geojson_file}...", file=sys.stderr)
-    print(f"-- Processing {len(features)} features for {city_name}", file=sys.stderr)
+def iter_inserts(geojson_file, city_name, spatial_sort=False):
+    """
+    Yield SQL INSERT statements from a GeoJSON file.
+
+    Features are converted to Segment records (segment_table.py) as they
+    are read. Rows are streamed in file order, or, with spatial_sort, the
+    whole SegmentTable is loaded and rows are emitted in Hilbert order of
+    their bbox centre (see spatial_sort.py), so each batch and each
+    viewport's rows are spatially clustered in the table. The geometry
+    column is the source geometry as read, so z values and integer
+    coordinates are kept.
+    """
 
-    statements = []
-    for feature in features:
+    print(f"-- Streaming {geojson_file} for {city_name}...", file=sys.stderr)
+
+    def source_geometry(feature, segment):
+        # Only named segments are inserted
+        return json_backend.dumps_str(feature['geometry']) if segment.name_code >= 0 else None
+
+    table = SegmentTable()
+    if spatial_sort:
+        geometries = []
+        for feature in iter_features(geojson_file):
+            geometries.append(source_geometry(feature, table.append(feature)))
+        print("-- Ordering rows along a Hilbert curve", file=sys.stderr)
+        rows = ((table[idx], geometries[idx]) for idx in hilbert_table_order(table))
+    else:
+        rows = ((segment, source_geometry(feature, segment))
+                for feature, segment in table.stream(iter_features(geojson_file)))
+
+    count = 0
+    for segment, geometry in rows:
         # Get street name
-        name = feature['properties'].get('name', 'Unnamed')
+        name = table.name(segment)
         if not name or name == 'Unnamed':
             continue
 
@@ -62,41 +86,33 @@ def generate_inserts(geojson_file, city_name):
         street_type_escaped = escape_sql_string(street_type)
 
         # Get instance_id and readable_id (from Grid 200m processing)
-        instance_id = feature['properties'].get('_instanceId', 0)
-        readable_id = feature['properties'].get('_readableId', '')
+        instance_id = segment.instance_id if segment.instance_id is not None else 0
+        readable_id = table.readable_id(segment) or ''
         readable_id_escaped = escape_sql_string(readable_id)
 
         # Store full precision geometry as JSON string
-        geometry = json.dumps(feature['geometry'])
         geom_escaped = escape_sql_string(geometry)
 
         # Calculate bounding box from geometry coordinates
-        coords = feature['geometry']['coordinates']
-        lons = [c[0] for c in coords]
-        lats = [c[1] for c in coords]
-
-        min_lat = min(lats)
-        max_lat = max(lats)
-        min_lng = min(lons)
-        max_lng = max(lons)
+        min_lng, min_lat, max_lng, max_lat = table.bbox(segment)
 
         sql = f"INSERT INTO street_segments (city, name, base_name, street_type, instance_id, readable_id, geometry, min_lat, max_lat, min_lng, max_lng) VALUES ('{city_name}', '{name_escaped}', '{base_name_escaped}', '{street_type_escaped}', {instance_id}, '{readable_id_escaped}', '{geom_escaped}', {min_lat}, {max_lat}, {min_lng}, {max_lng});"
-        statements.append(sql)
+        count += 1
+        yield sql
 
-    print(f"-- Generated {len(statements)} INSERT statements", file=sys.stderr)
-    return statements
+    print(f"-- Generated {count} INSERT statements", file=sys.stderr)
+
+def generate_inserts(geojson_file, city_name, spatial_sort=False):
+    """Generate SQL INSERT statements from GeoJSON file."""
+    return list(iter_inserts(geojson_file, city_name, spatial_sort))
 
 def write_batches(statements, output_dir, prefix, batch_size=10000):
-    """Write SQL statements to batch files"""
+    """Write SQL statements to batch files as they are produced"""
 
     os.makedirs(output_dir, exist_ok=True)
+    print(f"-- Writing batch files to {output_dir}", file=sys.stderr)
 
-    total_batches = (len(statements) + batch_size - 1) // batch_size
-    print(f"-- Creating {total_batches} batch files in {output_dir}", file=sys.stderr)
-
-    for i in range(0, len(statements), batch_size):
-        batch = statements[i:i + batch_size]
-        batch_num = i // batch_size + 1
+    def flush(batch, batch_num):
         filename = os.path.join(output_dir, f"{prefix}_batch_{batch_num:03d}.sql")
 
         with open(filename, 'w') as f:
@@ -105,17 +121,32 @@ def write_batches(statements, output_dir, prefix, batch_size=10000):
 
         print(f"-- Created {filename} ({len(batch)} statements)", file=sys.stderr)
 
-    print(f"-- Done! Created {total_batches} batch files", file=sys.stderr)
+    total_batches = 0
+    batch = []
+    for sql in statements:
+        batch.append(sql)
+        if len(batch) == batch_size:
+            total_batches += 1
+            flush(batch, total_batches)
+            batch = []
 
-if __name__ == '__main__':
-    if len(sys.argv) < 4:
-        print("Usage: python generate_sql_batches.py <geojson_file> <city_name> <output_dir> [batch_size]", file=sys.stderr)
-        sys.exit(1)
+    if batch:
+        total_batches += 1
+        flush(batch, total_batches)
 
-    geojson_file = sys.argv[1]
-    city_name = sys.argv[2]
-    output_dir = sys.argv[3]
-    batch_size = int(sys.argv[4]) if len(sys.argv) > 4 else 10000
+    print(f"-- Done! Created {total_batches} batch files", file=sys.stderr)
 
-    statements = generate_inserts(geojson_file, city_name)
-    write_batches(statements, output_dir, city_name, batch_size)
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate SQL batch files from GeoJSON for D1 database upload')
+    parser.add_argument('geojson_file', help='GeoJSON with instance IDs')
+    parser.add_argument('city_name', help='City name (e.g. sydney)')
+    parser.add_argument('output_dir', help='Directory for the batch files')
+    parser.add_argument('batch_size', nargs='?', type=int, default=10000,
+                        help='Statements per batch file (default: 10000)')
+    add_spatial_sort_argument(parser)
+
+    args = parser.parse_args()
+
+    write_batches(iter_inserts(args.geojson_file, args.city_name, args.spatial_sort),
+                  args.output_dir, args.city_name, args.batch_size)
@@ -3,11 +3,10 @@
 Generate a summary table showing timing and street counts
 """
 
-import json
+import json_backend
 
 # Load the comparison results
-with open('data/method_comparison.json', 'r') as f:
-    data = json.load(f)
+data = json_backend.load('data/method_comparison.json')
 
 streets = data['streets']
 results = data['results']
@@ -98,7 +97,6 @@ summary = {
     'disagreements': disagreements
 }
 
-with open('data/summary.json', 'w') as f:
-    json.dump(summary, f, indent=2)
+json_backend.dump(summary, 'data/summary.json', indent=2)
 
 print("Summary saved to data/summary.json")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+NumPy distance kernels for the distance-threshold counting methods.
+
+compare_methods used to call a scalar math-based haversine once per point
+pair from Python loops. These kernels work on whole arrays instead:
+  - haversine over arrays of [lng, lat] degrees
+  - all-pairs endpoint distances in row blocks, so memory stays at
+    block_size x n_segments however long the street is
+  - KD-tree endpoint pairs within a threshold, measured with haversine
+
+Requires numpy and scipy.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_M = 6371000
+
+# Rows per block in endpoint_distance_blocks (~8 MB per 1000 segments)
+DEFAULT_BLOCK_SIZE = 256
+
+
+def haversine(lng1, lat1, lng2, lat2):
+    """Haversine distance in meters over arrays of [lng, lat] degrees."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = np.radians(lat2 - lat1)
+    delta_lambda = np.radians(lng2 - lng1)
+
+    a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    return EARTH_RADIUS_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def unit_sphere_xyz(lng, lat):
+    """Project degrees onto the sphere (meters) so chord length tracks arc length."""
+    lng = np.radians(lng)
+    lat = np.radians(lat)
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS_M * np.column_stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)])
+
+
+def chord_radius(max_distance):
+    """KD-tree search radius that never misses a pair within max_distance meters."""
+    # Chord <= arc; the slack covers rounding in the projection
+    return max_distance * (1 + 1e-9) + 1e-6
+
+
+def segment_endpoints(segments):
+    """
+    First and last vertex of each segment.
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+
+    Returns:
+        float64 array (n_segments, 2, 2) indexed [segment, start/end, lng/lat]
+    """
+    return np.array([[coords[0][:2], coords[-1][:2]] for coords in segments],
+                    dtype=np.float64).reshape(-1, 2, 2)
+
+
+def min_distance_per_pair(seg_a, seg_b, dists):
+    """Reduce point-level pairs to one (i < j, min distance) per segment pair."""
+    keep = seg_a != seg_b
+    seg_i = np.minimum(seg_a[keep], seg_b[keep])
+    seg_j = np.maximum(seg_a[keep], seg_b[keep])
+    dists = dists[keep]
+    if len(dists) == 0:
+        return seg_i, seg_j, dists
+
+    order = np.lexsort((dists, seg_j, seg_i))
+    seg_i, seg_j, dists = seg_i[order], seg_j[order], dists[order]
+    first = np.r_[True, (seg_i[1:] != seg_i[:-1]) | (seg_j[1:] != seg_j[:-1])]
+    return seg_i[first], seg_j[first], dists[first]
+
+
+def endpoint_distance_blocks(endpoints, rows=None, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    All-pairs minimum endpoint distances, a block of rows at a time.
+
+    The distance between two segments is the smallest of the four
+    endpoint-to-endpoint haversine distances.
+
+    Args:
+        endpoints: Output of segment_endpoints()
+        rows: Segment indices to compute rows for (default: all segments)
+        block_size: Rows per block; peak memory is O(block_size * n_segments)
+
+    Yields:
+        (row_indices, distances) with distances of shape
+        (len(row_indices), n_segments)
+    """
+    if rows is None:
+        rows = np.arange(len(endpoints))
+    lng = endpoints[:, :, 0]
+    lat = endpoints[:, :, 1]
+
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        distances = None
+        for end_a in (0, 1):
+            for end_b in (0, 1):
+                d = haversine(lng[block, end_a][:, None], lat[block, end_a][:, None],
+                              lng[None, :, end_b], lat[None, :, end_b])
+                distances = d if distances is None else np.minimum(distances, d)
+        yield block, distances
+
+
+def endpoint_distance_pairs(endpoints, max_distance):
+    """
+    Segment pairs with an endpoint of each within max_distance meters.
+
+    Candidate endpoint pairs come from a KD-tree over sphere-projected
+    endpoints and are then measured with haversine.
+
+    Args:
+        endpoints: Output of segment_endpoints()
+        max_distance: Threshold in meters
+
+    Returns:
+        (seg_i, seg_j, dist) arrays with seg_i < seg_j and the minimum
+        endpoint distance of each pair
+    """
+    points = endpoints.reshape(-1, 2)
+    point_segment = np.repeat(np.arange(len(endpoints)), 2)
+
+    empty = np.empty(0, dtype=np.int64)
+    if len(endpoints) < 2:
+        return empty, empty, np.empty(0)
+
+    tree = cKDTree(unit_sphere_xyz(points[:, 0], points[:, 1]))
+    candidates = tree.query_pairs(chord_radius(max_distance), output_type='ndarray')
+    if len(candidates) == 0:
+        return empty, empty, np.empty(0)
+
+    a, b = candidates[:, 0], candidates[:, 1]
+    dists = haversine(points[a, 0], points[a, 1], points[b, 0], points[b, 1])
+    within = dists <= max_distance
+
+    return min_distance_per_pair(point_segment[a][within], point_segment[b][within], dists[within])
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Streaming GeoJSON FeatureCollection reading and writing.
+
+City road files are tens of MB of JSON, and json.load() turns them into
+several hundred MB of dicts before the first feature is touched. These
+helpers read the `features` array one feature at a time from fixed-size
+chunks, and FeatureCollectionWriter writes features back out as they are
+produced, so filter and map stages run in memory independent of city size.
+Compact output is serialized with the fastest installed JSON backend (see
+json_backend.py). Paths ending in .gz or .zst are (de)compressed on the fly
+(see compressed_io.py).
+"""
+
+import json
+import os
+import tempfile
+
+import json_backend
+from compressed_io import compression_for, open_text, resolve_path, wrap_binary
+
+# Characters read per chunk
+READ_CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _ChunkReader:
+    """Sliding text buffer over a file with JSON value decoding."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """Drop consumed text and read one more chunk; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or '' at end of file."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        """Consume the next non-whitespace character, which must be in chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed GeoJSON: expected one of {chars!r}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next JSON value, reading more chunks until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buf) and not self.eof and not isinstance(value, (dict, list, str)):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_features(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the features of a GeoJSON FeatureCollection one at a time.
+
+    Only the current feature and one read chunk are held in memory. Top-level
+    members other than `features` (type, bbox, ...) are skipped. A city store
+    directory (see city_store.py) is read from its memory-mapped columns, and
+    a .parquet file (see geoparquet_io.py) from its columns.
+    .gz and .zst files are decompressed while streaming, and a missing
+    streets.geojson is read from streets.geojson.gz/.zst if one exists.
+
+    Args:
+        path: Path to a GeoJSON FeatureCollection file (optionally
+            compressed), a city store or a GeoParquet file
+        chunk_size: Characters to read per chunk
+
+    Yields:
+        Feature dicts, in file order
+    """
+    if os.path.isdir(path):
+        from city_store import iter_store_features
+        yield from iter_store_features(path)
+        return
+    if os.fspath(path).lower().endswith('.parquet'):
+        from geoparquet_io import iter_parquet_features
+        yield from iter_parquet_features(path)
+        return
+
+    with open_text(resolve_path(path)) as f:
+        reader = _ChunkReader(f, chunk_size)
+        reader.expect('{')
+
+        if reader.peek() == '}':
+            return
+
+        while True:
+            key = reader.value()
+            reader.expect(':')
+
+            if key == 'features':
+                reader.expect('[')
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        yield reader.value()
+                        if reader.expect(',]') == ']':
+                            break
+            else:
+                reader.value()
+
+            if reader.expect(',}') == '}':
+                return
+
+
+class FeatureCollectionWriter:
+    """
+    Incremental, atomic GeoJSON FeatureCollection writer.
+
+    Features are serialized and written as they arrive, so output memory is
+    one feature regardless of city size. Everything goes to a temporary file
+    in the output directory that is renamed into place only when the `with`
+    block exits cleanly, so a failed run never leaves a truncated file and
+    the output may safely replace the file being read. Bytes are counted as
+    they are written, so callers can report the file size without
+    serializing the data a second time.
+
+    Compact output goes through json_backend; any other separators use the
+    standard library json module. A path ending in .gz or .zst is written
+    compressed; bytes_written then becomes the compressed file size once the
+    block exits.
+
+    Usage:
+        with FeatureCollectionWriter('out.geojson') as writer:
+            for feature in features:
+                writer.write(feature)
+        print(writer.count, writer.bytes_written)
+    """
+
+    def __init__(self, path, separators=(',', ':')):
+        """
+        Args:
+            path: Output file path
+            separators: json separators; compact by default, None uses
+                json's defaults (', ', ': ')
+        """
+        self.path = path
+        self.separators = separators
+        self.count = 0
+        self.bytes_written = 0
+
+        if separators is not None and tuple(separators) == (',', ':'):
+            self._dumps = json_backend.dumps
+        else:
+            self._dumps = lambda obj: json.dumps(obj, separators=separators).encode('utf-8')
+
+        header, self._footer = self._dumps({'type': 'FeatureCollection', 'features': []}).rsplit(b'[]', 1)
+        self._header = header + b'['
+        self._item_separator = (separators[0] if separators else ', ').encode('utf-8')
+        self._file = None
+        self._tmp_path = None
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, self._tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(self.path) + '.',
+                                              dir=directory)
+
+        # mkstemp creates 0600 files; give the output open()'s usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp_path, 0o666 & ~umask)
+
+        self._file = wrap_binary(os.fdopen(fd, 'wb'), 'wb', compression_for(self.path))
+        self._emit(self._header)
+        return self
+
+    def _emit(self, data):
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    def write(self, feature):
+        """Serialize and append one feature."""
+        if self.count:
+            self._emit(self._item_separator)
+        self._emit(self._dumps(feature))
+        self.count += 1
+
+    def write_all(self, features):
+        """Append every feature from an iterable; returns the running count."""
+        for feature in features:
+            self.write(feature)
+        return self.count
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._emit(b']' + self._footer)
+            self._file.close()
+            if exc_type is None:
+                if compression_for(self.path):
+                    self.bytes_written = os.path.getsize(self._tmp_path)
+                os.replace(self._tmp_path, self.path)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.unlink(self._tmp_path)
+        return False
+
+
+def write_feature_collection(path, features, separators=None):
+    """
+    Stream features into a GeoJSON FeatureCollection file.
+
+    Output parses to the same value as json.dump() of {'type':
+    'FeatureCollection', 'features': [...]} (byte-identical with the json
+    backend), written atomically with FeatureCollectionWriter.
+
+    Args:
+        path: Output file path
+        features: Iterable of feature dicts (consumed lazily)
+        separators: json separators, e.g. (',', ':') for compact output;
+            None uses json's defaults
+
+    Returns:
+        Number of features written
+    """
+    with FeatureCollectionWriter(path, separators=separators) as writer:
+        writer.write_all(features)
+    return writer.count
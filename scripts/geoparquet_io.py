@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+GeoParquet export and import of street segments.
+
+Segments are written one row per feature, sorted by street name so that each
+row group holds whole streets; row group statistics on the name column then
+let a reader fetch one street without touching the rest of the file:
+
+    feature_index   int32, position of the feature in the source GeoJSON
+    name            dictionary-encoded string
+    highway         dictionary-encoded string
+    _instanceId     int32
+    _readableId     dictionary-encoded string
+    properties      compact JSON of the remaining properties (null if none)
+    geometry        WKB LineString (GeoParquet 1.0 "geo" metadata)
+
+A null in a promoted column means the property is absent; values that do
+not fit the column type (e.g. a null name) stay in the properties JSON, so
+a round trip gives back equal features in the original order.
+
+iter_features(), load_arrays() and investigate_instances.py accept .parquet
+paths; counting reads only the name and geometry columns.
+
+Requires pyarrow (pip install pyarrow) and numpy.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+import json_backend
+
+# Target rows per row group; a street is never split across row groups
+ROW_GROUP_SIZE = 8192
+
+PARQUET_SUFFIX = '.parquet'
+
+# Promoted property columns and the Python type their values must have
+PROPERTY_COLUMNS = {
+    'name': str,
+    'highway': str,
+    '_instanceId': int,
+    '_readableId': str,
+}
+DICTIONARY_COLUMNS = ['name', 'highway', '_readableId']
+
+# WKB header: little-endian byte order flag, geometry type 2 (LineString), point count
+_WKB_HEADER = struct.Struct('<BII')
+_WKB_LINESTRING = 2
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("GeoParquet support requires pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def is_parquet(path):
+    """True if path names a .parquet file."""
+    return os.fspath(path).lower().endswith(PARQUET_SUFFIX)
+
+
+def linestring_wkb(coords):
+    """Little-endian WKB for a LineString of [lng, lat] pairs."""
+    points = np.asarray(coords, dtype='<f8')
+    if points.size and (points.ndim != 2 or points.shape[1] != 2):
+        raise ValueError("Only [lng, lat] coordinates can be written to GeoParquet")
+    return _WKB_HEADER.pack(1, _WKB_LINESTRING, len(points)) + points.tobytes()
+
+
+def linestring_coords(wkb):
+    """[lng, lat] lists from a little-endian 2D WKB LineString (linestring_wkb(), GDAL)."""
+    byte_order, geometry_type, _ = _WKB_HEADER.unpack_from(wkb)
+    if byte_order != 1 or geometry_type != _WKB_LINESTRING:
+        raise ValueError("Only little-endian WKB LineStrings are supported")
+    return np.frombuffer(wkb, dtype='<f8', offset=_WKB_HEADER.size).reshape(-1, 2).tolist()
+
+
+def _is_promotable(key, value):
+    expected = PROPERTY_COLUMNS[key]
+    return isinstance(value, expected) and not isinstance(value, bool)
+
+
+def write_geoparquet(features, path, row_group_size=ROW_GROUP_SIZE):
+    """
+    Write GeoJSON LineString features to a GeoParquet file.
+
+    Args:
+        features: Iterable of GeoJSON features (e.g. geojson_io.iter_features())
+        path: Output .parquet path
+        row_group_size: Target rows per row group
+
+    Returns:
+        Number of features written
+    """
+    pa, pq = _pyarrow()
+
+    columns = {key: [] for key in PROPERTY_COLUMNS}
+    extras = []
+    geometries = []
+    key_order = {}
+    min_lng = min_lat = float('inf')
+    max_lng = max_lat = float('-inf')
+
+    for feature_idx, feature in enumerate(features):
+        geometry = feature['geometry']
+        if geometry['type'] != 'LineString':
+            raise ValueError(f"Feature {feature_idx}: only LineString geometries can be written, "
+                             f"found {geometry['type']}")
+        coords = geometry['coordinates']
+        geometries.append(linestring_wkb(coords))
+        if coords:
+            lngs = [c[0] for c in coords]
+            lats = [c[1] for c in coords]
+            min_lng, max_lng = min(min_lng, min(lngs)), max(max_lng, max(lngs))
+            min_lat, max_lat = min(min_lat, min(lats)), max(max_lat, max(lats))
+
+        properties = feature['properties']
+        extra = {}
+        for key, value in properties.items():
+            key_order.setdefault(key, None)
+            if key not in PROPERTY_COLUMNS or not _is_promotable(key, value):
+                extra[key] = value
+        for key, values in columns.items():
+            value = properties.get(key)
+            values.append(value if key in properties and key not in extra else None)
+        extras.append(json_backend.dumps_str(extra) if extra else None)
+
+    n_features = len(geometries)
+
+    # Sort by name (unnamed last), keeping feature order within each street
+    names = columns['name']
+    order = sorted(range(n_features), key=lambda i: (names[i] is None, names[i] or ''))
+
+    arrays = {'feature_index': pa.array(order, type=pa.int32())}
+    for key, values in columns.items():
+        sorted_values = [values[i] for i in order]
+        if key in DICTIONARY_COLUMNS:
+            arrays[key] = pa.array(sorted_values, type=pa.string()).dictionary_encode()
+        else:
+            arrays[key] = pa.array(sorted_values, type=pa.int32())
+    arrays['properties'] = pa.array([extras[i] for i in order], type=pa.string())
+    arrays['geometry'] = pa.array([geometries[i] for i in order], type=pa.binary())
+    table = pa.table(arrays)
+
+    geo_metadata = {
+        'version': '1.0.0',
+        'primary_column': 'geometry',
+        'columns': {
+            'geometry': {
+                'encoding': 'WKB',
+                'geometry_types': ['LineString'],
+                'bbox': [min_lng, min_lat, max_lng, max_lat] if n_features else [],
+            }
+        },
+    }
+    table = table.replace_schema_metadata({
+        'geo': json.dumps(geo_metadata),
+        'streets': json.dumps({'property_order': list(key_order)}),
+    })
+
+    # Row group boundaries at street name changes only
+    boundaries = [0]
+    for row in range(1, n_features):
+        if row - boundaries[-1] >= row_group_size and names[order[row]] != names[order[row - 1]]:
+            boundaries.append(row)
+    boundaries.append(n_features)
+
+    with pq.ParquetWriter(path, table.schema, compression='zstd',
+                          use_dictionary=DICTIONARY_COLUMNS + ['_instanceId']) as writer:
+        for start, stop in zip(boundaries[:-1], boundaries[1:]):
+            if stop > start or n_features == 0:
+                writer.write_table(table.slice(start, stop - start), row_group_size=max(stop - start, 1))
+
+    return n_features
+
+
+def _name_row_groups(parquet_file, street_name):
+    """Row groups whose name statistics can contain street_name."""
+    metadata = parquet_file.metadata
+    name_column = parquet_file.schema_arrow.get_field_index('name')
+    row_groups = []
+    for row_group_idx in range(metadata.num_row_groups):
+        statistics = metadata.row_group(row_group_idx).column(name_column).statistics
+        if statistics is not None and statistics.has_min_max:
+            if not (statistics.min <= street_name <= statistics.max):
+                continue
+        row_groups.append(row_group_idx)
+    return row_groups
+
+
+def read_segment_table(path, columns=None, street_name=None):
+    """
+    Read selected columns of a GeoParquet segment file in feature order.
+
+    Args:
+        path: .parquet file written by write_geoparquet()
+        columns: Column names to read (feature_index is always included);
+            None reads every column
+        street_name: Only read the row groups and rows of this street
+
+    Returns:
+        pyarrow.Table sorted by feature_index
+    """
+    pa, pq = _pyarrow()
+    import pyarrow.compute as pc
+
+    parquet_file = pq.ParquetFile(path, read_dictionary=DICTIONARY_COLUMNS)
+    if columns is not None:
+        columns = ['feature_index'] + [c for c in columns if c != 'feature_index']
+        if street_name is not None and 'name' not in columns:
+            columns.append('name')
+
+    if street_name is None:
+        table = parquet_file.read(columns=columns)
+    else:
+        table = parquet_file.read_row_groups(_name_row_groups(parquet_file, street_name), columns=columns)
+        table = table.filter(pc.equal(table['name'].cast(pa.string()), street_name))
+
+    return table.take(pc.sort_indices(table['feature_index']))
+
+
+def iter_parquet_features(path, street_name=None):
+    """
+    Rebuild GeoJSON features from a GeoParquet segment file.
+
+    Args:
+        path: .parquet file written by write_geoparquet()
+        street_name: Only yield this street's features (reading only the
+            row groups that can contain it)
+
+    Yields:
+        Feature dicts in source feature order, equal to the ones written
+    """
+    _, pq = _pyarrow()
+    property_order = json.loads(pq.read_schema(path).metadata[b'streets'])['property_order']
+    table = read_segment_table(path, street_name=street_name)
+
+    promoted = {key: table[key].to_pylist() for key in PROPERTY_COLUMNS}
+    extras = table['properties'].to_pylist()
+    geometries = table['geometry'].to_pylist()
+
+    for row, wkb in enumerate(geometries):
+        values = {key: column[row] for key, column in promoted.items() if column[row] is not None}
+        if extras[row] is not None:
+            values.update(json_backend.loads(extras[row]))
+        yield {
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': linestring_coords(wkb)},
+            'properties': {key: values[key] for key in property_order if key in values},
+        }
+
+
+def load_parquet_arrays(path):
+    """
+    City arrays (see city_arrays.load_city_arrays()) from the name and
+    geometry columns only, decoding WKB with NumPy instead of building
+    feature dicts.
+
+    Args:
+        path: .parquet file written by write_geoparquet()
+
+    Returns:
+        dict with coords, offsets, name_codes and names, in feature order
+    """
+    table = read_segment_table(path, columns=['name', 'geometry'])
+
+    geometry = table['geometry'].combine_chunks()
+    _, wkb_offsets, wkb_data = geometry.buffers()
+    wkb_offsets = np.frombuffer(wkb_offsets, dtype=np.int32)[geometry.offset:geometry.offset + len(geometry) + 1]
+    wkb_data = np.frombuffer(wkb_data, dtype=np.uint8)
+
+    # Drop the fixed-size header of every WKB value; what remains is the coordinates
+    keep = np.ones(int(wkb_offsets[-1] - wkb_offsets[0]), dtype=bool)
+    header_starts = wkb_offsets[:-1] - wkb_offsets[0]
+    for header_byte in range(_WKB_HEADER.size):
+        keep[header_starts + header_byte] = False
+    coords = wkb_data[wkb_offsets[0]:wkb_offsets[-1]][keep].view('<f8').reshape(-1, 2)
+
+    lengths = (np.diff(wkb_offsets) - _WKB_HEADER.size) // 16
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    # Name codes renumbered in first-seen feature order, -1 for unnamed
+    name_column = table['name'].combine_chunks()
+    dictionary_codes = name_column.indices.fill_null(-1).to_numpy().astype(np.int64)
+    dictionary = name_column.dictionary.to_pylist()
+    named = dictionary_codes >= 0
+    seen, first_index = np.unique(dictionary_codes[named], return_index=True)
+    by_first_seen = seen[np.argsort(first_index)]
+    remap = np.full(len(dictionary) + 1, -1, dtype=np.int32)
+    remap[by_first_seen] = np.arange(len(by_first_seen), dtype=np.int32)
+
+    return {
+        'coords': np.ascontiguousarray(coords),
+        'offsets': offsets,
+        'name_codes': remap[dictionary_codes],
+        'names': [dictionary[code] for code in by_first_seen.tolist()],
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    from geojson_io import FeatureCollectionWriter, iter_features
+
+    parser = argparse.ArgumentParser(description='Convert street segments between GeoJSON and GeoParquet')
+    parser.add_argument('input', help='Input .geojson (optionally .gz/.zst) or .parquet file')
+    parser.add_argument('output', help='Output .parquet or .geojson file')
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE,
+                        help=f'Target rows per row group (default: {ROW_GROUP_SIZE})')
+
+    args = parser.parse_args()
+
+    start_time = time.time()
+    if is_parquet(args.output):
+        count = write_geoparquet(iter_features(args.input), args.output, args.row_group_size)
+    elif is_parquet(args.input):
+        with FeatureCollectionWriter(args.output) as writer:
+            count = writer.write_all(iter_parquet_features(args.input))
+    else:
+        print("One of input and output must be a .parquet file", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Converted {count:,} features in {time.time() - start_time:.2f} seconds")
+    print(f"{args.input}: {os.path.getsize(args.input) / 1024 / 1024:.1f} MB -> "
+          f"{args.output}: {os.path.getsize(args.output) / 1024 / 1024:.1f} MB")
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Integer-encoded grid engine for the Grid 200m clustering method.
+
+Cells are identified by integer (row, col) indices packed into a single int,
+so neighbour lookups are plain integer additions instead of re-parsing and
+re-rounding "lat,lng" string keys. Produces the same partitions as the
+original string-keyed flood fill.
+"""
+
+from collections import defaultdict, deque
+
+# Packing: cell = row * CELL_ROW_STRIDE + col. Columns stay well inside
+# +/-2**31 for any sensible grid size, so rows never bleed into each other.
+CELL_ROW_STRIDE = 1 << 32
+
+# The 8-connected neighbourhood expressed as offsets on packed cell keys
+NEIGHBOUR_OFFSETS = tuple(
+    dlat * CELL_ROW_STRIDE + dlng
+    for dlat in (-1, 0, 1)
+    for dlng in (-1, 0, 1)
+    if dlat != 0 or dlng != 0
+)
+
+
+def resolve_backend(backend='auto'):
+    """
+    Pick the clustering backend to use.
+
+    Args:
+        backend: 'auto', 'numpy' or 'python'
+
+    Returns:
+        'numpy' if requested (or auto) and numpy/scipy are installed, else 'python'
+    """
+    if backend == 'python':
+        return 'python'
+
+    try:
+        import grid_numpy  # noqa: F401
+    except ImportError:
+        if backend == 'numpy':
+            print("Warning: numpy/scipy not installed, using the python backend. "
+                  "Install with: pip install numpy scipy")
+        return 'python'
+
+    return 'numpy'
+
+
+def method_grid_flood_fill(segments, grid_size, dedupe_segments=False):
+    """
+    Grid-based flood fill method for grouping connected segments.
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+        grid_size: Grid cell size in degrees (e.g., 200m = 0.0018 degrees)
+        dedupe_segments: If True, a segment touching several disconnected
+            cell regions is only kept in the first one (the behaviour of the
+            Melbourne processing script)
+
+    Returns:
+        List of component groups, each group is a list of segment indices
+    """
+    if not segments:
+        return []
+
+    # Map cells to the segments that touch them. Segments are visited in
+    # order, so a repeat can only ever be the last entry in the list.
+    cell_to_segments = {}
+
+    for seg_idx, coords in enumerate(segments):
+        for coord in coords:
+            cell = round(coord[1] / grid_size) * CELL_ROW_STRIDE + round(coord[0] / grid_size)
+            members = cell_to_segments.get(cell)
+            if members is None:
+                cell_to_segments[cell] = [seg_idx]
+            elif members[-1] != seg_idx:
+                members.append(seg_idx)
+
+    # Flood fill over cells (8-connected) to find connected components
+    visited_cells = set()
+    visited_segments = set()
+    components = []
+
+    for start_cell in cell_to_segments:
+        if start_cell in visited_cells:
+            continue
+
+        queue = deque([start_cell])
+        visited_cells.add(start_cell)
+        component_segments = set()
+
+        while queue:
+            cell = queue.popleft()
+            component_segments.update(cell_to_segments[cell])
+
+            for offset in NEIGHBOUR_OFFSETS:
+                adj_cell = cell + offset
+                if adj_cell in cell_to_segments and adj_cell not in visited_cells:
+                    visited_cells.add(adj_cell)
+                    queue.append(adj_cell)
+
+        if dedupe_segments:
+            component_segments -= visited_segments
+            visited_segments.update(component_segments)
+
+        if component_segments:
+            components.append(sorted(component_segments))
+
+    # Post-process: merge components that share endpoints
+    components = merge_components_by_endpoints(segments, components)
+
+    return components
+
+
+def cluster_street(street_name, segments, grid_size):
+    """
+    Grid + Highway-Aware clustering of one street's segments.
+
+    Args:
+        street_name: Name of the street (used for the highway heuristic)
+        segments: List of coordinate arrays [[lng, lat], ...]
+        grid_size: Grid cell size in degrees
+
+    Returns:
+        List of component groups, each group is a list of segment indices
+    """
+    components = method_grid_flood_fill(segments, grid_size)
+
+    # Highways/freeways count as one instance regardless of gaps
+    is_highway = 'Highway' in street_name or 'Freeway' in street_name or 'Motorway' in street_name
+    if is_highway and len(components) > 1:
+        components = [sum(components, [])]
+
+    return components
+
+
+def merge_components_by_endpoints(segments, components):
+    """
+    Merge components that share any endpoint coordinates.
+    This handles the case where segments connect but fall in different grid cells.
+    """
+    if len(components) <= 1:
+        return components
+
+    # Build endpoint -> component mapping
+    endpoint_to_components = defaultdict(set)
+
+    for comp_idx, component in enumerate(components):
+        for seg_idx in component:
+            coords = segments[seg_idx]
+            if coords:
+                # Get first and last point
+                start = tuple(coords[0])  # (lng, lat)
+                end = tuple(coords[-1])
+                endpoint_to_components[start].add(comp_idx)
+                endpoint_to_components[end].add(comp_idx)
+
+    # Find components that need to be merged (share endpoints)
+    # Use union-find to group connected components
+    parent = list(range(len(components)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(x, y):
+        px, py = find(x), find(y)
+        if px != py:
+            parent[px] = py
+
+    # Union components that share endpoints
+    for comp_indices in endpoint_to_components.values():
+        if len(comp_indices) > 1:
+            comp_list = list(comp_indices)
+            for i in range(len(comp_list) - 1):
+                union(comp_list[i], comp_list[i + 1])
+
+    # Group segments by their merged component
+    merged = defaultdict(list)
+    for comp_idx, component in enumerate(components):
+        root = find(comp_idx)
+        merged[root].extend(component)
+
+    return list(merged.values())
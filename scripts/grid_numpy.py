@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+NumPy-vectorized whole-city backend for the Grid 200m + Highway-Aware method.
+
+Instead of clustering one street name at a time, every vertex of the city is
+loaded into flat arrays and all streets are clustered together with a single
+sparse connected-components pass. The graph has one node per segment and one
+node per (name, cell_row, cell_col) grid cell, with edges for:
+  - segment -> every cell one of its vertices falls in
+  - cell -> 8-connected neighbouring cell of the same name
+  - segment -> segment of the same name sharing an exact endpoint
+  - segment -> segment of the same highway/freeway/motorway name
+which yields the same instances as grid_engine.method_grid_flood_fill followed
+by the Highway-Aware merge.
+
+Requires numpy and scipy.
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+def _consecutive_equal_edges(order, *keys):
+    """Edges linking neighbours in `order` whose keys are all equal."""
+    if len(order) < 2:
+        return order[:0], order[:0]
+
+    same = np.ones(len(order) - 1, dtype=bool)
+    for key in keys:
+        sorted_key = key[order]
+        same &= sorted_key[1:] == sorted_key[:-1]
+
+    return order[:-1][same], order[1:][same]
+
+
+def cluster_city_grid(arrays, grid_size, highway_aware=True):
+    """
+    Cluster every named street of a city in one vectorized pass.
+
+    Args:
+        arrays: Output of city_arrays.load_city_arrays()
+        grid_size: Grid cell size in degrees (e.g., 200m = 200 / 111000)
+        highway_aware: Merge all instances of highway/freeway/motorway names
+
+    Returns:
+        (instance_ids, instance_counts):
+            instance_ids: int64 array (n_segments,) with the 0-based instance
+                number of each segment within its street name, or -1 for
+                unnamed or empty segments. Instances are numbered in order of
+                their first segment, matching add_instance_ids.py.
+            instance_counts: int64 array (len(names),) with the number of
+                instances for each street name.
+    """
+    coords = arrays['coords']
+    offsets = arrays['offsets']
+    name_codes = arrays['name_codes']
+    names = arrays['names']
+
+    n_segments = len(name_codes)
+    lengths = np.diff(offsets)
+    instance_ids = np.full(n_segments, -1, dtype=np.int64)
+
+    clustered = (name_codes >= 0) & (lengths > 0)
+    if not clustered.any():
+        return instance_ids, np.zeros(len(names), dtype=np.int64)
+
+    # Per-vertex (name, row, col) cell keys. np.rint rounds half to even,
+    # exactly like the built-in round() used by the per-street engine.
+    vertex_segment = np.repeat(np.arange(n_segments, dtype=np.int64), lengths)
+    vertex_mask = clustered[vertex_segment]
+    vertex_segment = vertex_segment[vertex_mask]
+    vertex_name = name_codes[vertex_segment].astype(np.int64)
+    rows = np.rint(coords[vertex_mask, 1] / grid_size).astype(np.int64)
+    cols = np.rint(coords[vertex_mask, 0] / grid_size).astype(np.int64)
+
+    # Pack keys with a one-cell margin so neighbour offsets never wrap into
+    # the next row or the next street name
+    rows -= rows.min() - 1
+    cols -= cols.min() - 1
+    height = int(rows.max()) + 2
+    width = int(cols.max()) + 2
+    if len(names) * height * width >= 2 ** 62:
+        raise ValueError("Grid too fine for packed cell keys; use a larger grid_size")
+
+    vertex_cell_key = (vertex_name * height + rows) * width + cols
+    cells, vertex_cell = np.unique(vertex_cell_key, return_inverse=True)
+    n_cells = len(cells)
+    vertex_cell = vertex_cell.ravel()
+
+    edge_src = [vertex_segment]
+    edge_dst = [n_segments + vertex_cell]
+
+    # Cell adjacency: half of the 8-neighbourhood is enough for an undirected graph
+    for offset in (1, width - 1, width, width + 1):
+        target = cells + offset
+        pos = np.searchsorted(cells, target)
+        pos[pos == n_cells] = 0
+        found = cells[pos] == target
+        edge_src.append(n_segments + np.flatnonzero(found))
+        edge_dst.append(n_segments + pos[found])
+
+    # Segments of the same name sharing an exact endpoint coordinate
+    seg_idx = np.flatnonzero(clustered)
+    endpoint_segment = np.concatenate([seg_idx, seg_idx])
+    endpoint_vertex = np.concatenate([offsets[seg_idx], offsets[seg_idx + 1] - 1])
+    endpoint_name = name_codes[endpoint_segment]
+    endpoint_lng = coords[endpoint_vertex, 0]
+    endpoint_lat = coords[endpoint_vertex, 1]
+    order = np.lexsort((endpoint_lat, endpoint_lng, endpoint_name))
+    src, dst = _consecutive_equal_edges(order, endpoint_name, endpoint_lng, endpoint_lat)
+    edge_src.append(endpoint_segment[src])
+    edge_dst.append(endpoint_segment[dst])
+
+    # Highway-Aware: chain together every segment of a highway name
+    if highway_aware:
+        is_highway_name = np.array(
+            ['Highway' in name or 'Freeway' in name or 'Motorway' in name for name in names],
+            dtype=bool
+        )
+        highway_segments = seg_idx[is_highway_name[name_codes[seg_idx]]]
+        order = np.argsort(name_codes[highway_segments], kind='stable')
+        src, dst = _consecutive_equal_edges(order, name_codes[highway_segments])
+        edge_src.append(highway_segments[src])
+        edge_dst.append(highway_segments[dst])
+
+    edge_src = np.concatenate(edge_src)
+    edge_dst = np.concatenate(edge_dst)
+    n_nodes = n_segments + n_cells
+    graph = coo_matrix(
+        (np.ones(len(edge_src), dtype=np.int8), (edge_src, edge_dst)),
+        shape=(n_nodes, n_nodes)
+    ).tocsr()
+    _, labels = connected_components(graph, directed=False)
+
+    # Number instances within each name by their first segment index
+    segment_labels = labels[seg_idx]
+    component_labels, first_pos, segment_component = np.unique(
+        segment_labels, return_index=True, return_inverse=True
+    )
+    component_name = name_codes[seg_idx[first_pos]]
+    component_order = np.lexsort((first_pos, component_name))
+
+    instance_counts = np.bincount(component_name, minlength=len(names)).astype(np.int64)
+    name_start = np.zeros(len(names), dtype=np.int64)
+    np.cumsum(instance_counts[:-1], out=name_start[1:])
+
+    component_instance = np.empty(len(component_labels), dtype=np.int64)
+    component_instance[component_order] = (
+        np.arange(len(component_labels)) - name_start[component_name[component_order]]
+    )
+    instance_ids[seg_idx] = component_instance[segment_component.ravel()]
+
+    return instance_ids, instance_counts
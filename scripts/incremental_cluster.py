@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Incremental Grid 200m re-clustering of a single street in the D1/SQLite database.
+
+Patching one street (e.g. adding a missed road) should not require a full
+add_instance_ids run. This loads the stored segments of one (city, name),
+applies the new or changed geometry, re-runs the same Grid 200m +
+Highway-Aware clustering as add_instance_ids.py and returns only the rows
+whose instance_id/readable_id changed plus the rows to insert. The patch can
+be applied to a local SQLite file or emitted as SQL for `wrangler d1 execute`.
+"""
+
+import re
+import sys
+import time
+
+import json_backend
+from add_instance_ids import format_readable_id, sanitize_for_id
+from generate_sql_batches import escape_sql_string, parse_street_name
+from grid_engine import cluster_street
+
+GRID_SIZE = 200 / 111000  # 200m in degrees, as in add_instance_ids.py
+
+
+def _segment_id_column(conn):
+    """Primary key column of street_segments (segment_id locally, id in BACKEND_API.md)."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(street_segments)")]
+    return 'segment_id' if 'segment_id' in columns else 'id'
+
+
+def _bounding_box(coords):
+    """(min_lat, max_lat, min_lng, max_lng) of a coordinate array."""
+    lngs = [c[0] for c in coords]
+    lats = [c[1] for c in coords]
+    return min(lats), max(lats), min(lngs), max(lngs)
+
+
+def readable_id_for(city, name, instance_num):
+    """
+    Readable ID exactly as add_instance_ids.py builds it (instance_num is 1-based).
+
+    city is the prefix add_instance_ids.py was given, as is: 'sydney' from
+    add_instance_ids_all.sh, 'Sydney' when detected from the path.
+    """
+    return format_readable_id(city, sanitize_for_id(name), instance_num)
+
+
+def readable_prefix(city, name, readable_ids):
+    """
+    City prefix the stored readable IDs of a street were built with.
+
+    The city column does not record it (add_instance_ids.py may have been
+    given 'sydney' or detected 'Sydney'), so it is taken from the first
+    stored ID of the form <prefix>_<street>_<NN>; city is the fallback for
+    streets with no stored IDs.
+    """
+    suffix = re.compile(re.escape('_' + sanitize_for_id(name)) + r'_\d{2,}$')
+    for readable_id in readable_ids:
+        match = suffix.search(readable_id or '')
+        if match and match.start() > 0:
+            return readable_id[:match.start()]
+    return city
+
+
+def recluster_street(conn, city, name, new_segments=(), changed_segments=None):
+    """
+    Re-cluster one street name and compute the minimal set of row changes.
+
+    Instances keep their stored numbering: components are numbered in order
+    of the lowest stored instance_id among their stored segments (components
+    of only new segments last) and then renumbered 0..n-1. This does not
+    depend on row order, so tables loaded with --spatial-sort, whose primary
+    keys are not in GeoJSON feature order, can be patched too, and a patch
+    that changes no clustering changes no rows. A split or merge renumbers
+    the instances after it, which may differ from the numbering a full
+    add_instance_ids run over the patched GeoJSON would assign.
+
+    Args:
+        conn: sqlite3 connection to a database with a street_segments table
+        city: Value of the city column (e.g. 'canberra')
+        name: Street name to re-cluster
+        new_segments: Coordinate arrays [[lng, lat], ...] to insert
+        changed_segments: Dict mapping stored segment id -> new coordinates
+
+    Returns:
+        Dict with:
+            'id_column': primary key column name
+            'updates': list of {id, instance_id, readable_id[, geometry, bbox]}
+                for stored rows whose values change
+            'inserts': list of row dicts for new_segments
+            'total_instances': number of instances after the patch
+    """
+    changed_segments = changed_segments or {}
+    id_column = _segment_id_column(conn)
+
+    rows = conn.execute(
+        f"SELECT {id_column}, instance_id, readable_id, geometry FROM street_segments "
+        f"WHERE city = ? AND name = ? ORDER BY {id_column}",
+        (city, name)
+    ).fetchall()
+
+    stored_ids = {row[0] for row in rows}
+    unknown = set(changed_segments) - stored_ids
+    if unknown:
+        raise ValueError(f"Segments {sorted(unknown)} are not stored for {name} in {city}")
+
+    segments = []
+    for segment_id, _, _, geometry in rows:
+        if segment_id in changed_segments:
+            segments.append(changed_segments[segment_id])
+        else:
+            segments.append(json_backend.loads(geometry)['coordinates'])
+    segments.extend(new_segments)
+
+    # Same clustering (and highway merge) as add_instance_ids.py
+    components = cluster_street(name, segments, GRID_SIZE)
+
+    def stored_order(component):
+        stored = [rows[seg_idx][1] for seg_idx in component if seg_idx < len(rows)]
+        return (0, min(stored)) if stored else (1, 0)
+
+    components.sort(key=stored_order)
+    instance_of = {}
+    for instance_num, component in enumerate(components, start=1):
+        for seg_idx in component:
+            instance_of[seg_idx] = instance_num
+
+    prefix = readable_prefix(city, name, (row[2] for row in rows))
+
+    updates = []
+    for seg_idx, (segment_id, instance_id, readable_id, _) in enumerate(rows):
+        instance_num = instance_of[seg_idx]
+        update = {
+            'id': segment_id,
+            'instance_id': instance_num - 1,
+            'readable_id': readable_id_for(prefix, name, instance_num)
+        }
+        if segment_id in changed_segments:
+            coords = changed_segments[segment_id]
+            update['geometry'] = json_backend.dumps_str({'type': 'LineString', 'coordinates': coords})
+            update['bbox'] = _bounding_box(coords)
+        elif (instance_id, readable_id) == (update['instance_id'], update['readable_id']):
+            continue
+        updates.append(update)
+
+    base_name, street_type = parse_street_name(name)
+    inserts = []
+    for seg_idx, coords in enumerate(new_segments, start=len(rows)):
+        instance_num = instance_of[seg_idx]
+        inserts.append({
+            'city': city,
+            'name': name,
+            'base_name': base_name,
+            'street_type': street_type,
+            'instance_id': instance_num - 1,
+            'readable_id': readable_id_for(prefix, name, instance_num),
+            'geometry': json_backend.dumps_str({'type': 'LineString', 'coordinates': coords}),
+            'bbox': _bounding_box(coords)
+        })
+
+    return {
+        'id_column': id_column,
+        'updates': updates,
+        'inserts': inserts,
+        'total_instances': len(components)
+    }
+
+
+def _sql_literal(value):
+    """Render a Python value as a SQL literal."""
+    if isinstance(value, str):
+        return f"'{escape_sql_string(value)}'"
+    return str(value)
+
+
+def _update_assignments(update):
+    """(column, value) pairs for an update row."""
+    assignments = [('instance_id', update['instance_id']), ('readable_id', update['readable_id'])]
+    if 'geometry' in update:
+        min_lat, max_lat, min_lng, max_lng = update['bbox']
+        assignments += [('geometry', update['geometry']), ('min_lat', min_lat), ('max_lat', max_lat),
+                        ('min_lng', min_lng), ('max_lng', max_lng)]
+    return assignments
+
+
+def _insert_values(row):
+    """(column, value) pairs for an insert row, in generate_sql_batches.py column order."""
+    min_lat, max_lat, min_lng, max_lng = row['bbox']
+    return [
+        ('city', row['city']), ('name', row['name']), ('base_name', row['base_name']),
+        ('street_type', row['street_type']), ('instance_id', row['instance_id']),
+        ('readable_id', row['readable_id']), ('geometry', row['geometry']),
+        ('min_lat', min_lat), ('max_lat', max_lat), ('min_lng', min_lng), ('max_lng', max_lng)
+    ]
+
+
+def patch_to_sql(patch):
+    """
+    Render a recluster_street() patch as SQL statements for wrangler d1 execute.
+
+    Inserts leave the primary key to the database, like generate_sql_batches.py,
+    so new rows sort after the stored ones.
+
+    Returns:
+        List of SQL statement strings
+    """
+    id_column = patch['id_column']
+    statements = []
+
+    for update in patch['updates']:
+        assignments = ', '.join(f"{column} = {_sql_literal(value)}"
+                                for column, value in _update_assignments(update))
+        statements.append(f"UPDATE street_segments SET {assignments} WHERE {id_column} = {update['id']};")
+
+    for row in patch['inserts']:
+        values = _insert_values(row)
+        columns = ', '.join(column for column, _ in values)
+        literals = ', '.join(_sql_literal(value) for _, value in values)
+        statements.append(f"INSERT INTO street_segments ({columns}) VALUES ({literals});")
+
+    return statements
+
+
+def apply_patch(conn, patch):
+    """Apply a recluster_street() patch to a local SQLite database and commit."""
+    id_column = patch['id_column']
+
+    for update in patch['updates']:
+        assignments = _update_assignments(update)
+        conn.execute(
+            f"UPDATE street_segments SET {', '.join(f'{column} = ?' for column, _ in assignments)} "
+            f"WHERE {id_column} = ?",
+            [value for _, value in assignments] + [update['id']]
+        )
+
+    for row in patch['inserts']:
+        values = _insert_values(row)
+        conn.execute(
+            f"INSERT INTO street_segments ({', '.join(column for column, _ in values)}) "
+            f"VALUES ({', '.join('?' for _ in values)})",
+            [value for _, value in values]
+        )
+
+    conn.commit()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sqlite3
+
+    parser = argparse.ArgumentParser(description='Re-cluster one street and emit the SQL patch')
+    parser.add_argument('db', help='SQLite database with a street_segments table')
+    parser.add_argument('city', help='City column value (e.g. canberra)')
+    parser.add_argument('name', help='Street name')
+    parser.add_argument('--add', help='GeoJSON file with LineString features to add to this street')
+    parser.add_argument('--output', help='Write SQL here instead of stdout')
+    parser.add_argument('--apply', action='store_true', help='Also apply the patch to the database')
+
+    args = parser.parse_args()
+
+    new_segments = []
+    if args.add:
+        new_segments = [feature['geometry']['coordinates']
+                        for feature in json_backend.load(args.add)['features']]
+
+    conn = sqlite3.connect(args.db)
+    start_time = time.time()
+    patch = recluster_street(conn, args.city, args.name, new_segments)
+    elapsed_ms = (time.time() - start_time) * 1000
+
+    statements = patch_to_sql(patch)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write('\n'.join(statements))
+            f.write('\n')
+    else:
+        print('\n'.join(statements))
+
+    if args.apply:
+        apply_patch(conn, patch)
+    conn.close()
+
+    print(f"-- {args.name}: {patch['total_instances']} instance(s), {len(patch['updates'])} update(s), "
+          f"{len(patch['inserts'])} insert(s) in {elapsed_ms:.1f} ms", file=sys.stderr)
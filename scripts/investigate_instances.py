@@ -3,26 +3,35 @@
 Investigate specific street instances to understand clustering decisions.
 """
 
-import json
+import os
 import sys
 
+from geojson_io import iter_features
+
 def investigate_instances(geojson_file, street_name, instance_ids):
     """
     Show details about specific instances of a street.
 
     Args:
-        geojson_file: Path to GeoJSON with instance IDs
+        geojson_file: Path to GeoJSON with instance IDs, or its city store or
+            GeoParquet file
         street_name: Name of street to investigate
         instance_ids: List of instance IDs to examine
     """
     print(f"Loading {geojson_file}...")
-    with open(geojson_file, 'r') as f:
-        data = json.load(f)
-
-    features = data['features']
 
-    # Find segments for this street
-    street_features = [f for f in features if f['properties'].get('name') == street_name]
+    # Find segments for this street: straight from the name column of a
+    # city store, from the matching row groups of a GeoParquet file,
+    # otherwise streaming past the rest of the GeoJSON
+    if os.path.isdir(geojson_file):
+        from city_store import iter_street_features
+        street_features = list(iter_street_features(geojson_file, street_name))
+    elif geojson_file.lower().endswith('.parquet'):
+        from geoparquet_io import iter_parquet_features
+        street_features = list(iter_parquet_features(geojson_file, street_name))
+    else:
+        street_features = [f for f in iter_features(geojson_file)
+                           if f['properties'].get('name') == street_name]
 
     if not street_features:
         print(f"No features found for '{street_name}'")
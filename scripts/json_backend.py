@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Pluggable JSON serialization for the data pipeline.
+
+Uses orjson or msgspec when installed and falls back to the standard library
+json module. All backends produce plain UTF-8 JSON that the web app's
+loadData path (fetch(...).json()) and json.load() read back to the same
+values; output is compact unless an indent is requested.
+
+Paths ending in .gz or .zst are (de)compressed by extension (see
+compressed_io.py).
+
+The backend can be forced with the STREETS_JSON_BACKEND environment variable
+(orjson, msgspec or json).
+"""
+
+import json
+import os
+import tempfile
+
+from compressed_io import compression_for, open_binary, resolve_path, wrap_binary
+
+# Preference order when STREETS_JSON_BACKEND is not set
+BACKEND_PREFERENCE = ['orjson', 'msgspec', 'json']
+
+
+def _stdlib_backend():
+    def dumps(obj, indent=None):
+        if indent is None:
+            return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+        return json.dumps(obj, indent=indent).encode('utf-8')
+
+    return json.loads, dumps
+
+
+def _orjson_backend():
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj, indent=None):
+        # orjson only indents by two spaces
+        return orjson.dumps(obj, option=options | (orjson.OPT_INDENT_2 if indent else 0))
+
+    return orjson.loads, dumps
+
+
+def _msgspec_backend():
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj, indent=None):
+        encoded = encoder.encode(obj)
+        return msgspec.json.format(encoded, indent=indent) if indent else encoded
+
+    return decoder.decode, dumps
+
+
+_BACKENDS = {
+    'orjson': _orjson_backend,
+    'msgspec': _msgspec_backend,
+    'json': _stdlib_backend,
+}
+
+
+def available_backends():
+    """Names of the backends that can be imported here, in preference order."""
+    names = []
+    for name in BACKEND_PREFERENCE:
+        try:
+            _BACKENDS[name]()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend(name=None):
+    """
+    Resolve a backend to (name, loads, dumps).
+
+    Args:
+        name: 'orjson', 'msgspec', 'json' or None for the first installed one
+
+    Returns:
+        (name, loads, dumps) where loads accepts bytes or str and
+        dumps(obj, indent=None) returns UTF-8 bytes
+    """
+    if name is not None:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown JSON backend {name!r}; choose from {BACKEND_PREFERENCE}")
+        return (name,) + _BACKENDS[name]()
+
+    for candidate in BACKEND_PREFERENCE:
+        try:
+            return (candidate,) + _BACKENDS[candidate]()
+        except ImportError:
+            continue
+
+
+def decode_errors(name):
+    """
+    Exception classes a backend's loads raises on malformed JSON.
+
+    json and orjson raise JSONDecodeError, a ValueError; msgspec raises
+    msgspec.DecodeError, which not every msgspec release derives from
+    ValueError.
+    """
+    if name == 'msgspec':
+        import msgspec
+        return (ValueError, msgspec.DecodeError)
+    return (ValueError,)
+
+
+BACKEND, _loads, _dumps = get_backend(os.environ.get('STREETS_JSON_BACKEND') or None)
+
+# For except clauses around loads(): except json_backend.DecodeError
+DecodeError = decode_errors(BACKEND)
+
+
+def loads(data):
+    """Parse JSON from bytes or str."""
+    return _loads(data)
+
+
+def dumps(obj, indent=None):
+    """Serialize to UTF-8 JSON bytes (compact unless indent is given)."""
+    return _dumps(obj, indent)
+
+
+def dumps_str(obj):
+    """Serialize to a compact JSON str (e.g. for embedding in SQL)."""
+    return _dumps(obj, None).decode('utf-8')
+
+
+def load(path):
+    """Read and parse a JSON file (or its .gz/.zst sibling if path is missing)."""
+    with open_binary(resolve_path(path), 'rb') as f:
+        return _loads(f.read())
+
+
+def dump(obj, path, indent=None):
+    """
+    Write obj to a JSON file.
+
+    The file is written to a temporary sibling and renamed over path, so an
+    interrupted run leaves any previous file in place (as with
+    geojson_io.FeatureCollectionWriter).
+
+    Args:
+        obj: JSON-serializable object
+        path: Output file path; .gz/.zst are compressed
+        indent: None for compact output, or an indent for human-readable
+            reports
+
+    Returns:
+        Size of the written file in bytes
+    """
+    data = _dumps(obj, indent)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        # mkstemp creates 0600 files; give the output open()'s usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+
+        with wrap_binary(os.fdopen(fd, 'wb'), 'wb', compression_for(path)) as f:
+            f.write(data)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return size
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Single-linkage forests for sweeping distance thresholds.
+
+Point-to-Point joins two segments when some distance between them is within
+a threshold, so its instances at threshold t are the connected components of
+the "distance <= t" graph. Those components are exactly what remains of the
+graph's minimum spanning forest after cutting every edge longer than t.
+Building the forest once per street therefore gives the instance count for
+any threshold with a binary search:
+
+    count(t) = n_segments - (number of forest edges with weight <= t)
+
+Polygon Buffer intersects buffer polygons, whose corners and caps are only
+approximately round, so it is not a pure distance threshold;
+buffer_instance_counts() re-buffers at each threshold, testing only the
+pairs the line distance allows.
+
+Requires numpy and scipy; Polygon Buffer also needs shapely.
+"""
+
+from collections import defaultdict
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components, minimum_spanning_tree
+from scipy.spatial import cKDTree
+
+from geo_kernels import chord_radius, haversine, min_distance_per_pair, unit_sphere_xyz
+
+# Thresholds swept by compare_methods (meters)
+SWEEP_THRESHOLDS = list(range(10, 310, 10)) + list(range(350, 1050, 50))
+
+
+def sample_coords(coords, max_points=20):
+    """Same vertex sampling as compare_methods.method1_point_to_point."""
+    if len(coords) <= max_points:
+        return coords
+    sampled = [coords[0], coords[-1]]
+    step = max(1, len(coords) // (max_points - 2))
+    for i in range(step, len(coords) - 1, step):
+        sampled.append(coords[i])
+    return sampled
+
+
+def local_meters_projection(segments):
+    """
+    Equirectangular projection to meters centred on a street's own vertices.
+
+    Scales longitude by the cosine of the street's mean latitude, which keeps
+    distances within a fraction of a percent of haversine at street scale in
+    any city (a fixed lng * 93000 is only right near Sydney's latitude).
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+
+    Returns:
+        Function mapping an (n, 2) [lng, lat] array to (n, 2) meters
+    """
+    points = [c[:2] for coords in segments for c in coords]
+    if points:
+        origin = np.asarray(points, dtype=np.float64).mean(axis=0)
+    else:
+        origin = np.zeros(2)
+    scale = np.array([111000 * np.cos(np.radians(origin[1])), 111000])
+
+    def to_meters(lng_lat):
+        return (lng_lat - origin) * scale
+
+    return to_meters
+
+
+def fixed_meters_projection(lng_lat):
+    """
+    The old fixed lng * 93000, lat * 111000 projection, kept as an opt-in
+    compatibility mode for reproducing earlier comparison results.
+
+    Only right near Sydney's latitude; use local_meters_projection() otherwise.
+
+    Args:
+        lng_lat: (n, 2) array of [lng, lat]
+
+    Returns:
+        (n, 2) array of meters
+    """
+    return lng_lat * np.array([93000.0, 111000.0])
+
+
+def projected_linestrings(segments, to_meters):
+    """
+    Build one shapely LineString per segment with a single vectorized call.
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+        to_meters: Function mapping an (n, 2) [lng, lat] array to meters
+
+    Returns:
+        Object array of LineStrings, None for segments with fewer than 2 points
+    """
+    import shapely
+
+    lines = np.full(len(segments), None, dtype=object)
+    valid = [i for i, coords in enumerate(segments) if len(coords) >= 2]
+    if not valid:
+        return lines
+
+    points = np.array([c[:2] for i in valid for c in segments[i]], dtype=np.float64)
+    indices = np.repeat(np.arange(len(valid)), [len(segments[i]) for i in valid])
+    lines[valid] = shapely.linestrings(to_meters(points), indices=indices)
+    return lines
+
+
+def point_distance_pairs(segments, max_distance, max_points=20):
+    """
+    Segment pairs whose sampled vertices come within max_distance meters.
+
+    Candidate vertex pairs come from a KD-tree over sphere-projected points
+    (chord <= arc, so no pair is missed) and are then measured with haversine,
+    matching method1_point_to_point's distance exactly.
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+        max_distance: Largest threshold of interest in meters
+        max_points: Vertex sampling limit per segment
+
+    Returns:
+        (seg_i, seg_j, dist) arrays with seg_i < seg_j and the minimum sampled
+        point-to-point distance of each pair
+    """
+    sampled = [sample_coords(coords, max_points) for coords in segments]
+    point_segment = np.repeat(np.arange(len(segments)), [len(s) for s in sampled])
+    points = np.array([c[:2] for s in sampled for c in s], dtype=np.float64).reshape(-1, 2)
+
+    empty = np.empty(0, dtype=np.int64)
+    if len(points) < 2:
+        return empty, empty, np.empty(0)
+
+    tree = cKDTree(unit_sphere_xyz(points[:, 0], points[:, 1]))
+    candidates = tree.query_pairs(chord_radius(max_distance), output_type='ndarray')
+    if len(candidates) == 0:
+        return empty, empty, np.empty(0)
+
+    a, b = candidates[:, 0], candidates[:, 1]
+    dists = haversine(points[a, 0], points[a, 1], points[b, 0], points[b, 1])
+    within = dists <= max_distance
+
+    return min_distance_per_pair(point_segment[a][within], point_segment[b][within], dists[within])
+
+
+def line_distance_pairs(segments, max_distance, to_meters):
+    """
+    Segment pairs whose projected lines come within max_distance meters.
+
+    Buffer polygons lie inside the exact buffers, so two buffers of radius r
+    can only intersect when their lines are within 2r.
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+        max_distance: Largest line-to-line distance of interest in meters
+        to_meters: Function mapping an (n, 2) [lng, lat] array to meters
+
+    Returns:
+        (seg_i, seg_j, dist) arrays with seg_i < seg_j
+    """
+    import shapely
+
+    lines = projected_linestrings(segments, to_meters)
+    tree = shapely.STRtree(lines)
+    seg_a, seg_b = tree.query(lines, predicate='dwithin', distance=max_distance)
+    keep = seg_a < seg_b
+    seg_a, seg_b = seg_a[keep], seg_b[keep]
+    dists = shapely.distance(lines[seg_a], lines[seg_b])
+
+    return seg_a.astype(np.int64), seg_b.astype(np.int64), dists
+
+
+def buffer_instance_counts(segments, thresholds, to_meters):
+    """
+    method4_polygon_buffer instance counts at each buffer distance.
+
+    Buffers each segment with shapely's default quadrant segments, as
+    method4 does, and unions the pairs whose polygons intersect. Only pairs
+    whose lines are within twice the buffer distance are tested.
+
+    Args:
+        segments: List of coordinate arrays [[lng, lat], ...]
+        thresholds: Iterable of buffer distances in meters
+        to_meters: Function mapping an (n, 2) [lng, lat] array to meters
+
+    Returns:
+        List of instance counts, one per threshold
+    """
+    import shapely
+
+    thresholds = list(thresholds)
+    n = len(segments)
+    lines = projected_linestrings(segments, to_meters)
+    seg_i, seg_j, dists = line_distance_pairs(segments, 2 * max(thresholds), to_meters)
+
+    counts = []
+    for threshold in thresholds:
+        near = dists <= 2 * threshold
+        pair_i, pair_j = seg_i[near], seg_j[near]
+        buffers = np.full(n, None, dtype=object)
+        involved = np.union1d(pair_i, pair_j)
+        buffers[involved] = shapely.buffer(lines[involved], threshold)
+        hit = shapely.intersects(buffers[pair_i], buffers[pair_j])
+
+        graph = coo_matrix((np.ones(int(hit.sum()), dtype=np.int8), (pair_i[hit], pair_j[hit])), shape=(n, n))
+        counts.append(int(connected_components(graph, directed=False)[0]))
+    return counts
+
+
+def components_from_pairs(n, seg_i, seg_j):
+    """
+    Union connected segment pairs in bulk.
+
+    Args:
+        n: Number of segments
+        seg_i, seg_j: Arrays of connected segment index pairs
+
+    Returns:
+        List of component groups, ordered by their first segment like the
+        union-find loops in compare_methods
+    """
+    graph = coo_matrix((np.ones(len(seg_i), dtype=np.int8), (seg_i, seg_j)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+
+    components = defaultdict(list)
+    for seg_idx, label in enumerate(labels.tolist()):
+        components[label].append(seg_idx)
+
+    return list(components.values())
+
+
+def build_linkage_forest(n, seg_i, seg_j, dists):
+    """
+    Minimum spanning forest of a street's segment distance graph.
+
+    Args:
+        n: Number of segments
+        seg_i, seg_j, dists: Edge arrays from a *_distance_pairs function
+
+    Returns:
+        (forest_i, forest_j, forest_dist) sorted by distance
+    """
+    if len(dists) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0)
+
+    # csgraph treats zero weights as missing edges; touching segments get the
+    # smallest positive float instead, which still sorts below any threshold
+    weights = np.where(dists > 0, dists, np.finfo(np.float64).tiny)
+    graph = coo_matrix((weights, (seg_i, seg_j)), shape=(n, n)).tocsr()
+    forest = minimum_spanning_tree(graph).tocoo()
+
+    order = np.argsort(forest.data, kind='stable')
+    return forest.row[order].astype(np.int64), forest.col[order].astype(np.int64), forest.data[order]
+
+
+def count_instances_at(forest, n, thresholds):
+    """
+    Instance count at each threshold from a forest.
+
+    Args:
+        forest: Output of build_linkage_forest()
+        n: Number of segments
+        thresholds: Iterable of distance thresholds
+
+    Returns:
+        List of instance counts, one per threshold
+    """
+    forest_dist = forest[2]
+    joined = np.searchsorted(forest_dist, np.asarray(thresholds, dtype=np.float64), side='right')
+    return (n - joined).tolist()
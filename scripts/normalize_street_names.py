@@ -4,9 +4,10 @@ Normalize street name capitalization in GeoJSON files.
 Fixes case variations like "KIng" vs "King" or "BottleBrush" vs "Bottlebrush"
 """
 
-import json
 import sys
 
+from geojson_io import iter_features, write_feature_collection
+
 def normalize_name(name):
     """
     Normalize street name capitalization.
@@ -95,27 +96,28 @@ def normalize_name(name):
 def normalize_geojson(input_file, output_file):
     """Normalize street names in a GeoJSON file"""
 
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    features = data['features']
-    print(f"Processing {len(features)} features...")
-
     # Track changes
     changes = {}
     unchanged = 0
 
-    for feature in features:
-        name = feature['properties'].get('name', '')
-        if name:
-            normalized = normalize_name(name)
-            if normalized != name:
-                if name not in changes:
-                    changes[name] = normalized
-                feature['properties']['name'] = normalized
-            else:
-                unchanged += 1
+    def normalized_features():
+        """Stream input features with normalized names."""
+        nonlocal unchanged
+        for feature in iter_features(input_file):
+            name = feature['properties'].get('name', '')
+            if name:
+                normalized = normalize_name(name)
+                if normalized != name:
+                    if name not in changes:
+                        changes[name] = normalized
+                    feature['properties']['name'] = normalized
+                else:
+                    unchanged += 1
+            yield feature
+
+    print(f"Normalizing {input_file} -> {output_file}...")
+    count = write_feature_collection(output_file, normalized_features())
+    print(f"Processed {count} features")
 
     print(f"\n=== Changes ===")
     print(f"Changed: {len(changes)} unique names")
@@ -126,10 +128,6 @@ def normalize_geojson(input_file, output_file):
         for old, new in sorted(changes.items())[:30]:
             print(f"  '{old}' -> '{new}'")
 
-    print(f"\nSaving to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(data, f)
-
     print("Done!")
 
 if __name__ == '__main__':
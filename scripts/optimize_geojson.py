@@ -7,9 +7,10 @@ Optimize GeoJSON file for web delivery by:
 4. Optional: Filter to named streets only
 """
 
-import json
 import sys
 
+from geojson_io import iter_features, write_feature_collection
+
 def simplify_coordinates(coords, precision=5):
     """Round coordinates to specified decimal places."""
     return [[round(lng, precision), round(lat, precision)] for lng, lat in coords]
@@ -24,50 +25,39 @@ def optimize_geojson(input_file, output_file, named_only=True, precision=5):
         named_only: Only include streets with names (default True)
         precision: Decimal places for coordinates (default 5 = ~1m)
     """
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    original_count = len(data['features'])
-    print(f"Original features: {original_count:,}")
-
-    # Keep only necessary properties
-    optimized_features = []
-    for feature in data['features']:
-        name = feature['properties'].get('name', '')
-
-        # Skip unnamed streets if named_only=True
-        if named_only and not name:
-            continue
-
-        # Create optimized feature with minimal properties
-        optimized = {
-            'type': 'Feature',
-            'geometry': {
-                'type': feature['geometry']['type'],
-                'coordinates': simplify_coordinates(
-                    feature['geometry']['coordinates'],
-                    precision
-                )
-            },
-            'properties': {
-                'name': name,
-                'highway': feature['properties'].get('highway', '')
+    original_count = 0
+
+    def optimized_features():
+        """Stream input features reduced to minimal properties."""
+        nonlocal original_count
+        for feature in iter_features(input_file):
+            original_count += 1
+            name = feature['properties'].get('name', '')
+
+            # Skip unnamed streets if named_only=True
+            if named_only and not name:
+                continue
+
+            # Create optimized feature with minimal properties
+            yield {
+                'type': 'Feature',
+                'geometry': {
+                    'type': feature['geometry']['type'],
+                    'coordinates': simplify_coordinates(
+                        feature['geometry']['coordinates'],
+                        precision
+                    )
+                },
+                'properties': {
+                    'name': name,
+                    'highway': feature['properties'].get('highway', '')
+                }
             }
-        }
-
-        optimized_features.append(optimized)
 
-    # Create optimized GeoJSON
-    optimized_data = {
-        'type': 'FeatureCollection',
-        'features': optimized_features
-    }
-
-    # Save optimized file
-    print(f"Saving to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(optimized_data, f, separators=(',', ':'))  # Compact JSON
+    # Stream optimized features to the output file (compact JSON)
+    print(f"Optimizing {input_file} -> {output_file}...")
+    optimized_count = write_feature_collection(output_file, optimized_features(), separators=(',', ':'))
+    print(f"Original features: {original_count:,}")
 
     # Report statistics
     import os
@@ -76,7 +66,7 @@ def optimize_geojson(input_file, output_file, named_only=True, precision=5):
     reduction = (1 - optimized_size / original_size) * 100
 
     print(f"\n=== Results ===")
-    print(f"Features: {original_count:,} → {len(optimized_features):,} ({len(optimized_features)/original_count*100:.1f}%)")
+    print(f"Features: {original_count:,} → {optimized_count:,} ({optimized_count/original_count*100:.1f}%)")
     print(f"File size: {original_size:.1f}MB → {optimized_size:.1f}MB ({reduction:.1f}% reduction)")
     print(f"Coordinate precision: {precision} decimals (~{10**(5-precision)}m accuracy)")
 
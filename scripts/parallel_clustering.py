@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Process-pool execution of per-street Grid 200m clustering.
+
+Street names are clustered independently, so they are split into chunks
+balanced by segment count (large highways would otherwise straggle) and
+clustered in a ProcessPoolExecutor. Results are merged back by name code, so
+output ordering and instance numbering do not depend on which worker
+finished first.
+
+The city's coordinates, segment offsets and name-grouped segment order are
+placed in multiprocessing.shared_memory buffers once. Workers attach to them
+at startup, receive only (name_code, start, stop) work items and send back
+compact per-segment label arrays, so no GeoJSON is pickled either way.
+"""
+
+import heapq
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from city_arrays import name_ranges
+from grid_engine import cluster_street
+
+# More chunks than workers lets fast workers pick up the slack
+CHUNKS_PER_WORKER = 4
+
+# Worker-side views onto the shared buffers, set up by _init_worker
+_worker_state = {}
+
+
+def chunk_names_by_weight(weights, n_chunks):
+    """
+    Split names into chunks with roughly equal total weight.
+
+    Greedy longest-processing-time assignment: heaviest names first, each to
+    the currently lightest chunk.
+
+    Args:
+        weights: Dict mapping name -> weight (e.g. segment count)
+        n_chunks: Number of chunks to produce
+
+    Returns:
+        List of non-empty lists of names
+    """
+    n_chunks = max(1, min(n_chunks, len(weights)))
+    heap = [(0, chunk_idx) for chunk_idx in range(n_chunks)]
+    chunks = [[] for _ in range(n_chunks)]
+
+    for name in sorted(weights, key=lambda n: (-weights[n], n)):
+        load, chunk_idx = heapq.heappop(heap)
+        chunks[chunk_idx].append(name)
+        heapq.heappush(heap, (load + max(weights[name], 1), chunk_idx))
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def _to_shared(array):
+    """Copy an array into a new shared memory block; returns (block, spec)."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach_shared(spec):
+    """Attach to a shared memory block created by _to_shared()."""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _peak_rss_mb():
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _init_worker(coords_spec, offsets_spec, order_spec, names, grid_size):
+    """Worker initializer: attach to the shared arrays once per process."""
+    blocks = []
+    for key, spec in (('coords', coords_spec), ('offsets', offsets_spec), ('order', order_spec)):
+        block, array = _attach_shared(spec)
+        blocks.append(block)
+        _worker_state[key] = array
+
+    _worker_state['blocks'] = blocks
+    _worker_state['names'] = names
+    _worker_state['grid_size'] = grid_size
+
+
+def _cluster_work_items(work_items):
+    """
+    Worker entry point: cluster a chunk of (name_code, start, stop) items.
+
+    Returns:
+        (results, pid, peak_rss_mb) where results is a list of
+        (name_code, start, labels, n_instances) and labels holds the 0-based
+        instance number of each segment in segment_order[start:stop]
+    """
+    coords = _worker_state['coords']
+    offsets = _worker_state['offsets']
+    order = _worker_state['order']
+    names = _worker_state['names']
+    grid_size = _worker_state['grid_size']
+
+    results = []
+    for name_code, start, stop in work_items:
+        segment_ids = order[start:stop]
+        segments = [coords[offsets[seg]:offsets[seg + 1]].tolist() for seg in segment_ids]
+
+        components = cluster_street(names[name_code], segments, grid_size)
+
+        labels = np.empty(stop - start, dtype=np.int32)
+        for instance_idx, component in enumerate(components):
+            labels[component] = instance_idx
+        results.append((name_code, start, labels, len(components)))
+
+    return results, os.getpid(), _peak_rss_mb()
+
+
+def cluster_city_parallel(arrays, grid_size, workers):
+    """
+    Cluster every street of a city across a pool of worker processes.
+
+    Args:
+        arrays: Output of city_arrays.load_city_arrays()
+        grid_size: Grid cell size in degrees
+        workers: Number of worker processes
+
+    Returns:
+        (instance_ids, instance_counts), with the same meaning as
+        grid_numpy.cluster_city_grid()
+    """
+    names = arrays['names']
+    segment_order, ranges = name_ranges(arrays)
+
+    instance_ids = np.full(len(arrays['name_codes']), -1, dtype=np.int64)
+    instance_counts = np.zeros(len(names), dtype=np.int64)
+    if not ranges:
+        return instance_ids, instance_counts
+
+    ranges_by_code = {name_code: (start, stop) for name_code, start, stop in ranges}
+    weights = {name_code: stop - start for name_code, start, stop in ranges}
+    chunks = [
+        [(name_code,) + ranges_by_code[name_code] for name_code in chunk]
+        for chunk in chunk_names_by_weight(weights, workers * CHUNKS_PER_WORKER)
+    ]
+
+    blocks = []
+    try:
+        specs = []
+        for array in (np.ascontiguousarray(arrays['coords']),
+                      np.ascontiguousarray(arrays['offsets']),
+                      segment_order):
+            block, spec = _to_shared(array)
+            blocks.append(block)
+            specs.append(spec)
+
+        peak_rss = {}
+        processed = 0
+        start_time = time.time()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(*specs, names, grid_size)) as executor:
+            futures = [executor.submit(_cluster_work_items, chunk) for chunk in chunks]
+
+            for future in as_completed(futures):
+                results, pid, rss_mb = future.result()
+                peak_rss[pid] = max(peak_rss.get(pid, 0), rss_mb)
+
+                for name_code, start, labels, n_instances in results:
+                    instance_ids[segment_order[start:start + len(labels)]] = labels
+                    instance_counts[name_code] = n_instances
+
+                processed += len(results)
+                elapsed = time.time() - start_time
+                print(f"Processed {processed}/{len(ranges)} streets ({elapsed:.1f}s elapsed)")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    print(f"Peak RSS: parent {_peak_rss_mb():.0f} MB")
+    for worker_idx, pid in enumerate(sorted(peak_rss), start=1):
+        print(f"  worker {worker_idx} (pid {pid}): {peak_rss[pid]:.0f} MB")
+
+    return instance_ids, instance_counts
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Parallel chunked parsing of large GeoJSON FeatureCollections.
+
+One sequential pass over the raw bytes locates the `features` array and, near
+evenly spaced byte offsets, the start of the next feature (the `},{"type":
+"Feature"` boundary every writer in this pipeline produces). Each byte range
+is then a complete run of features that a worker parses on its own with the
+json_backend parser, wrapped in `[` ... `]`. Ranges are returned in file
+order, so the result is identical to a serial parse. The boundary pattern
+contains unescaped quotes, so it can never match inside a JSON string; a
+match inside a nested object would leave a range unbalanced, which fails to
+parse and falls back to the serial parser.
+
+Workers either send back the feature dicts (load_features_parallel) or, much
+cheaper to transfer, the columnar arrays of city_arrays.load_city_arrays()
+for their range, which are concatenated with name codes remapped to the
+city-wide first-seen order (load_arrays_parallel).
+
+Plain files are memory-mapped and workers read their own byte range, so no
+input is pickled; .gz/.zst files are decompressed once in the parent and the
+ranges are sent to the workers. If the file cannot be split safely (features
+written with another key first, or members after the features array) the
+loaders fall back to the serial streaming parser.
+"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import json_backend
+from compressed_io import compression_for, open_binary, resolve_path
+
+# More ranges than workers lets fast workers pick up the slack
+CHUNKS_PER_WORKER = 4
+
+# Files smaller than this are parsed serially; pool startup would dominate
+MIN_PARALLEL_BYTES = 4 << 20
+
+_FEATURES_START = re.compile(rb'"features"\s*:\s*\[')
+# End of one feature and start of the next one; group 1 is the next feature
+_FEATURE_BOUNDARY = re.compile(rb'\}\s*,\s*(\{\s*"type"\s*:\s*"Feature"\s*[,}])')
+_COLLECTION_END = re.compile(rb'\]\s*\}\s*$')
+
+
+def feature_ranges(data, n_chunks):
+    """
+    Split the features array of a FeatureCollection into byte ranges.
+
+    Args:
+        data: File contents (bytes or mmap)
+        n_chunks: Desired number of ranges
+
+    Returns:
+        List of (start, stop) byte ranges in file order, each holding one or
+        more comma-separated features, or None if the array cannot be
+        located safely (the caller should parse serially)
+    """
+    match = _FEATURES_START.search(data)
+    if match is None:
+        return None
+    array_start = match.end()
+
+    # The features array must close the collection
+    array_stop = data.rfind(b']')
+    if array_stop < array_start or _COLLECTION_END.match(data, array_stop) is None:
+        return None
+    if not data[array_start:array_stop].strip():
+        return []
+
+    step = max(1, (array_stop - array_start) // max(n_chunks, 1))
+    ranges = []
+    start = array_start
+    while True:
+        boundary = _FEATURE_BOUNDARY.search(data, max(start, array_start + step * (len(ranges) + 1)),
+                                            array_stop)
+        if boundary is None:
+            ranges.append((start, array_stop))
+            return ranges
+        # The separating comma belongs to neither range
+        ranges.append((start, boundary.start() + 1))
+        start = boundary.start(1)
+
+
+def _range_bytes(source, start, stop):
+    """Bytes of one range: source is a file path (read it) or the bytes themselves."""
+    if isinstance(source, bytes):
+        return source
+    with open(source, 'rb') as f:
+        f.seek(start)
+        return f.read(stop - start)
+
+
+def _parse_range(source, start, stop):
+    """Worker: parse one range into a list of features."""
+    return json_backend.loads(b'[' + _range_bytes(source, start, stop) + b']')
+
+
+def _parse_range_arrays(source, start, stop):
+    """Worker: parse one range straight into city arrays."""
+    from city_arrays import load_city_arrays
+    return load_city_arrays(_parse_range(source, start, stop))
+
+
+def _map_ranges(path, workers, worker_fn):
+    """
+    Run worker_fn over the feature ranges of path in a process pool.
+
+    Returns:
+        List of worker results in file order, or None to parse serially
+    """
+    path = resolve_path(path)
+    if workers <= 1 or os.path.isdir(path):
+        return None
+
+    if compression_for(path):
+        with open_binary(path, 'rb') as f:
+            data = f.read()
+    else:
+        if os.path.getsize(path) < MIN_PARALLEL_BYTES:
+            return None
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        if len(data) < MIN_PARALLEL_BYTES:
+            return None
+        ranges = feature_ranges(data, workers * CHUNKS_PER_WORKER)
+        if ranges is None or len(ranges) < 2:
+            return None
+
+        # Plain files: workers read their own range; compressed: send the bytes
+        if isinstance(data, bytes):
+            tasks = [(data[start:stop], start, stop) for start, stop in ranges]
+        else:
+            tasks = [(path, start, stop) for start, stop in ranges]
+
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(worker_fn, *zip(*tasks)))
+        except json_backend.DecodeError:
+            # A boundary matched inside a nested object; parse serially
+            return None
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def load_features_parallel(path, workers):
+    """
+    Parse every feature of a GeoJSON file using a process pool.
+
+    Args:
+        path: GeoJSON file (optionally .gz/.zst) or city store directory
+        workers: Number of worker processes; 1 parses serially
+
+    Returns:
+        List of feature dicts in file order
+    """
+    parts = _map_ranges(path, workers, _parse_range)
+    if parts is None:
+        from geojson_io import iter_features
+        return list(iter_features(path))
+
+    features = []
+    for part in parts:
+        features.extend(part)
+    return features
+
+
+def merge_city_arrays(parts):
+    """
+    Concatenate city arrays of consecutive feature ranges.
+
+    Args:
+        parts: load_city_arrays() results, in feature order
+
+    Returns:
+        dict equal to load_city_arrays() over all the features
+    """
+    import numpy as np
+
+    name_to_code = {}
+    name_codes = []
+    offsets = [np.zeros(1, dtype=np.int64)]
+    vertex_base = 0
+    for part in parts:
+        # Index -1 (unnamed) picks the trailing -1
+        remap = np.array([name_to_code.setdefault(name, len(name_to_code)) for name in part['names']] + [-1],
+                         dtype=np.int32)
+        name_codes.append(remap[part['name_codes']])
+        offsets.append(part['offsets'][1:] + vertex_base)
+        vertex_base += int(part['offsets'][-1])
+
+    return {
+        'coords': np.concatenate([part['coords'] for part in parts]) if parts else np.zeros((0, 2)),
+        'offsets': np.concatenate(offsets),
+        'name_codes': np.concatenate(name_codes) if parts else np.zeros(0, dtype=np.int32),
+        'names': list(name_to_code),
+    }
+
+
+def load_arrays_parallel(path, workers):
+    """
+    Parse a GeoJSON file into city arrays using a process pool.
+
+    Args:
+        path: GeoJSON file (optionally .gz/.zst)
+        workers: Number of worker processes; 1 parses serially
+
+    Returns:
+        dict as city_arrays.load_city_arrays()
+    """
+    parts = _map_ranges(path, workers, _parse_range_arrays)
+    if parts is None:
+        from city_arrays import load_city_arrays
+        from geojson_io import iter_features
+        return load_city_arrays(iter_features(path))
+
+    return merge_city_arrays(parts)
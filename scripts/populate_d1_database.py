@@ -4,27 +4,29 @@ Generate SQL INSERT statements to populate D1 database from GeoJSON files.
 Output can be piped to wrangler d1 execute.
 """
 
-import json
 import sys
 
-def generate_inserts(geojson_file, city_name):
+import json_backend
+from geojson_io import iter_features
+from spatial_sort import add_spatial_sort_argument, hilbert_sorted
+
+def generate_inserts(geojson_file, city_name, spatial_sort=False):
     """
     Generate SQL INSERT statements from GeoJSON file.
 
     Args:
         geojson_file: Path to GeoJSON with instance IDs
         city_name: Name of the city (e.g., 'sydney', 'melbourne')
+        spatial_sort: Emit rows in Hilbert order of their bbox centre
+            (see spatial_sort.py) instead of file order
     """
-    print(f"-- Loading {geojson_file}...", file=sys.stderr)
-    with open(geojson_file, 'r') as f:
-        data = json.load(f)
-
-    features = data['features']
-    print(f"-- Processing {len(features)} features for {city_name}", file=sys.stderr)
+    print(f"-- Streaming {geojson_file} for {city_name}...", file=sys.stderr)
 
-    # SQL statements
-    statements = []
+    features = iter_features(geojson_file)
+    if spatial_sort:
+        features = hilbert_sorted(features)
 
+    count = 0
     for feature in features:
         name = feature['properties'].get('name', '')
         if not name:
@@ -33,7 +35,7 @@ def generate_inserts(geojson_file, city_name):
         instance_id = feature['properties'].get('_instanceId', 0)
 
         # Store full precision geometry as JSON string
-        geometry = json.dumps(feature['geometry'])
+        geometry = json_backend.dumps_str(feature['geometry'])
 
         # Calculate bounding box
         coords = feature['geometry']['coordinates']
@@ -50,22 +52,22 @@ def generate_inserts(geojson_file, city_name):
         geom_escaped = geometry.replace("'", "''")
 
         sql = f"INSERT INTO street_segments (city, name, instance_id, geometry, min_lat, max_lat, min_lng, max_lng) VALUES ('{city_name}', '{name_escaped}', {instance_id}, '{geom_escaped}', {min_lat}, {max_lat}, {min_lng}, {max_lng});"
-        statements.append(sql)
-
-    print(f"-- Generated {len(statements)} INSERT statements", file=sys.stderr)
+        # Output SQL (to stdout) as it is generated
+        print(sql)
+        count += 1
 
-    # Output SQL (to stdout)
-    for stmt in statements:
-        print(stmt)
+    print(f"-- Generated {count} INSERT statements", file=sys.stderr)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        print("Usage: python3 populate_d1_database.py <geojson_file> <city_name>", file=sys.stderr)
-        print("Example: python3 populate_d1_database.py data/sydney-roads-web.geojson sydney > sydney.sql", file=sys.stderr)
-        sys.exit(1)
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Generate SQL INSERT statements to populate D1 from GeoJSON',
+        epilog='Example: python3 populate_d1_database.py data/sydney-roads-web.geojson sydney > sydney.sql')
+    parser.add_argument('geojson_file', help='GeoJSON with instance IDs')
+    parser.add_argument('city_name', help='City name (e.g. sydney)')
+    add_spatial_sort_argument(parser)
 
-    geojson_file = sys.argv[1]
-    city_name = sys.argv[2]
+    args = parser.parse_args()
 
-    generate_inserts(geojson_file, city_name)
+    generate_inserts(args.geojson_file, args.city_name, args.spatial_sort)
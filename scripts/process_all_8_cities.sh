@@ -10,6 +10,9 @@ echo ""
 
 CITIES="sydney melbourne brisbane perth adelaide canberra hobart darwin"
 
+# Parallel per-street clustering, e.g. WORKERS=16 on the build box
+WORKERS="${WORKERS:-1}"
+
 for CITY in $CITIES; do
     echo "================================================================"
     echo "Processing: $CITY"
@@ -27,7 +30,7 @@ for CITY in $CITIES; do
     echo "Output: $OUTPUT"
     echo ""
 
-    python3 scripts/process_full_dataset.py "$INPUT" "$OUTPUT"
+    python3 scripts/process_full_dataset.py "$INPUT" "$OUTPUT" --workers "$WORKERS"
 
     echo ""
     echo "Completed: $CITY"
@@ -4,142 +4,52 @@ Process the full Sydney roads dataset using Grid 200m + Highway-Aware method.
 Generates street counts for use in the main visualization.
 """
 
-import json
-from collections import defaultdict
 import time
 
-def method_grid_flood_fill(segments, grid_size):
+import json_backend
+from geojson_io import iter_features
+from grid_engine import method_grid_flood_fill, resolve_backend
+from segment_table import SegmentTable
+
+def count_segment_instances(street_name, segments, grid_size_meters=200):
     """
-    Grid-based flood fill method for grouping connected segments.
+    Count instances of a street from its already-grouped segments.
 
     Args:
-        segments: List of coordinate arrays [[lng, lat], ...]
-        grid_size: Grid cell size in degrees (e.g., 200m = 0.0018 degrees)
+        street_name: Name of the street (used for the highway heuristic)
+        segments: List of coordinate arrays [[lng, lat], ...] for this street
+        grid_size_meters: Grid cell size in meters (default 200m)
 
     Returns:
-        List of component groups, each group is a list of segment indices
+        Number of distinct instances
     """
-    if not segments:
-        return []
-
-    # Map segments to grid cells
-    cell_to_segments = defaultdict(list)
-
-    for seg_idx, coords in enumerate(segments):
-        # Add all cells that this segment touches
-        for coord in coords:
-            lng, lat = coord[0], coord[1]
-            # Round to nearest grid cell
-            cell_lat = round(lat / grid_size) * grid_size
-            cell_lng = round(lng / grid_size) * grid_size
-            cell_key = f"{cell_lat},{cell_lng}"
-            if seg_idx not in cell_to_segments[cell_key]:
-                cell_to_segments[cell_key].append(seg_idx)
-
-    # Flood fill to find connected components
-    visited_cells = set()
-    components = []
-
-    for start_cell in cell_to_segments:
-        if start_cell in visited_cells:
-            continue
-
-        # BFS from this cell
-        queue = [start_cell]
-        visited_cells.add(start_cell)
-        component_segments = set()
-
-        while queue:
-            cell = queue.pop(0)
-
-            # Add all segments in this cell to the component
-            for seg_idx in cell_to_segments[cell]:
-                component_segments.add(seg_idx)
-
-            # Check adjacent cells (8-connected neighborhood)
-            lat_str, lng_str = cell.split(',')
-            lat = float(lat_str)
-            lng = float(lng_str)
-
-            for dlat in [-grid_size, 0, grid_size]:
-                for dlng in [-grid_size, 0, grid_size]:
-                    if dlat == 0 and dlng == 0:
-                        continue
-
-                    # Round to avoid floating point precision issues
-                    adj_lat = round((lat + dlat) / grid_size) * grid_size
-                    adj_lng = round((lng + dlng) / grid_size) * grid_size
-                    adj_cell = f"{adj_lat},{adj_lng}"
-
-                    if adj_cell in cell_to_segments and adj_cell not in visited_cells:
-                        visited_cells.add(adj_cell)
-                        queue.append(adj_cell)
-
-        # Add component if it has segments
-        if component_segments:
-            components.append(list(component_segments))
+    # Convert grid size from meters to degrees (approximately)
+    # At Sydney's latitude, 1 degree ≈ 111km = 111000m
+    grid_size = grid_size_meters / 111000
 
-    # Post-process: merge components that share endpoints
-    components = merge_components_by_endpoints(segments, components)
+    # Run grid flood fill
+    components = method_grid_flood_fill(segments, grid_size)
 
-    return components
+    # Check if this is a highway/freeway (Highway-Aware heuristic)
+    is_highway = False
+    if 'Highway' in street_name or 'Freeway' in street_name or 'Motorway' in street_name:
+        is_highway = True
 
+    # If it's a highway and we found multiple components, merge them all
+    if is_highway and len(components) > 1:
+        return 1
 
-def merge_components_by_endpoints(segments, components):
-    """
-    Merge components that share any endpoint coordinates.
-    This handles the case where segments connect but fall in different grid cells.
-    """
-    if len(components) <= 1:
-        return components
-
-    # Build endpoint -> component mapping
-    endpoint_to_components = defaultdict(set)
-
-    for comp_idx, component in enumerate(components):
-        for seg_idx in component:
-            coords = segments[seg_idx]
-            if coords:
-                # Get first and last point
-                start = tuple(coords[0])  # (lng, lat)
-                end = tuple(coords[-1])
-                endpoint_to_components[start].add(comp_idx)
-                endpoint_to_components[end].add(comp_idx)
-
-    # Find components that need to be merged (share endpoints)
-    # Use union-find to group connected components
-    parent = list(range(len(components)))
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    # Union components that share endpoints
-    for endpoint, comp_indices in endpoint_to_components.items():
-        if len(comp_indices) > 1:
-            comp_list = list(comp_indices)
-            for i in range(len(comp_list) - 1):
-                union(comp_list[i], comp_list[i + 1])
-
-    # Group segments by their merged component
-    merged = defaultdict(list)
-    for comp_idx, component in enumerate(components):
-        root = find(comp_idx)
-        merged[root].extend(component)
-
-    return list(merged.values())
+    return len(components)
 
 
 def count_street_instances(street_name, features, grid_size_meters=200):
     """
     Count instances of a street using Grid + Highway-Aware method.
 
+    Scans every feature to find the street's segments, so prefer
+    SegmentTable.segments_by_name() + count_segment_instances() when
+    counting many streets from the same dataset.
+
     Args:
         street_name: Name of the street to count
         features: List of GeoJSON features
@@ -161,62 +71,107 @@ def count_street_instances(street_name, features, grid_size_meters=200):
         if coords:
             segments.append(coords)
 
-    # Convert grid size from meters to degrees (approximately)
-    # At Sydney's latitude, 1 degree ≈ 111km = 111000m
-    grid_size = grid_size_meters / 111000
+    return count_segment_instances(street_name, segments, grid_size_meters)
 
-    # Run grid flood fill
-    components = method_grid_flood_fill(segments, grid_size)
 
-    # Check if this is a highway/freeway (Highway-Aware heuristic)
-    is_highway = False
-    if 'Highway' in street_name or 'Freeway' in street_name or 'Motorway' in street_name:
-        is_highway = True
+def count_streets_from_arrays(arrays, workers=1, grid_size_meters=200):
+    """
+    Count instances of every street from columnar city arrays.
 
-    # If it's a highway and we found multiple components, merge them all
-    if is_highway and len(components) > 1:
-        return 1
+    Args:
+        arrays: Output of city_arrays.load_city_arrays() or
+            city_store.open_city_store()
+        workers: 1 for the vectorized backend, more to run the per-street
+            engine in a process pool
+        grid_size_meters: Grid cell size in meters (default 200m)
 
-    return len(components)
+    Returns:
+        Dict mapping street name -> number of instances, sorted by name
+    """
+    if workers > 1:
+        from parallel_clustering import cluster_city_parallel
+        _, instance_counts = cluster_city_parallel(arrays, grid_size_meters / 111000, workers)
+    else:
+        from grid_numpy import cluster_city_grid
+        _, instance_counts = cluster_city_grid(arrays, grid_size_meters / 111000)
+    counts_by_name = dict(zip(arrays['names'], instance_counts.tolist()))
 
+    return {name: counts_by_name[name] for name in sorted(counts_by_name)}
 
-def process_dataset(input_file, output_file):
+
+def process_dataset(input_file, output_file, backend='auto', workers=1, parse_workers=1):
     """
     Process the full dataset and generate street counts.
 
     Args:
-        input_file: Path to GeoJSON file
+        input_file: Path to GeoJSON file or city store directory
         output_file: Path to output JSON file with counts
+        backend: 'numpy' (whole-city vectorized), 'python' (per-street loop)
+            or 'auto' to use numpy when it is installed
+        workers: Number of processes for the per-street backend; more than
+            one implies the python backend unless numpy is requested
+        parse_workers: Number of processes to parse the GeoJSON with
+            (parallel_parse.py); 1 streams it serially
     """
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    features = data['features']
-    print(f"Loaded {len(features)} features")
-
-    # Get all unique street names
-    street_names = set()
-    for feature in features:
-        name = feature['properties'].get('name')
-        if name:
-            street_names.add(name)
-
-    print(f"Found {len(street_names)} unique street names")
-
-    # Count instances for each street
-    street_counts = {}
-    start_time = time.time()
-
-    for i, street_name in enumerate(sorted(street_names)):
-        count = count_street_instances(street_name, features, grid_size_meters=200)
-        street_counts[street_name] = count
-
-        if (i + 1) % 100 == 0:
-            elapsed = time.time() - start_time
-            avg_time = elapsed / (i + 1)
-            remaining = avg_time * (len(street_names) - i - 1)
-            print(f"Processed {i + 1}/{len(street_names)} streets ({elapsed:.1f}s elapsed, ~{remaining:.1f}s remaining)")
+    if workers > 1 and backend == 'auto':
+        backend = 'python'
+    backend = resolve_backend(backend)
+    print(f"Backend: {backend}" + (f" ({workers} workers)" if backend == 'python' and workers > 1 else ""))
+
+    # processing_time_seconds covers clustering only, as it always has;
+    # loading and parsing are only reported on the console
+    load_start = time.time()
+
+    if backend == 'numpy' or workers > 1:
+        # Columnar arrays: memory-mapped from a city store, or streamed from GeoJSON
+        from city_store import load_arrays
+
+        print(f"Loading {input_file}...")
+        arrays = load_arrays(input_file, parse_workers=parse_workers)
+        total_segments = len(arrays['name_codes'])
+        print(f"Loaded {total_segments} features in {time.time() - load_start:.2f} seconds")
+        start_time = time.time()
+
+        # One vectorized pass, or the per-street engine over shared-memory
+        # arrays in a process pool
+        street_counts = count_streets_from_arrays(arrays, workers if backend == 'python' else 1,
+                                                  grid_size_meters=200)
+        street_names = street_counts.keys()
+        print(f"Found {len(street_names)} unique street names")
+    else:
+        # Stream features; only names and coordinates are kept in memory
+        if parse_workers > 1:
+            from parallel_parse import load_features_parallel
+            print(f"Parsing {input_file} with {parse_workers} processes...")
+            features = load_features_parallel(input_file, parse_workers)
+        else:
+            print(f"Streaming {input_file}...")
+            features = iter_features(input_file)
+        table = SegmentTable.from_features(features)
+        del features
+        total_segments = len(table)
+
+        # Index segments by street name in one pass over the table
+        segments_by_name = table.segments_by_name()
+        street_names = segments_by_name.keys()
+        print(f"Loaded {total_segments} features in {time.time() - load_start:.2f} seconds")
+
+        print(f"Found {len(street_names)} unique street names")
+        start_time = time.time()
+
+        # Count instances for each street
+        street_counts = {}
+
+        for i, street_name in enumerate(sorted(street_names)):
+            segments = [table.segment_coords(table[idx]) for idx in segments_by_name[street_name]]
+            count = count_segment_instances(street_name, segments, grid_size_meters=200)
+            street_counts[street_name] = count
+
+            if (i + 1) % 100 == 0:
+                elapsed = time.time() - start_time
+                avg_time = elapsed / (i + 1)
+                remaining = avg_time * (len(street_names) - i - 1)
+                print(f"Processed {i + 1}/{len(street_names)} streets ({elapsed:.1f}s elapsed, ~{remaining:.1f}s remaining)")
 
     total_time = time.time() - start_time
     print(f"\nCompleted in {total_time:.2f} seconds")
@@ -227,14 +182,13 @@ def process_dataset(input_file, output_file):
         'method': 'Grid 200m + Highway-Aware',
         'grid_size_meters': 200,
         'total_streets': len(street_names),
-        'total_segments': len(features),
+        'total_segments': total_segments,
         'processing_time_seconds': total_time,
         'counts': street_counts
     }
 
     print(f"\nSaving results to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    json_backend.dump(output_data, output_file)
 
     # Print some statistics
     print("\n=== Top 20 Most Common Street Names ===")
@@ -250,13 +204,20 @@ def process_dataset(input_file, output_file):
 
 
 if __name__ == '__main__':
-    import sys
-
-    if len(sys.argv) >= 3:
-        input_file = sys.argv[1]
-        output_file = sys.argv[2]
-    else:
-        input_file = 'data/sydney-roads-osm.geojson'
-        output_file = 'data/street_counts_grid200.json'
-
-    process_dataset(input_file, output_file)
+    import argparse
+    parser = argparse.ArgumentParser(description='Count street instances with Grid 200m + Highway-Aware')
+    parser.add_argument('input', nargs='?', default='data/sydney-roads-osm.geojson',
+                        help='Input GeoJSON file')
+    parser.add_argument('output', nargs='?', default='data/street_counts_grid200.json',
+                        help='Output counts JSON file')
+    parser.add_argument('--backend', choices=['auto', 'numpy', 'python'], default='auto',
+                        help='Clustering backend (default: numpy if installed)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Cluster streets in N processes with the per-street backend')
+    parser.add_argument('--parse-workers', type=int, default=1,
+                        help='Parse the input GeoJSON in N processes')
+
+    args = parser.parse_args()
+
+    process_dataset(args.input, args.output, backend=args.backend, workers=args.workers,
+                    parse_workers=args.parse_workers)
@@ -4,139 +4,10 @@ Process the full Melbourne roads dataset using Grid 200m + Highway-Aware method.
 Generates street counts for use in the main visualization.
 """
 
-import json
-from collections import defaultdict
 import time
 
-def method_grid_flood_fill(segments, grid_size):
-    """
-    Grid-based flood fill method for grouping connected segments.
-
-    Args:
-        segments: List of coordinate arrays [[lng, lat], ...]
-        grid_size: Grid cell size in degrees (e.g., 200m = 0.0018 degrees)
-
-    Returns:
-        List of component groups, each group is a list of segment indices
-    """
-    if not segments:
-        return []
-
-    # Map segments to grid cells
-    cell_to_segments = defaultdict(list)
-
-    for seg_idx, coords in enumerate(segments):
-        # Add all cells that this segment touches
-        for coord in coords:
-            lng, lat = coord[0], coord[1]
-            # Round to nearest grid cell
-            cell_lat = round(lat / grid_size) * grid_size
-            cell_lng = round(lng / grid_size) * grid_size
-            cell_key = f"{cell_lat},{cell_lng}"
-            if seg_idx not in cell_to_segments[cell_key]:
-                cell_to_segments[cell_key].append(seg_idx)
-
-    # Flood fill to find connected components
-    visited_cells = set()
-    visited_segments = set()
-    components = []
-
-    for start_cell in cell_to_segments:
-        if start_cell in visited_cells:
-            continue
-
-        # BFS from this cell
-        queue = [start_cell]
-        visited_cells.add(start_cell)
-        component_segments = set()
-
-        while queue:
-            cell = queue.pop(0)
-
-            # Add all segments in this cell to the component
-            for seg_idx in cell_to_segments[cell]:
-                component_segments.add(seg_idx)
-
-            # Check adjacent cells (8-connected neighborhood)
-            lat_str, lng_str = cell.split(',')
-            lat = float(lat_str)
-            lng = float(lng_str)
-
-            for dlat in [-grid_size, 0, grid_size]:
-                for dlng in [-grid_size, 0, grid_size]:
-                    if dlat == 0 and dlng == 0:
-                        continue
-
-                    # Round to avoid floating point precision issues
-                    adj_lat = round((lat + dlat) / grid_size) * grid_size
-                    adj_lng = round((lng + dlng) / grid_size) * grid_size
-                    adj_cell = f"{adj_lat},{adj_lng}"
-
-                    if adj_cell in cell_to_segments and adj_cell not in visited_cells:
-                        visited_cells.add(adj_cell)
-                        queue.append(adj_cell)
-
-        # Only add non-empty components with new segments
-        new_segments = component_segments - visited_segments
-        if new_segments:
-            components.append(list(new_segments))
-            visited_segments.update(new_segments)
-
-    # Post-process: merge components that share endpoints
-    components = merge_components_by_endpoints(segments, components)
-
-    return components
-
-
-def merge_components_by_endpoints(segments, components):
-    """
-    Merge components that share any endpoint coordinates.
-    This handles the case where segments connect but fall in different grid cells.
-    """
-    if len(components) <= 1:
-        return components
-
-    # Build endpoint -> component mapping
-    endpoint_to_components = defaultdict(set)
-
-    for comp_idx, component in enumerate(components):
-        for seg_idx in component:
-            coords = segments[seg_idx]
-            if coords:
-                # Get first and last point
-                start = tuple(coords[0])  # (lng, lat)
-                end = tuple(coords[-1])
-                endpoint_to_components[start].add(comp_idx)
-                endpoint_to_components[end].add(comp_idx)
-
-    # Find components that need to be merged (share endpoints)
-    # Use union-find to group connected components
-    parent = list(range(len(components)))
-
-    def find(x):
-        if parent[x] != x:
-            parent[x] = find(parent[x])
-        return parent[x]
-
-    def union(x, y):
-        px, py = find(x), find(y)
-        if px != py:
-            parent[px] = py
-
-    # Union components that share endpoints
-    for endpoint, comp_indices in endpoint_to_components.items():
-        if len(comp_indices) > 1:
-            comp_list = list(comp_indices)
-            for i in range(len(comp_list) - 1):
-                union(comp_list[i], comp_list[i + 1])
-
-    # Group segments by their merged component
-    merged = defaultdict(list)
-    for comp_idx, component in enumerate(components):
-        root = find(comp_idx)
-        merged[root].extend(component)
-
-    return list(merged.values())
+import json_backend
+from grid_engine import method_grid_flood_fill
 
 
 def count_street_instances(street_name, features, grid_size_meters=200):
@@ -169,7 +40,7 @@ def count_street_instances(street_name, features, grid_size_meters=200):
     grid_size = grid_size_meters / 111000
 
     # Run grid flood fill
-    components = method_grid_flood_fill(segments, grid_size)
+    components = method_grid_flood_fill(segments, grid_size, dedupe_segments=True)
 
     # Check if this is a highway/freeway (Highway-Aware heuristic)
     is_highway = False
@@ -192,8 +63,7 @@ def process_dataset(input_file, output_file):
         output_file: Path to output JSON file with counts
     """
     print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
+    data = json_backend.load(input_file)
 
     features = data['features']
     print(f"Loaded {len(features)} features")
@@ -236,8 +106,7 @@ def process_dataset(input_file, output_file):
     }
 
     print(f"\nSaving results to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(output_data, f, indent=2)
+    json_backend.dump(output_data, output_file)
 
     # Print some statistics
     print("\n=== Top 20 Most Common Street Names ===")
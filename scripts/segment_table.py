@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory model of a city's street segments.
+
+A parsed GeoJSON feature is a dict of dicts holding a list of [lng, lat]
+lists, roughly 100 bytes per vertex plus a few hundred per feature, and hot
+loops look every field up by key. SegmentTable keeps the same data as one
+flat array('d') of interleaved lng, lat values, dictionary-coded name,
+highway and readable ID columns, and one Segment record (__slots__, no
+per-instance dict) per feature. Features are converted on the way in
+(from_features) at the edge of a pipeline.
+
+Only the name, highway, _instanceId and _readableId properties and the first
+two values of each vertex are kept. Unlike city_arrays.py this needs only
+the standard library, so the pure-python clustering backend can use it.
+"""
+
+from array import array
+
+
+class Segment:
+    """
+    One street segment: property codes and its slice of the table's coordinates.
+
+    Codes index SegmentTable.names / highways / readable_ids, -1 if absent.
+    instance_id is the _instanceId property, or None if absent.
+    """
+
+    __slots__ = ('name_code', 'highway_code', 'offset', 'length', 'instance_id', 'readable_code')
+
+    def __init__(self, name_code, highway_code, offset, length, instance_id=None, readable_code=-1):
+        self.name_code = name_code
+        self.highway_code = highway_code
+        self.offset = offset
+        self.length = length
+        self.instance_id = instance_id
+        self.readable_code = readable_code
+
+    def __repr__(self):
+        return (f"Segment(name_code={self.name_code}, highway_code={self.highway_code}, "
+                f"offset={self.offset}, length={self.length}, instance_id={self.instance_id})")
+
+
+def _code(value, values, codes):
+    """Dictionary-code one property value (-1 for missing/empty)."""
+    if not value:
+        return -1
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(values)
+        values.append(value)
+    return code
+
+
+class SegmentTable:
+    """
+    Segments of one city with array-backed coordinates.
+
+    Segment i is table[i]; its vertices are coords[2 * offset:2 * (offset + length)]
+    as interleaved lng, lat.
+    """
+
+    def __init__(self):
+        self.segments = []
+        self.coords = array('d')
+        self.names = []
+        self.highways = []
+        self.readable_ids = []
+        self._name_codes = {}
+        self._highway_codes = {}
+        self._readable_codes = {}
+
+    @classmethod
+    def from_features(cls, features):
+        """
+        Build a table from GeoJSON LineString features, one segment per feature.
+
+        Args:
+            features: Iterable of GeoJSON features (e.g. geojson_io.iter_features())
+        """
+        table = cls()
+        for feature in features:
+            table.append(feature)
+        return table
+
+    def append(self, feature):
+        """Add one GeoJSON feature; returns its Segment."""
+        properties = feature['properties']
+        coords = feature['geometry']['coordinates']
+
+        offset = len(self.coords) // 2
+        for vertex in coords:
+            self.coords.append(vertex[0])
+            self.coords.append(vertex[1])
+
+        segment = Segment(
+            _code(properties.get('name'), self.names, self._name_codes),
+            _code(properties.get('highway'), self.highways, self._highway_codes),
+            offset,
+            len(coords),
+            properties.get('_instanceId'),
+            _code(properties.get('_readableId'), self.readable_ids, self._readable_codes),
+        )
+        self.segments.append(segment)
+        return segment
+
+    def stream(self, features):
+        """
+        Append features one at a time, yielding (feature, Segment) pairs.
+
+        Only the current segment is kept: coordinates, segment records and
+        its readable ID (unique to one instance, so not worth interning) are
+        dropped before the next feature is read. The name and highway
+        dictionaries are kept, so those codes stay valid. For single-pass
+        consumers that need no random access.
+        """
+        for feature in features:
+            del self.coords[:]
+            self.segments.clear()
+            self.readable_ids.clear()
+            self._readable_codes.clear()
+            yield feature, self.append(feature)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __getitem__(self, idx):
+        return self.segments[idx]
+
+    def name(self, segment):
+        """Street name of a segment, or None."""
+        return self.names[segment.name_code] if segment.name_code >= 0 else None
+
+    def highway(self, segment):
+        """OSM highway tag of a segment, or None."""
+        return self.highways[segment.highway_code] if segment.highway_code >= 0 else None
+
+    def readable_id(self, segment):
+        """_readableId of a segment, or None."""
+        return self.readable_ids[segment.readable_code] if segment.readable_code >= 0 else None
+
+    def segment_coords(self, segment):
+        """Vertices of a segment as a list of (lng, lat) tuples, for the clustering engines."""
+        start = 2 * segment.offset
+        stop = start + 2 * segment.length
+        return list(zip(self.coords[start:stop:2], self.coords[start + 1:stop:2]))
+
+    def bbox(self, segment):
+        """(min_lng, min_lat, max_lng, max_lat) of a segment with at least one vertex."""
+        start = 2 * segment.offset
+        stop = start + 2 * segment.length
+        lngs = self.coords[start:stop:2]
+        lats = self.coords[start + 1:stop:2]
+        return min(lngs), min(lats), max(lngs), max(lats)
+
+    def segments_by_name(self):
+        """
+        Group segment indices by street name in one pass.
+
+        Every named segment's name is a key; only segments with at least one
+        vertex are listed, in table order (so a name can map to an empty list).
+
+        Returns:
+            Dict mapping street name -> list of segment indices
+        """
+        groups = [[] for _ in self.names]
+        for idx, segment in enumerate(self.segments):
+            if segment.name_code >= 0 and segment.length:
+                groups[segment.name_code].append(idx)
+        return dict(zip(self.names, groups))
@@ -4,9 +4,10 @@ Simplify GeoJSON coordinates by rounding to specified precision.
 This reduces file size and makes lines less wiggly on the map.
 """
 
-import json
 import sys
 
+from geojson_io import iter_features, write_feature_collection
+
 def round_coordinate(coord, precision):
     """Round a coordinate to specified decimal places."""
     if isinstance(coord, list):
@@ -37,19 +38,16 @@ def simplify_geojson(input_file, output_file, precision=4):
         output_file: Path to output GeoJSON
         precision: Number of decimal places (4 = ~10m, 5 = ~1m)
     """
-    print(f"Loading {input_file}...")
-    with open(input_file, 'r') as f:
-        data = json.load(f)
-
-    print(f"Simplifying {len(data['features'])} features to {precision} decimal places...")
-
-    for feature in data['features']:
-        if 'geometry' in feature and feature['geometry']:
-            simplify_geometry(feature['geometry'], precision)
+    def simplified_features():
+        """Stream input features with rounded coordinates."""
+        for feature in iter_features(input_file):
+            if 'geometry' in feature and feature['geometry']:
+                simplify_geometry(feature['geometry'], precision)
+            yield feature
 
-    print(f"Saving to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(data, f, separators=(',', ':'))
+    print(f"Simplifying {input_file} -> {output_file} to {precision} decimal places...")
+    count = write_feature_collection(output_file, simplified_features(), separators=(',', ':'))
+    print(f"Simplified {count} features")
 
     print("Done!")
 
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Hilbert-curve spatial ordering of street segments.
+
+Source files keep Overpass response order, so consecutive features (and each
+10,000-row SQL batch built from them) are scattered over the whole city, and
+rows that one viewport query returns sit on pages all over the table. Sorting
+features by the Hilbert index of their bounding-box centre keeps neighbouring
+segments next to each other in the file and in SQLite's rowid order, so a
+bounds query reads far fewer pages.
+
+The curve covers the bounding box of all segment centres at HILBERT_ORDER
+bits per axis (65,536 cells per side, well under a metre for any city).
+Features with equal keys keep their source order.
+
+Usage:
+    python3 scripts/spatial_sort.py data/cities/sydney/streets.geojson data/cities/sydney/streets.sorted.geojson
+"""
+
+import sys
+import time
+
+HILBERT_ORDER = 16
+
+
+def hilbert_index(x, y, order=HILBERT_ORDER):
+    """
+    Distance along the Hilbert curve of grid cell (x, y).
+
+    Args:
+        x, y: Cell coordinates in [0, 2**order)
+        order: Bits per axis
+
+    Returns:
+        Integer in [0, 4**order)
+    """
+    n = 1 << order
+    d = 0
+    s = n >> 1
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so the sub-curve has the standard orientation
+        if ry == 0:
+            if rx == 1:
+                x = n - 1 - x
+                y = n - 1 - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+
+def bbox_centre(coords):
+    """(lng, lat) centre of the bounding box of [[lng, lat], ...]"""
+    lngs = [c[0] for c in coords]
+    lats = [c[1] for c in coords]
+    return (min(lngs) + max(lngs)) / 2, (min(lats) + max(lats)) / 2
+
+
+def hilbert_keys(centres, order=HILBERT_ORDER):
+    """
+    Hilbert index of each (lng, lat) centre over the extent of all of them.
+
+    Returns:
+        List of integers, one per centre
+    """
+    if not centres:
+        return []
+    min_lng = min(c[0] for c in centres)
+    max_lng = max(c[0] for c in centres)
+    min_lat = min(c[1] for c in centres)
+    max_lat = max(c[1] for c in centres)
+
+    cells = (1 << order) - 1
+    lng_scale = cells / (max_lng - min_lng) if max_lng > min_lng else 0.0
+    lat_scale = cells / (max_lat - min_lat) if max_lat > min_lat else 0.0
+    return [hilbert_index(int((lng - min_lng) * lng_scale), int((lat - min_lat) * lat_scale), order)
+            for lng, lat in centres]
+
+
+def hilbert_order(centres, order=HILBERT_ORDER):
+    """
+    Permutation that sorts (lng, lat) centres along the Hilbert curve.
+
+    None entries (segments without coordinates) sort first. sorted() is
+    stable, so ties keep their input order.
+
+    Returns:
+        List of indices into centres
+    """
+    located = [idx for idx, centre in enumerate(centres) if centre is not None]
+    keys = [-1] * len(centres)
+    for idx, key in zip(located, hilbert_keys([centres[idx] for idx in located], order)):
+        keys[idx] = key
+    return sorted(range(len(centres)), key=keys.__getitem__)
+
+
+def hilbert_sorted(features, order=HILBERT_ORDER):
+    """
+    Sort GeoJSON LineString features by the Hilbert index of their bbox centre.
+
+    Features without coordinates sort first, in source order.
+
+    Args:
+        features: Iterable of GeoJSON features (e.g. geojson_io.iter_features())
+        order: Bits per axis of the curve
+
+    Returns:
+        List of the same feature dicts in Hilbert order
+    """
+    features = list(features)
+    centres = [bbox_centre(feature['geometry']['coordinates']) if feature['geometry']['coordinates'] else None
+               for feature in features]
+    return [features[idx] for idx in hilbert_order(centres, order)]
+
+
+def hilbert_table_order(table, order=HILBERT_ORDER):
+    """
+    Permutation that sorts a segment_table.SegmentTable's segments along the Hilbert curve.
+
+    Returns:
+        List of segment indices in Hilbert order
+    """
+    centres = []
+    for segment in table:
+        if segment.length:
+            min_lng, min_lat, max_lng, max_lat = table.bbox(segment)
+            centres.append(((min_lng + max_lng) / 2, (min_lat + max_lat) / 2))
+        else:
+            centres.append(None)
+    return hilbert_order(centres, order)
+
+
+def add_spatial_sort_argument(parser):
+    """Add the shared --spatial-sort flag to an export script's argparse parser."""
+    parser.add_argument('--spatial-sort', action='store_true',
+                        help='Order features along a Hilbert curve before export so that '
+                             'nearby segments are stored together (loads the whole file into memory)')
+
+
+if __name__ == '__main__':
+    import argparse
+    from geojson_io import FeatureCollectionWriter, iter_features
+
+    parser = argparse.ArgumentParser(description='Sort GeoJSON street segments along a Hilbert curve')
+    parser.add_argument('input', help='Input GeoJSON file')
+    parser.add_argument('output', help='Output GeoJSON file (.gz/.zst to compress)')
+
+    args = parser.parse_args()
+
+    start_time = time.time()
+    features = hilbert_sorted(iter_features(args.input))
+    with FeatureCollectionWriter(args.output) as writer:
+        writer.write_all(features)
+    print(f"Wrote {len(features):,} features in Hilbert order to {args.output} "
+          f"in {time.time() - start_time:.2f} seconds", file=sys.stderr)
@@ -0,0 +1,61 @@
+"""
+Instance labels written by add_instance_ids.py.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from add_instance_ids import add_instance_ids  # noqa: E402
+from geojson_io import iter_features, write_feature_collection  # noqa: E402
+
+
+def _feature(name, coords):
+    return {'type': 'Feature', 'geometry': {'type': 'LineString', 'coordinates': coords},
+            'properties': {'name': name, 'highway': 'residential'}}
+
+
+class EmptyGeometryTest(unittest.TestCase):
+    """
+    A feature with no coordinates between two real segments of a street.
+
+    The original implementation indexed the street's features with positions
+    that skipped empty geometries, so the feature after an empty one took
+    the next segment's ID and the last segment got none.
+    """
+
+    FEATURES = [
+        _feature('George Street', [[151.200, -33.870], [151.201, -33.870]]),
+        _feature('George Street', []),
+        _feature('George Street', [[151.300, -33.700], [151.301, -33.700]]),  # ~20 km away
+        _feature('George Street', [[151.201, -33.870], [151.202, -33.870]]),
+    ]
+
+    def _labelled(self, backend):
+        with tempfile.TemporaryDirectory() as work_dir:
+            source = os.path.join(work_dir, 'streets.geojson')
+            output = os.path.join(work_dir, 'streets_with_ids.geojson')
+            write_feature_collection(source, self.FEATURES)
+            add_instance_ids(source, output, 'sydney', backend=backend)
+            return [feature['properties'] for feature in iter_features(output)]
+
+    def assert_labels(self, properties):
+        self.assertEqual([p.get('_readableId') for p in properties],
+                         ['sydney_George_Street_01', None, 'sydney_George_Street_02', 'sydney_George_Street_01'])
+        self.assertEqual([p.get('_instanceId') for p in properties], [0, None, 1, 0])
+        self.assertEqual(properties[0]['_totalInstances'], 2)
+
+    def test_python_backend(self):
+        self.assert_labels(self._labelled('python'))
+
+    def test_numpy_backend(self):
+        self.assert_labels(self._labelled('numpy'))
+
+
+if __name__ == '__main__':
+    unittest.main()
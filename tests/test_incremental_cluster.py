@@ -0,0 +1,107 @@
+"""
+Incremental re-clustering against a table loaded from add_instance_ids.py output.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from add_instance_ids import add_instance_ids  # noqa: E402
+from benchmark_viewport_queries import build_sqlite_database  # noqa: E402
+from generate_sql_batches import iter_inserts  # noqa: E402
+from geojson_io import write_feature_collection  # noqa: E402
+from incremental_cluster import recluster_street  # noqa: E402
+
+
+def _street(name, start_lng, start_lat, n_segments, highway='residential', step=0.0005):
+    """Features for a straight street of chained segments heading east."""
+    features = []
+    for i in range(n_segments):
+        lng = start_lng + i * step
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': [[lng, start_lat], [lng + step, start_lat]]},
+            'properties': {'name': name, 'highway': highway},
+        })
+    return features
+
+
+def _source_features():
+    """A few streets with one or more far-apart instances, interleaved like Overpass output."""
+    streets = [
+        _street('George Street', 151.200, -33.870, 6),
+        _street('George Street', 151.300, -33.700, 4),   # ~20 km away: second instance
+        _street('Pitt Street', 151.205, -33.868, 5),
+        _street('Church Street', 151.000, -33.810, 3),
+        _street('Church Street', 151.100, -33.900, 3),
+        _street('Church Street', 150.900, -33.750, 2),
+        _street('M1 Motorway', 151.150, -33.950, 3, highway='motorway'),
+        _street('M1 Motorway', 151.190, -33.950, 3, highway='motorway'),
+    ]
+    features = []
+    for i in range(max(len(street) for street in streets)):
+        features.extend(street[i] for street in streets if i < len(street))
+    return features
+
+
+class NoOpReclusterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.work_dir.cleanup)
+
+    def _load(self, city_name, spatial_sort=False):
+        """Label the source features for city_name, load them and return a connection."""
+        source = os.path.join(self.work_dir.name, 'streets.geojson')
+        labelled = os.path.join(self.work_dir.name, 'streets_with_ids.geojson')
+        db_path = os.path.join(self.work_dir.name, 'streets.sqlite')
+        write_feature_collection(source, _source_features())
+        add_instance_ids(source, labelled, city_name, backend='python')
+        build_sqlite_database(labelled, 'sydney', db_path,
+                              statements=iter_inserts(labelled, 'sydney', spatial_sort))
+        conn = sqlite3.connect(db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def assert_no_op(self, conn):
+        names = [name for (name,) in conn.execute("SELECT DISTINCT name FROM street_segments")]
+        self.assertTrue(names)
+        for name in names:
+            patch = recluster_street(conn, 'sydney', name)
+            self.assertEqual(patch['updates'], [], name)
+            self.assertEqual(patch['inserts'], [], name)
+
+    def test_city_prefix_as_given(self):
+        # add_instance_ids_all.sh passes the lowercase city name
+        self.assert_no_op(self._load('sydney'))
+
+    def test_city_prefix_detected(self):
+        self.assert_no_op(self._load('Sydney'))
+
+    def test_spatially_sorted_table(self):
+        # Primary keys follow the Hilbert order, not the GeoJSON feature order
+        self.assert_no_op(self._load('sydney', spatial_sort=True))
+
+    def test_new_segment_keeps_instance_numbers(self):
+        conn = self._load('sydney', spatial_sort=True)
+        before = dict(conn.execute(
+            "SELECT id, instance_id FROM street_segments WHERE name = 'Church Street'").fetchall())
+        # Joins the instance around (151.1, -33.9) without touching the others
+        patch = recluster_street(conn, 'sydney', 'Church Street',
+                                 new_segments=[[[151.0985, -33.9], [151.1, -33.9]]])
+        self.assertEqual(patch['updates'], [])
+        self.assertEqual(patch['total_instances'], 3)
+        self.assertEqual(len(patch['inserts']), 1)
+        joined = {before[row_id] for row_id, in conn.execute(
+            "SELECT id FROM street_segments WHERE name = 'Church Street' AND min_lng < 151.102 AND min_lng > 151.09")}
+        self.assertEqual({patch['inserts'][0]['instance_id']}, joined)
+
+
+if __name__ == '__main__':
+    unittest.main()